@@ -0,0 +1,13 @@
+import os
+
+# Settings are read at import time, so the benchmarks provide placeholders for
+# everything they do not actually talk to.
+for key, value in {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_USERNAME": "postgres",
+    "POSTGRES_DB": "postgres",
+    "BASE_DIR": ".",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+
+# Drives an ASGI app in-process so benchmarks measure the application rather
+# than an HTTP client. Lifespan is not run; callers set up app.state themselves.
+async def request(
+    app, method: str, path: str, body: bytes = b"", query: str = ""
+) -> tuple[int, bytes]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+        "app": app,
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    chunks: list[bytes] = []
+    finished = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Streaming responses watch for a disconnect while they send.
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload).encode()
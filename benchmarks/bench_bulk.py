@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.asgi import dumps, request
+from benchmarks.fake_db import make_server, session_override
+from benchmarks.fake_docker import FakeDockerDaemon
+from src.database.database import getSession
+from src.main import app
+from src.server.jobs import JobQueue
+from src.server.manager import ServerManager
+from src.utils import MANAGED_LABEL, UUID_LABEL
+
+
+async def sequential(servers: list, action: str) -> dict[int, int]:
+    statuses: dict[int, int] = {}
+    for server in servers:
+        status, _ = await request(app, "POST", f"/v1/servers/{server.uuid}/{action}")
+        statuses[status] = statuses.get(status, 0) + 1
+    return statuses
+
+
+async def bulk(servers: list, action: str) -> dict[str, int]:
+    body = dumps({"uuids": [str(server.uuid) for server in servers]})
+    status, payload = await request(app, "POST", f"/v1/servers/bulk/{action}", body)
+    if status != 200:
+        raise RuntimeError(f"Bulk request failed with {status}: {payload!r}")
+    results: dict[str, int] = {}
+    for line in payload.splitlines():
+        result = json.loads(line)["status"]
+        results[result] = results.get(result, 0) + 1
+    return results
+
+
+async def timed(label: str, coro) -> None:
+    started = time.perf_counter()
+    outcome = await coro
+    elapsed = time.perf_counter() - started
+    print(f"{label:<18} {elapsed:8.3f}s  {outcome}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="bulk vs per-server lifecycle calls")
+    parser.add_argument("--servers", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    servers = [make_server(port=25500 + i) for i in range(args.servers)]
+    app.dependency_overrides[getSession] = session_override(servers)
+
+    async with FakeDockerDaemon(latency=args.latency) as daemon:
+        for server in servers:
+            daemon.add_container(
+                f"mc_{server.uuid}",
+                ports={"25565/tcp": server.port, "25575/tcp": server.rcon_port},
+                **{MANAGED_LABEL: "true", UUID_LABEL: str(server.uuid)},
+            )
+
+        app.state.server_manager = ServerManager(
+            url=daemon.url, bulk_concurrency=args.concurrency
+        )
+        app.state.jobs = JobQueue()
+        await app.state.server_manager.start()
+        await app.state.server_manager.index.ready.wait()
+        await app.state.jobs.start()
+        try:
+            for action in ("start", "stop"):
+                await timed(f"sequential {action}", sequential(servers, action))
+                await timed(f"bulk {action}", bulk(servers, action))
+        finally:
+            await app.state.jobs.close()
+            await app.state.server_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import concurrent.futures
+import time
+
+from benchmarks.fake_rcon import FakeRconServer
+from src.server.rcon import RconConnection, RconPool
+
+PASSWORD = "benchmark"
+
+
+async def one_shot(port: int, command: str) -> str:
+    connection = RconConnection("127.0.0.1", port, PASSWORD, timeout=5.0)
+    await connection.connect()
+    try:
+        return await connection.command(command)
+    finally:
+        await connection.close()
+
+
+def one_shot_sync(port: int, command: str) -> str:
+    return asyncio.run(one_shot(port, command))
+
+
+# What ConsoleManager used to do: a fresh process pool and a fresh login per call.
+async def process_per_command(port: int, command: str) -> str:
+    loop = asyncio.get_running_loop()
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        return await loop.run_in_executor(executor, one_shot_sync, port, command)
+
+
+async def run(label: str, send, total: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int) -> None:
+        async with semaphore:
+            await send(f"say {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {total / elapsed:10.1f} commands/s  ({elapsed:.2f}s)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="RCON client throughput")
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--legacy-commands", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    async with FakeRconServer(PASSWORD) as server:
+        await run(
+            "process per command",
+            lambda c: process_per_command(server.port, c),
+            args.legacy_commands,
+            args.concurrency,
+        )
+        await run(
+            "login per command",
+            lambda c: one_shot(server.port, c),
+            args.commands,
+            args.concurrency,
+        )
+
+        pool = RconPool("127.0.0.1", server.port, PASSWORD)
+        try:
+            await run("pooled", pool.command, args.commands, args.concurrency)
+        finally:
+            await pool.close()
+
+        assert (await one_shot(server.port, "big 10000")) == "x" * 10000
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
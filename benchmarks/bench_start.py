@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.asgi import request
+from benchmarks.fake_db import make_server, session_override
+from benchmarks.fake_docker import FakeDockerDaemon
+from src.database.database import getSession
+from src.main import app
+from src.server.jobs import JobQueue
+from src.server.manager import ServerManager, getManager
+from src.utils import MANAGED_LABEL, UUID_LABEL
+
+
+def per_request_manager(url: str):
+    # What getManager used to do: a new Docker session for every request.
+    async def getPerRequestManager():
+        manager = ServerManager(url=url)
+        try:
+            yield manager
+        finally:
+            await manager.close()
+
+    return getPerRequestManager
+
+
+def report(daemon: FakeDockerDaemon, before: tuple[int, int]) -> None:
+    connections = daemon.connections - before[0]
+    inspects = daemon.inspects - before[1]
+    print(f"{'':<14} {connections} daemon connections, {inspects} inspects")
+
+
+async def run(label: str, path: str, total: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: dict[int, int] = {}
+
+    async def worker() -> None:
+        async with semaphore:
+            status, _ = await request(app, "POST", path)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {total / elapsed:10.1f} req/s  statuses={statuses}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="/v1/servers/{uuid}/start req/s")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = make_server()
+    path = f"/v1/servers/{server.uuid}/start"
+    app.dependency_overrides[getSession] = session_override([server])
+    app.state.jobs = JobQueue()
+    await app.state.jobs.start()
+
+    async with FakeDockerDaemon(latency=args.latency) as daemon:
+        daemon.add_container(
+            f"mc_{server.uuid}",
+            ports={"25565/tcp": server.port, "25575/tcp": server.rcon_port},
+            **{MANAGED_LABEL: "true", UUID_LABEL: str(server.uuid)},
+        )
+
+        app.dependency_overrides[getManager] = per_request_manager(daemon.url)
+        before = daemon.connections, daemon.inspects
+        await run("per-request", path, args.requests, args.concurrency)
+        report(daemon, before)
+        del app.dependency_overrides[getManager]
+
+        app.state.server_manager = ServerManager(url=daemon.url)
+        await app.state.server_manager.start()
+        await app.state.server_manager.index.ready.wait()
+        before = daemon.connections, daemon.inspects
+        try:
+            await run("shared", path, args.requests, args.concurrency)
+        finally:
+            await app.state.server_manager.close()
+            await app.state.jobs.close()
+        report(daemon, before)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
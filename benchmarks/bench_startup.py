@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmarks  # noqa: F401
+from benchmarks.fake_docker import FakeDockerDaemon
+
+# Run in a fresh interpreter each time, so nothing is imported already.
+PHASES = """
+import time
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+src.main.create_app()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def phases(env: dict) -> tuple[float, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", PHASES],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    imported, built = result.stdout.split()
+    return float(imported), float(built)
+
+
+async def health_status(port: int) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(
+            b"GET /health HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n"
+        )
+        return await reader.readline()
+    finally:
+        writer.close()
+
+
+# Process start until /health first answers 200, lifespan included.
+async def first_health(env: dict, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "--factory",
+        "src.main:create_app",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.returncode is not None:
+                lines = (await process.stderr.read()).decode().splitlines()
+                # The exception, not uvicorn's "Application startup failed".
+                causes = [line for line in lines if "Error" in line] or lines
+                raise RuntimeError(causes[-1] if causes else "exited")
+            try:
+                if b" 200 " in await health_status(port):
+                    return time.perf_counter() - started
+            except OSError:
+                pass
+            await asyncio.sleep(0.01)
+        raise TimeoutError(f"/health not up after {timeout}s")
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<18} median {statistics.median(samples):7.3f}s  "
+        f"min {min(samples):7.3f}s  max {max(samples):7.3f}s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="time to first /health")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="fail when the median time to /health exceeds this many seconds",
+    )
+    parser.add_argument(
+        "--phases-only",
+        action="store_true",
+        help="skip the server runs, which need the configured Postgres",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as servers_dir:
+        await run(args, servers_dir)
+
+
+async def run(args: argparse.Namespace, servers_dir: str) -> None:
+    async with FakeDockerDaemon() as daemon:
+        env = {**os.environ, "DOCKER_URL": daemon.url, "SERVERS_DIR": servers_dir}
+
+        imports, factories = [], []
+        for _ in range(args.runs):
+            imported, built = await asyncio.to_thread(phases, env)
+            imports.append(imported)
+            factories.append(built)
+        report("import src.main", imports)
+        report("create_app()", factories)
+        if args.phases_only:
+            return
+
+        healthy = []
+        for _ in range(args.runs):
+            try:
+                healthy.append(await first_health(env, args.timeout))
+            except (RuntimeError, TimeoutError) as e:
+                sys.exit(f"first /health        failed: {e}")
+        report("first /health", healthy)
+
+    if args.budget is not None and statistics.median(healthy) > args.budget:
+        sys.exit(f"Startup exceeds the {args.budget}s budget")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
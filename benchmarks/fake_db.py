@@ -0,0 +1,67 @@
+import uuid as uuid_lib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+# Stands in for both ORM instances and Core rows.
+class FakeRow(SimpleNamespace):
+    def _asdict(self) -> dict:
+        return dict(vars(self))
+
+
+def make_server(port: int = 25565, version: str = "latest", **fields):
+    data = {
+        "id": port,
+        "uuid": uuid_lib.uuid4(),
+        "port": port,
+        "rcon_port": port + 100,
+        "rcon_password": "benchmark",
+        "version": version,
+        "created_at": datetime.now(timezone.utc),
+        "node": None,
+        "profile": None,
+        "memory_mb": None,
+        "cpus": None,
+        "cpuset": None,
+        "pids_limit": None,
+    }
+    data.update(fields)
+    return FakeRow(**data)
+
+
+class FakeResult:
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self) -> list:
+        return self.rows
+
+
+# Answers repository queries from a list of rows. Only equality and IN filters
+# on `uuid` and equality on `version` are understood.
+class FakeSession:
+    def __init__(self, servers: list):
+        self.servers = servers
+
+    async def execute(self, query) -> FakeResult:
+        rows = self.servers
+        for key, value in query.compile().params.items():
+            if key.startswith("uuid"):
+                uuids = value if isinstance(value, (list, tuple)) else [value]
+                rows = [s for s in rows if s.uuid in uuids]
+            elif key.startswith("version"):
+                rows = [s for s in rows if s.version == value]
+        return FakeResult(rows)
+
+
+def session_override(servers: list):
+    async def getSession():
+        yield FakeSession(servers)
+
+    return getSession
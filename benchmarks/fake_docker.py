@@ -0,0 +1,384 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid as uuid_lib
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+API_VERSION = "v1.43"
+
+
+def rfc3339(moment: float) -> str:
+    return datetime.fromtimestamp(moment, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+
+
+# In-memory stand-in for the Docker Engine API on a unix socket. It implements
+# the handful of endpoints ServerManager uses; `latency` adds a fixed delay to
+# every request to mimic a loaded daemon.
+class FakeDockerDaemon:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        stats_interval: float = 1.0,
+        memory_total: int = 64 * 2**30,
+    ):
+        self.latency = latency
+        self.memory_total = memory_total
+        self.stats_interval = stats_interval
+        self.stats_streams = 0
+        self.log_streams = 0
+        self._log_followers: dict[str, set[asyncio.Queue]] = {}
+        self.containers: dict[str, dict] = {}
+        self.requests = 0
+        self.connections = 0
+        self.inspects = 0
+        self.images: set[str] = set()
+        self.pulls = 0
+        self._subscribers: set[asyncio.Queue] = set()
+        self.socket_path = os.path.join(
+            tempfile.mkdtemp(prefix="fake-docker-"), "docker.sock"
+        )
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def add_container(
+        self, name: str, state: str = "exited", ports: dict | None = None, **labels
+    ) -> dict:
+        container = {
+            "Id": uuid_lib.uuid4().hex,
+            "Name": f"/{name}",
+            "State": {"Status": state, "Running": state == "running"},
+            "Config": {"Tty": False, "Labels": labels},
+            "Logs": [],
+            "HostConfig": {
+                "PortBindings": {
+                    port: [{"HostIp": "", "HostPort": str(host_port)}]
+                    for port, host_port in (ports or {}).items()
+                }
+            },
+        }
+        self.containers[container["Id"]] = container
+        self.emit(container, "create")
+        return container
+
+    def write_log(self, container: dict, line: str) -> None:
+        entry = (time.time(), line)
+        container["Logs"].append(entry)
+        for queue in self._log_followers.get(container["Id"], ()):
+            queue.put_nowait(entry)
+
+    def set_health(self, container: dict, status: str) -> None:
+        container["State"]["Health"] = {"Status": status}
+        self.emit(container, f"health_status: {status}")
+
+    def emit(self, container: dict, action: str) -> None:
+        event = {
+            "Type": "container",
+            "Action": action,
+            "Actor": {
+                "ID": container["Id"],
+                "Attributes": {
+                    "name": container["Name"][1:],
+                    **container["Config"]["Labels"],
+                },
+            },
+            "time": int(time.time()),
+        }
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def drop_event_streams(self) -> None:
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    def find(self, ref: str) -> dict | None:
+        if ref in self.containers:
+            return self.containers[ref]
+        for container in self.containers.values():
+            if container["Name"] == f"/{ref}" or container["Id"].startswith(ref):
+                return container
+        return None
+
+    async def start(self) -> "FakeDockerDaemon":
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/version", self._version)
+        app.router.add_get(f"/{API_VERSION}/info", self._info)
+        app.router.add_get(f"/{API_VERSION}/events", self._events)
+        app.router.add_get(f"/{API_VERSION}/images/json", self._images)
+        app.router.add_post(f"/{API_VERSION}/images/create", self._pull)
+        app.router.add_get(f"/{API_VERSION}/containers/json", self._list)
+        app.router.add_post(f"/{API_VERSION}/containers/create", self._create)
+        app.router.add_get(f"/{API_VERSION}/containers/{{ref}}/json", self._inspect)
+        app.router.add_get(f"/{API_VERSION}/containers/{{ref}}/stats", self._stats)
+        app.router.add_get(f"/{API_VERSION}/containers/{{ref}}/logs", self._logs)
+        app.router.add_post(f"/{API_VERSION}/containers/{{ref}}/update", self._update)
+        app.router.add_post(
+            f"/{API_VERSION}/containers/{{ref}}/{{action}}", self._action
+        )
+        app.router.add_delete(f"/{API_VERSION}/containers/{{ref}}", self._delete)
+
+        self._runner = web.AppRunner(app, handle_signals=False, access_log=None)
+        await self._runner.setup()
+        await web.UnixSite(self._runner, self.socket_path).start()
+        return self
+
+    async def close(self) -> None:
+        self.drop_event_streams()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self) -> "FakeDockerDaemon":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        # The first request on a keep-alive connection is a new dial.
+        transport = request.transport
+        if transport is not None and not getattr(transport, "_fake_seen", False):
+            transport._fake_seen = True
+            self.connections += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    def _missing(self, ref: str) -> web.Response:
+        return web.json_response({"message": f"No such container: {ref}"}, status=404)
+
+    async def _version(self, request: web.Request) -> web.Response:
+        return web.json_response({"ApiVersion": API_VERSION[1:]})
+
+    async def _info(self, request: web.Request) -> web.Response:
+        running = sum(c["State"]["Running"] for c in self.containers.values())
+        return web.json_response(
+            {
+                "MemTotal": self.memory_total,
+                "Containers": len(self.containers),
+                "ContainersRunning": running,
+            }
+        )
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while (event := await queue.get()) is not None:
+                await response.write(json.dumps(event).encode() + b"\n")
+        finally:
+            self._subscribers.discard(queue)
+        return response
+
+    async def _images(self, request: web.Request) -> web.Response:
+        return web.json_response([{"RepoTags": [image]} for image in self.images])
+
+    async def _pull(self, request: web.Request) -> web.StreamResponse:
+        self.pulls += 1
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for current in (0, 50, 100):
+            message = {
+                "status": "Downloading",
+                "id": "layer",
+                "progressDetail": {"current": current, "total": 100},
+            }
+            await response.write(json.dumps(message).encode() + b"\n")
+            await asyncio.sleep(self.latency)
+        self.images.add(f"{request.query['fromImage']}:{request.query['tag']}")
+        return response
+
+    def _matches(self, container: dict, filters: dict) -> bool:
+        labels = container["Config"]["Labels"]
+        for label in filters.get("label", []):
+            key, _, value = label.partition("=")
+            if key not in labels or (value and labels[key] != value):
+                return False
+        return True
+
+    async def _list(self, request: web.Request) -> web.Response:
+        filters = json.loads(request.query.get("filters", "{}"))
+        return web.json_response(
+            [
+                {
+                    "Id": c["Id"],
+                    "Names": [c["Name"]],
+                    "State": c["State"]["Status"],
+                    "Status": c["State"]["Status"],
+                    "Labels": c["Config"]["Labels"],
+                    "Ports": [
+                        {
+                            "PrivatePort": int(port.split("/")[0]),
+                            "PublicPort": int(bindings[0]["HostPort"]),
+                            "Type": port.split("/")[1],
+                        }
+                        for port, bindings in c["HostConfig"]["PortBindings"].items()
+                    ],
+                }
+                for c in self.containers.values()
+                if (request.query.get("all") == "1" or c["State"]["Running"])
+                and self._matches(c, filters)
+            ]
+        )
+
+    async def _create(self, request: web.Request) -> web.Response:
+        config = await request.json()
+        ports = {
+            port: int(bindings[0]["HostPort"])
+            for port, bindings in config["HostConfig"]["PortBindings"].items()
+        }
+        container = self.add_container(
+            request.query["name"], ports=ports, **(config.get("Labels") or {})
+        )
+        container["Config"]["Env"] = config.get("Env") or []
+        for key, value in config["HostConfig"].items():
+            container["HostConfig"].setdefault(key, value)
+        return web.json_response({"Id": container["Id"]}, status=201)
+
+    async def _inspect(self, request: web.Request) -> web.Response:
+        self.inspects += 1
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        return web.json_response(container)
+
+    async def _stats(self, request: web.Request) -> web.StreamResponse:
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        self.stats_streams += 1
+        response = web.StreamResponse()
+        await response.prepare(request)
+        tick = 0
+        while container["State"]["Running"]:
+            tick += 1
+            # A container busy in proportion to its position in the listing.
+            load = list(self.containers).index(container["Id"]) + 1
+            stats = {
+                "cpu_stats": {
+                    "cpu_usage": {"total_usage": tick * load * 10_000_000},
+                    "system_cpu_usage": tick * 1_000_000_000,
+                    "online_cpus": 4,
+                },
+                "precpu_stats": {
+                    "cpu_usage": {"total_usage": (tick - 1) * load * 10_000_000},
+                    "system_cpu_usage": (tick - 1) * 1_000_000_000,
+                },
+                "memory_stats": {
+                    "usage": load * 512 * 2**20,
+                    "stats": {"inactive_file": 2**20},
+                },
+                "networks": {
+                    "eth0": {"rx_bytes": tick * 1000, "tx_bytes": tick * 4000}
+                },
+                "blkio_stats": {
+                    "io_service_bytes_recursive": [
+                        {"op": "read", "value": tick * 4096},
+                        {"op": "write", "value": tick * 8192},
+                    ]
+                },
+            }
+            try:
+                await response.write(json.dumps(stats).encode() + b"\n")
+            except ConnectionResetError:
+                break
+            await asyncio.sleep(self.stats_interval)
+        return response
+
+    async def _logs(self, request: web.Request) -> web.StreamResponse:
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        since = float(request.query.get("since", 0))
+        until = float(request.query.get("until", 0)) or None
+        entries = [
+            entry
+            for entry in container["Logs"]
+            if entry[0] > since and (until is None or entry[0] <= until)
+        ]
+        tail = request.query.get("tail", "all")
+        if tail != "all":
+            entries = entries[-int(tail) :] if int(tail) else []
+
+        timestamps = request.query.get("timestamps") in ("1", "True", "true")
+
+        def frame(entry: tuple[float, str]) -> bytes:
+            # Docker's multiplexed format: stream id, padding, payload length.
+            moment, line = entry
+            if timestamps:
+                line = f"{rfc3339(moment)} {line}"
+            payload = (line + "\n").encode()
+            return bytes([1, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for entry in entries:
+            await response.write(frame(entry))
+        if request.query.get("follow") not in ("1", "True", "true"):
+            return response
+
+        self.log_streams += 1
+        queue: asyncio.Queue = asyncio.Queue()
+        self._log_followers.setdefault(container["Id"], set()).add(queue)
+        try:
+            while container["State"]["Running"]:
+                # aiohttp does not cancel handlers when the client goes away.
+                if request.transport is None or request.transport.is_closing():
+                    break
+                try:
+                    entry = await asyncio.wait_for(queue.get(), 0.1)
+                except asyncio.TimeoutError:
+                    continue
+                await response.write(frame(entry))
+        except ConnectionResetError:
+            pass
+        finally:
+            self._log_followers[container["Id"]].discard(queue)
+        return response
+
+    async def _update(self, request: web.Request) -> web.Response:
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        container["HostConfig"].update(await request.json())
+        return web.json_response({"Warnings": []})
+
+    async def _action(self, request: web.Request) -> web.Response:
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        action = request.match_info["action"]
+        running = action in ("start", "restart")
+        container["State"] = {
+            "Status": "running" if running else "exited",
+            "Running": running,
+            "StartedAt": (
+                rfc3339(time.time())
+                if running
+                else container["State"].get("StartedAt", "0001-01-01T00:00:00Z")
+            ),
+        }
+        self.emit(container, action)
+        return web.Response(status=204)
+
+    async def _delete(self, request: web.Request) -> web.Response:
+        container = self.find(request.match_info["ref"])
+        if container is None:
+            return self._missing(request.match_info["ref"])
+        del self.containers[container["Id"]]
+        self.emit(container, "destroy")
+        return web.Response(status=204)
+
+
+__all__ = ["FakeDockerDaemon", "API_VERSION"]
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+
+from src.server.rcon import (
+    SERVERDATA_AUTH,
+    SERVERDATA_AUTH_RESPONSE,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    encode_packet,
+    read_packet,
+)
+
+log = logging.getLogger(__name__)
+
+# Vanilla servers split command output into packets of at most 4096 bytes.
+MAX_RESPONSE_BODY = 4096
+
+
+# Minimal Minecraft RCON server: `list` reports an empty server, `big <n>`
+# answers with n bytes split over several packets, anything else is echoed.
+class FakeRconServer:
+    def __init__(self, password: str, host: str = "127.0.0.1", port: int = 0):
+        self.password = password
+        self.host = host
+        self.port = port
+        self.logins = 0
+        self.commands: list[str] = []
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: set[asyncio.Task] = set()
+
+    async def start(self) -> "FakeRconServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for client in self._clients:
+                client.cancel()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "FakeRconServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def respond(self, command: str) -> str:
+        if command == "list":
+            return "There are 0 of a max of 20 players online: "
+        if command.startswith("big "):
+            return "x" * int(command.split()[1])
+        return f"ok: {command}"
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        authenticated = False
+        self._clients.add(asyncio.current_task())
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(reader)
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = body == self.password
+                    self.logins += authenticated
+                    writer.write(
+                        encode_packet(
+                            request_id if authenticated else -1,
+                            SERVERDATA_AUTH_RESPONSE,
+                            "",
+                        )
+                    )
+                elif not authenticated:
+                    break
+                elif packet_type == SERVERDATA_EXECCOMMAND:
+                    self.commands.append(body)
+                    response = self.respond(body)
+                    for offset in range(0, max(len(response), 1), MAX_RESPONSE_BODY):
+                        writer.write(
+                            encode_packet(
+                                request_id,
+                                SERVERDATA_RESPONSE_VALUE,
+                                response[offset : offset + MAX_RESPONSE_BODY],
+                            )
+                        )
+                else:
+                    writer.write(
+                        encode_packet(
+                            request_id,
+                            SERVERDATA_RESPONSE_VALUE,
+                            f"Unknown request {packet_type:x}",
+                        )
+                    )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            writer.close()
+
+
+__all__ = ["FakeRconServer"]
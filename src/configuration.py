@@ -15,6 +15,93 @@ class Settings(BaseSettings):
     SERVERS_DIR: str = Field("servers", env="SERVERS_DIR")
     BASE_DIR: str = Field(..., env="BASE_DIR")
 
+    TRASH_WORKERS: int = Field(2, env="TRASH_WORKERS")
+    # Server jars and libraries kept per version. New servers mount the
+    # libraries read-only and get a copy of the jar.
+    CONTENT_CACHE_MAX_BYTES: int = Field(20 * 2**30, env="CONTENT_CACHE_MAX_BYTES")
+
+    SERVERS_HOST: str = Field("0.0.0.0", env="SERVERS_HOST")
+
+    RCON_POOL_SIZE: int = Field(2, env="RCON_POOL_SIZE")
+    RCON_TIMEOUT: float = Field(5.0, env="RCON_TIMEOUT")
+    RCON_IDLE_TIMEOUT: float = Field(300.0, env="RCON_IDLE_TIMEOUT")
+
+    # Commands anonymous console clients may run; tokens map to their own
+    # allow-lists, "*" allows everything.
+    CONSOLE_DEFAULT_COMMANDS: list[str] = Field(
+        ["kick", "ban", "unban", "whitelist", "op", "deop", "say", "list"],
+        env="CONSOLE_DEFAULT_COMMANDS",
+    )
+    CONSOLE_TOKENS: dict[str, list[str]] = Field({}, env="CONSOLE_TOKENS")
+    CONSOLE_MAX_IN_FLIGHT: int = Field(16, env="CONSOLE_MAX_IN_FLIGHT")
+
+    DOCKER_URL: str = Field("unix:///var/run/docker.sock", env="DOCKER_URL")
+    # Node name -> Docker endpoint; when empty DOCKER_URL is the only node.
+    DOCKER_NODES: dict[str, str] = Field({}, env="DOCKER_NODES")
+    # Node name -> address its servers are reached at, if not the URL host.
+    DOCKER_NODE_HOSTS: dict[str, str] = Field({}, env="DOCKER_NODE_HOSTS")
+    NODE_REFRESH_INTERVAL: float = Field(30.0, env="NODE_REFRESH_INTERVAL")
+    NODE_MIN_FREE_MEMORY: int = Field(2 * 2**30, env="NODE_MIN_FREE_MEMORY")
+    SERVER_MEMORY_ESTIMATE: int = Field(2 * 2**30, env="SERVER_MEMORY_ESTIMATE")
+    DOCKER_POOL_SIZE: int = Field(16, env="DOCKER_POOL_SIZE")
+    DOCKER_TIMEOUT: float = Field(30.0, env="DOCKER_TIMEOUT")
+    DOCKER_STOP_TIMEOUT: int = Field(10, env="DOCKER_STOP_TIMEOUT")
+
+    PREWARM_IMAGES: list[str] = Field(
+        [
+            "itzg/minecraft-server:latest",
+            "itzg/minecraft-server:java17",
+            "itzg/minecraft-server:java8",
+        ],
+        env="PREWARM_IMAGES",
+    )
+    IMAGE_PULL_TIMEOUT: float = Field(1800.0, env="IMAGE_PULL_TIMEOUT")
+
+    JOB_WORKERS: int = Field(8, env="JOB_WORKERS")
+    JOB_QUEUE_SIZE: int = Field(1000, env="JOB_QUEUE_SIZE")
+    BULK_CONCURRENCY: int = Field(16, env="BULK_CONCURRENCY")
+
+    SERVER_CACHE_SIZE: int = Field(10000, env="SERVER_CACHE_SIZE")
+    SERVER_CACHE_TTL: float = Field(60.0, env="SERVER_CACHE_TTL")
+
+    STATS_BUFFER_SIZE: int = Field(960, env="STATS_BUFFER_SIZE")
+    STATS_RECONCILE_INTERVAL: float = Field(5.0, env="STATS_RECONCILE_INTERVAL")
+
+    LOG_BACKLOG: int = Field(1000, env="LOG_BACKLOG")
+    LOG_CLIENT_BUFFER: int = Field(500, env="LOG_CLIENT_BUFFER")
+
+    READY_TIMEOUT: float = Field(300.0, env="READY_TIMEOUT")
+    READY_MAX_WAIT: float = Field(900.0, env="READY_MAX_WAIT")
+
+    # 0 disables hibernation of idle servers.
+    HIBERNATE_AFTER: float = Field(1800.0, env="HIBERNATE_AFTER")
+    HIBERNATE_CHECK_INTERVAL: float = Field(60.0, env="HIBERNATE_CHECK_INTERVAL")
+    HIBERNATE_BIND_HOST: str = Field("0.0.0.0", env="HIBERNATE_BIND_HOST")
+
+    STATUS_CONCURRENCY: int = Field(64, env="STATUS_CONCURRENCY")
+    STATUS_TIMEOUT: float = Field(1.0, env="STATUS_TIMEOUT")
+    STATUS_CACHE_TTL: float = Field(5.0, env="STATUS_CACHE_TTL")
+
+    # Defaults to SERVERS_DIR/.backups; snapshots always stay in SERVERS_DIR.
+    BACKUP_DIR: str = Field("", env="BACKUP_DIR")
+    BACKUP_CONCURRENCY: int = Field(2, env="BACKUP_CONCURRENCY")
+    BACKUP_WORKERS: int = Field(4, env="BACKUP_WORKERS")
+    BACKUP_KEEP_LAST: int = Field(10, env="BACKUP_KEEP_LAST")
+    BACKUP_KEEP_DAILY: int = Field(7, env="BACKUP_KEEP_DAILY")
+    BACKUP_SAVE_TIMEOUT: float = Field(120.0, env="BACKUP_SAVE_TIMEOUT")
+
+    FILE_UPLOAD_MAX_BYTES: int = Field(8 * 2**30, env="FILE_UPLOAD_MAX_BYTES")
+    # Directory downloads archived at once; more wait for a free worker.
+    FILE_ARCHIVE_WORKERS: int = Field(4, env="FILE_ARCHIVE_WORKERS")
+
+    # Defaults to SERVERS_DIR/.templates, where a clone can be a reflink.
+    TEMPLATES_DIR: str = Field("", env="TEMPLATES_DIR")
+    CLONE_WORKERS: int = Field(8, env="CLONE_WORKERS")
+
+    PORT_RANGE_START: int = Field(25500, env="PORT_RANGE_START")
+    PORT_RANGE_END: int = Field(25600, env="PORT_RANGE_END")
+    RCON_PORT_OFFSET: int = Field(100, env="RCON_PORT_OFFSET")
+
     def get_db_url(self) -> str:
         return URL.create(
             drivername="postgresql+asyncpg",
@@ -25,6 +112,12 @@ class Settings(BaseSettings):
             database=self.POSTGRES_DB,
         ).render_as_string(hide_password=False)
 
+    def get_port_pairs(self) -> list[tuple[int, int]]:
+        return [
+            (port, port + self.RCON_PORT_OFFSET)
+            for port in range(self.PORT_RANGE_START, self.PORT_RANGE_END)
+        ]
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
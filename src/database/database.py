@@ -1,16 +1,79 @@
 import logging
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from src.configuration import getSettings
 from src.database.base import Base
+from src.exceptions import DatabaseError
+from src.metrics import DB_POOL_CONNECTIONS
 
-settings = getSettings()
+logger = logging.getLogger(__name__)
 
-engine = create_async_engine(settings.get_db_url(), echo=False)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+# Bumped with every change to the models. A boot that finds it recorded
+# skips the DDL; create_all alone costs a catalog query per table.
+SCHEMA_VERSION = 2
+# What brings a database up to each version. create_all adds missing tables
+# only, columns and indexes of existing ones are added here.
+MIGRATIONS: dict[int, tuple[str, ...]] = {
+    2: (
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS node VARCHAR",
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS profile VARCHAR",
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS memory_mb INTEGER",
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS cpus FLOAT",
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS cpuset VARCHAR",
+        "ALTER TABLE servers ADD COLUMN IF NOT EXISTS pids_limit INTEGER",
+        "CREATE INDEX IF NOT EXISTS ix_servers_node ON servers (node)",
+        "CREATE INDEX IF NOT EXISTS ix_servers_version ON servers (version)",
+        "CREATE INDEX IF NOT EXISTS ix_servers_created_at_id "
+        "ON servers (created_at, id)",
+    ),
+}
+# pg_advisory_xact_lock key, so concurrent workers migrate one at a time.
+SCHEMA_LOCK_KEY = 0x6D63_5F73
+
+_engine: AsyncEngine | None = None
+_sessions: async_sessionmaker[AsyncSession] | None = None
+
+
+def pool_usage():
+    if _engine is None:
+        return
+    pool = _engine.sync_engine.pool
+    yield {"state": "checked_out"}, pool.checkedout()
+    yield {"state": "idle"}, pool.checkedin()
+    yield {"state": "overflow"}, max(pool.overflow(), 0)
+    yield {"state": "size"}, pool.size()
+
+
+DB_POOL_CONNECTIONS.set_function(pool_usage)
 
-logger = logging.getLogger(__name__)
+
+def getEngine() -> AsyncEngine:
+    # Built on first use, so importing a module that queries costs nothing.
+    global _engine, _sessions
+    if _engine is None:
+        _engine = create_async_engine(getSettings().get_db_url(), echo=False)
+        _sessions = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
+
+
+def async_session() -> AsyncSession:
+    getEngine()
+    return _sessions()
+
+
+async def disposeEngine() -> None:
+    global _engine, _sessions
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _sessions = None
 
 
 async def getSession():
@@ -18,13 +81,84 @@ async def getSession():
         yield session
 
 
+async def readSchemaVersion(conn: AsyncConnection) -> int | None:
+    # Looked up first: a failed SELECT would abort the migration transaction.
+    if await conn.scalar(text("SELECT to_regclass('schema_version')")) is None:
+        return None
+    return await conn.scalar(text("SELECT version FROM schema_version"))
+
+
+async def schemaVersion() -> int | None:
+    async with getEngine().connect() as conn:
+        return await readSchemaVersion(conn)
+
+
+def missingColumns(conn: Connection) -> list[str]:
+    inspector = inspect(conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        found = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(
+            f"{table.name}.{column.name}"
+            for column in table.columns
+            if column.name not in found
+        )
+    return missing
+
+
+async def ensureSchema() -> bool:
+    current = await schemaVersion()
+    if current is not None and current >= SCHEMA_VERSION:
+        if current > SCHEMA_VERSION:
+            # An older worker during a rolling deploy; the newer one migrated.
+            logger.warning(f"Database schema {current} is newer than {SCHEMA_VERSION}")
+        return False
+
+    # Every model has to be on the metadata before create_all runs.
+    from src.models import JobModel, PortModel, ServerModel  # noqa: F401
+
+    async with getEngine().begin() as conn:
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY}
+        )
+        # Another worker may have migrated while this one waited.
+        current = await readSchemaVersion(conn)
+        if current is not None and current >= SCHEMA_VERSION:
+            return False
+
+        await conn.run_sync(Base.metadata.create_all)
+        # Unversioned databases predate every step; all of them are safe to
+        # run again on what create_all has just built.
+        for version in range((current or 1) + 1, SCHEMA_VERSION + 1):
+            for statement in MIGRATIONS.get(version, ()):
+                await conn.execute(text(statement))
+
+        missing = await conn.run_sync(missingColumns)
+        if missing:
+            # Recorded as current, the next boot would skip the DDL for good.
+            raise DatabaseError(
+                f"Schema {SCHEMA_VERSION} is missing columns: {', '.join(missing)}"
+            )
+
+        await conn.execute(
+            text("CREATE TABLE IF NOT EXISTS schema_version (version integer)")
+        )
+        await conn.execute(text("DELETE FROM schema_version"))
+        await conn.execute(
+            text("INSERT INTO schema_version (version) VALUES (:version)"),
+            {"version": SCHEMA_VERSION},
+        )
+    logger.info(f"Database schema {current} brought to {SCHEMA_VERSION}")
+    return True
+
+
 async def createTables():
-    async with engine.begin() as conn:
+    async with getEngine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         logger.info("Created tables")
 
 
 async def dropTables():
-    async with engine.begin() as conn:
+    async with getEngine().begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         logger.info("Dropped tables")
@@ -0,0 +1,9 @@
+class BackupError(Exception):
+    pass
+
+
+class BackupNotFoundError(BackupError):
+    pass
+
+
+__all__ = ["BackupError", "BackupNotFoundError"]
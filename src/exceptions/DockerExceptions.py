@@ -6,10 +6,18 @@ class ImageNotFoundError(ServerManagerError):
     pass
 
 
+class ImageNotReadyError(ServerManagerError):
+    pass
+
+
 class NoAvailablePortError(ServerManagerError):
     pass
 
 
+class NoAvailableNodeError(ServerManagerError):
+    pass
+
+
 class ServerNotFoundError(ServerManagerError):
     pass
 
@@ -34,13 +42,31 @@ class ServerRestartError(ServerManagerError):
     pass
 
 
+class DockerTimeoutError(ServerManagerError):
+    pass
+
+
+class ServerNotReadyError(ServerManagerError):
+    pass
+
+
+class ServerUpdateError(ServerManagerError):
+    pass
+
+
 __all__ = [
     "ServerManagerError",
     "ImageNotFoundError",
+    "ImageNotReadyError",
     "NoAvailablePortError",
+    "NoAvailableNodeError",
     "ServerNotFoundError",
     "ServerStartError",
     "ServerStopError",
     "ServerDeleteError",
     "ServerAlreadyExistsError",
+    "ServerRestartError",
+    "DockerTimeoutError",
+    "ServerNotReadyError",
+    "ServerUpdateError",
 ]
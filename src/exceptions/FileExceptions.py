@@ -0,0 +1,27 @@
+class ServerFileError(Exception):
+    pass
+
+
+class ServerPathError(ServerFileError):
+    pass
+
+
+class ServerFileNotFoundError(ServerFileError):
+    pass
+
+
+class ServerFileExistsError(ServerFileError):
+    pass
+
+
+class UploadTooLargeError(ServerFileError):
+    pass
+
+
+__all__ = [
+    "ServerFileError",
+    "ServerPathError",
+    "ServerFileNotFoundError",
+    "ServerFileExistsError",
+    "UploadTooLargeError",
+]
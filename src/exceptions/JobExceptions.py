@@ -0,0 +1,9 @@
+class JobError(Exception):
+    pass
+
+
+class JobQueueFullError(JobError):
+    pass
+
+
+__all__ = ["JobError", "JobQueueFullError"]
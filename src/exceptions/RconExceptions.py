@@ -0,0 +1,17 @@
+class RconError(Exception):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+class RconConnectionError(RconError):
+    pass
+
+
+class RconTimeoutError(RconError):
+    pass
+
+
+__all__ = ["RconError", "RconAuthError", "RconConnectionError", "RconTimeoutError"]
@@ -0,0 +1,13 @@
+class TemplateError(Exception):
+    pass
+
+
+class TemplateNotFoundError(TemplateError):
+    pass
+
+
+class TemplateExistsError(TemplateError):
+    pass
+
+
+__all__ = ["TemplateError", "TemplateNotFoundError", "TemplateExistsError"]
@@ -1,17 +1,44 @@
+from .BackupExceptions import BackupError, BackupNotFoundError
 from .DatabaseExceptions import DatabaseError, ServerCreateError
 from .DockerExceptions import (
+    DockerTimeoutError,
     ImageNotFoundError,
+    ImageNotReadyError,
+    NoAvailableNodeError,
     NoAvailablePortError,
     ServerAlreadyExistsError,
     ServerDeleteError,
     ServerManagerError,
     ServerNotFoundError,
+    ServerNotReadyError,
     ServerRestartError,
     ServerStartError,
     ServerStopError,
+    ServerUpdateError,
+)
+from .FileExceptions import (
+    ServerFileError,
+    ServerFileExistsError,
+    ServerFileNotFoundError,
+    ServerPathError,
+    UploadTooLargeError,
+)
+from .JobExceptions import JobError, JobQueueFullError
+from .RconExceptions import (
+    RconAuthError,
+    RconConnectionError,
+    RconError,
+    RconTimeoutError,
+)
+from .TemplateExceptions import (
+    TemplateError,
+    TemplateExistsError,
+    TemplateNotFoundError,
 )
 
 __all__ = [
+    "BackupError",
+    "BackupNotFoundError",
     "DatabaseError",
     "ServerCreateError",
     "ServerDeleteError",
@@ -21,6 +48,25 @@ __all__ = [
     "ServerStartError",
     "ServerStopError",
     "ImageNotFoundError",
+    "ImageNotReadyError",
     "NoAvailablePortError",
+    "NoAvailableNodeError",
     "ServerRestartError",
+    "DockerTimeoutError",
+    "ServerNotReadyError",
+    "ServerUpdateError",
+    "RconError",
+    "RconAuthError",
+    "RconConnectionError",
+    "RconTimeoutError",
+    "ServerFileError",
+    "ServerPathError",
+    "ServerFileNotFoundError",
+    "ServerFileExistsError",
+    "UploadTooLargeError",
+    "TemplateError",
+    "TemplateNotFoundError",
+    "TemplateExistsError",
+    "JobError",
+    "JobQueueFullError",
 ]
@@ -1,33 +1,108 @@
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
-
-from src.database.database import createTables, dropTables
-from src.routers.v1.CommandRouter import commandRouter
-from src.routers.v1.ServerRouter import serverRouter
+from fastapi import FastAPI, Response
 
 from .logging import configure_logging
 
-configure_logging()
-
-load_dotenv()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # await dropTables()
-    await createTables()
-    yield
+    # Connections, clients and background services are built here, once the
+    # app is being served; importing this module opens nothing.
+    from src.configuration import getSettings
+    from src.database.database import async_session, disposeEngine, ensureSchema
+    from src.repositories import PortRepository, ServerCacheListener
+    from src.server.backups import BackupManager
+    from src.server.files import FileManager
+    from src.server.jobs import JobQueue
+    from src.server.manager import ServerManager
+    from src.server.rcon import rcon_pools
+    from src.server.templates import TemplateStore
+    from src.utils import content_cache, trash
+
+    await ensureSchema()
+    async with async_session() as session:
+        await PortRepository(session).seedPorts(getSettings().get_port_pairs())
+    await trash.start()
+    await content_cache.start()
+    app.state.server_cache_listener = ServerCacheListener()
+    await app.state.server_cache_listener.start()
+    app.state.jobs = JobQueue()
+    await app.state.jobs.recover()
+    await app.state.jobs.start()
+    app.state.server_manager = ServerManager()
+    # Background lifecycle calls queue behind the API's for the same server.
+    await app.state.server_manager.start(
+        runner=lambda action, uuid, func: app.state.jobs.run(action, func, uuid)
+    )
+    app.state.backups = BackupManager()
+    await app.state.backups.start()
+    app.state.templates = TemplateStore()
+    app.state.files = FileManager()
+    await app.state.files.start()
+    try:
+        yield
+    finally:
+        await app.state.files.close()
+        await app.state.backups.close()
+        await app.state.jobs.close()
+        await app.state.server_manager.close()
+        await rcon_pools.close()
+        await app.state.server_cache_listener.close()
+        await content_cache.close()
+        await trash.close()
+        await disposeEngine()
+
+
+def create_app() -> FastAPI:
+    # Before anything reads the settings; the process environment still wins.
+    load_dotenv()
+    configure_logging()
+
+    from src.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+    from src.routers.v1.BackupRouter import backupRouter
+    from src.routers.v1.CommandRouter import commandRouter
+    from src.routers.v1.FileRouter import fileRouter
+    from src.routers.v1.ImageRouter import imageRouter
+    from src.routers.v1.JobRouter import jobRouter
+    from src.routers.v1.LogRouter import logRouter
+    from src.routers.v1.NodeRouter import nodeRouter
+    from src.routers.v1.ServerRouter import serverRouter
+    from src.routers.v1.TemplateRouter import templateRouter
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
-app = FastAPI(lifespan=lifespan)
+    app.include_router(serverRouter)
+    app.include_router(commandRouter)
+    app.include_router(imageRouter)
+    app.include_router(jobRouter)
+    app.include_router(logRouter)
+    app.include_router(nodeRouter)
+    app.include_router(backupRouter)
+    app.include_router(fileRouter)
+    app.include_router(templateRouter)
+    return app
 
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
+_app: FastAPI | None = None
 
 
-app.include_router(serverRouter)
-app.include_router(commandRouter)
+def __getattr__(name: str):
+    # `uvicorn src.main:app` and `from src.main import app` keep working, the
+    # app is built on first access.
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
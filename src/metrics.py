@@ -0,0 +1,308 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable
+
+# Prometheus text exposition format 0.0.4, implemented here so the service
+# needs nothing but itself to be scraped.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        # Timed file operations run in worker threads.
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {escape(self.help)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], Iterable[tuple[dict, float]]] | None = None
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(
+        self, function: Callable[[], Iterable[tuple[dict, float]]]
+    ) -> None:
+        # Read at scrape time from wherever the value already lives.
+        self._function = function
+
+    def samples(self) -> Iterable[str]:
+        if self._function is not None:
+            values = [(self.key(labels), value) for labels, value in self._function()]
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        for key, value in values:
+            labels = format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum)
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * len(self.buckets), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        bucket_names = (*self.labelnames, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = format_labels(bucket_names, (*key, format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+
+def timed(histogram: Histogram, in_flight: Gauge | None = None, **labels):
+    # Histograms with an `outcome` label get "ok" or "error" filled in.
+    with_outcome = "outcome" in histogram.labelnames
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if in_flight is not None:
+                in_flight.inc()
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                if in_flight is not None:
+                    in_flight.dec()
+                extra = {"outcome": outcome} if with_outcome else {}
+                histogram.observe(time.perf_counter() - started, **labels, **extra)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int) -> None:
+            nonlocal observed
+            observed = True
+            # The route template, not the raw path, keeps label cardinality flat.
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not observed:
+                observe(500)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until response headers are sent, per route",
+    ("method", "route", "status"),
+)
+DOCKER_CALL_SECONDS = Histogram(
+    "docker_call_duration_seconds",
+    "Docker Engine API calls made by ServerManager",
+    ("operation", "outcome"),
+)
+DOCKER_CALLS_IN_FLIGHT = Gauge(
+    "docker_calls_in_flight", "ServerManager Docker calls currently running"
+)
+RCON_COMMAND_SECONDS = Histogram(
+    "rcon_command_duration_seconds",
+    "RCON commands sent through ConsoleManager",
+    ("command", "outcome"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "ServerRepository queries", ("query",)
+)
+FILE_OPERATION_SECONDS = Histogram(
+    "file_operation_duration_seconds",
+    "Server directory and properties I/O",
+    ("operation",),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Database connection pool usage", ("state",)
+)
+CONTAINERS = Gauge("containers", "Managed containers per state", ("state",))
+SERVER_CACHE_LOOKUPS = Counter(
+    "server_cache_lookups_total", "Server lookup cache results", ("result",)
+)
+SERVER_READY_SECONDS = Histogram(
+    "server_ready_seconds",
+    "Time from container start until the server accepts players",
+    ("source",),
+    buckets=(5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600),
+)
+CONTENT_CACHE_BYTES = Gauge(
+    "content_cache_bytes",
+    "Cached server files, by whether a version manifest lists them",
+    ("state",),
+)
+CONTENT_CACHE_FILES = Counter(
+    "content_cache_files_total",
+    "Files copied or mounted from the content cache into new servers",
+    ("result",),
+)
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "registry",
+    "timed",
+    "MetricsMiddleware",
+    "HTTP_REQUEST_SECONDS",
+    "DOCKER_CALL_SECONDS",
+    "DOCKER_CALLS_IN_FLIGHT",
+    "RCON_COMMAND_SECONDS",
+    "DB_QUERY_SECONDS",
+    "FILE_OPERATION_SECONDS",
+    "DB_POOL_CONNECTIONS",
+    "CONTAINERS",
+    "SERVER_CACHE_LOOKUPS",
+    "SERVER_READY_SECONDS",
+    "CONTENT_CACHE_BYTES",
+    "CONTENT_CACHE_FILES",
+]
@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import UUID, DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.base import Base
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+
+    uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False
+    )
+    server_uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), index=True, nullable=True
+    )
+    action: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, default="queued", nullable=False)
+    error: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self):
+        return (
+            f"<JobModel(uuid={self.uuid}, server_uuid={self.server_uuid}, "
+            f"action={self.action}, status={self.status})>"
+        )
@@ -0,0 +1,24 @@
+from sqlalchemy import UUID, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.base import Base
+
+
+class PortModel(Base):
+    __tablename__ = "ports"
+
+    port: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    rcon_port: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    server_uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), unique=True, nullable=True
+    )
+
+    __table_args__ = (
+        Index("ix_ports_free", "port", postgresql_where=server_uuid.is_(None)),
+    )
+
+    def __repr__(self):
+        return (
+            f"<PortModel(port={self.port}, rcon_port={self.rcon_port}, "
+            f"server_uuid={self.server_uuid})>"
+        )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import UUID, DateTime, Integer, String, func
+from sqlalchemy import UUID, DateTime, Float, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database.base import Base
@@ -9,6 +9,10 @@ from src.database.base import Base
 
 class ServerModel(Base):
     __tablename__ = "servers"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id); id is the primary key.
+        Index("ix_servers_created_at_id", "created_at", "id"),
+    )
 
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False
@@ -16,7 +20,15 @@ class ServerModel(Base):
     port: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
     rcon_port: Mapped[int] = mapped_column(Integer, unique=True, nullable=True)
     rcon_password: Mapped[str] = mapped_column(String, nullable=False)
-    version: Mapped[str] = mapped_column(String, nullable=False)
+    version: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    # Docker node running the container; NULL for servers predating nodes.
+    node: Mapped[str] = mapped_column(String, index=True, nullable=True)
+    # Resolved resource limits; NULL for servers created without a profile.
+    profile: Mapped[str] = mapped_column(String, nullable=True)
+    memory_mb: Mapped[int] = mapped_column(Integer, nullable=True)
+    cpus: Mapped[float] = mapped_column(Float, nullable=True)
+    cpuset: Mapped[str] = mapped_column(String, nullable=True)
+    pids_limit: Mapped[int] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now(), nullable=False
     )
@@ -0,0 +1,64 @@
+import logging
+from typing import Optional
+
+from pydantic import UUID4
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.exceptions import DatabaseError
+from src.models.JobModel import JobModel
+
+logger = logging.getLogger(__name__)
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def getJobByUuid(self, uuid: UUID4) -> Optional[JobModel]:
+        try:
+            query = select(JobModel).where(JobModel.uuid == uuid)
+            result = await self.db.execute(query)
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.exception(f"Error getting job by UUID {uuid}: {e}")
+            raise DatabaseError from e
+
+    async def createJob(self, data: dict) -> JobModel:
+        try:
+            newJob = JobModel(**data)
+            self.db.add(newJob)
+            await self.db.commit()
+            await self.db.refresh(newJob)
+            return newJob
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.exception(f"Error creating job: {e}")
+            raise DatabaseError from e
+
+    async def updateJob(self, uuid: UUID4, values: dict) -> None:
+        try:
+            await self.db.execute(
+                update(JobModel).where(JobModel.uuid == uuid).values(**values)
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.exception(f"Error updating job {uuid}: {e}")
+            raise DatabaseError from e
+
+    async def failUnfinishedJobs(self, error: str) -> int:
+        try:
+            result = await self.db.execute(
+                update(JobModel)
+                .where(JobModel.status.in_(("queued", "running")))
+                .values(status="failed", error=error)
+            )
+            await self.db.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.exception(f"Error failing unfinished jobs: {e}")
+            raise DatabaseError from e
@@ -0,0 +1,82 @@
+import logging
+
+from pydantic import UUID4
+from sqlalchemy import delete, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.exceptions import DatabaseError, NoAvailablePortError
+from src.models.PortModel import PortModel
+from src.models.ServerModel import ServerModel
+
+logger = logging.getLogger(__name__)
+
+
+class PortRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def seedPorts(self, pairs: list[tuple[int, int]]) -> None:
+        try:
+            ports = [port for port, _ in pairs]
+            await self.db.execute(
+                insert(PortModel)
+                .values([{"port": port, "rcon_port": rcon} for port, rcon in pairs])
+                .on_conflict_do_nothing()
+            )
+            await self.db.execute(
+                delete(PortModel).where(
+                    PortModel.server_uuid.is_(None),
+                    or_(PortModel.port < min(ports), PortModel.port > max(ports)),
+                )
+            )
+            # Servers created before the ports table existed.
+            await self.db.execute(
+                update(PortModel)
+                .where(
+                    PortModel.port == ServerModel.port,
+                    PortModel.server_uuid.is_(None),
+                )
+                .values(server_uuid=ServerModel.uuid)
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.exception(f"Error seeding ports: {e}")
+            raise DatabaseError from e
+
+    async def reservePort(self, server_uuid: UUID4) -> PortModel:
+        # Row locks are held until the caller commits; concurrent creates skip
+        # rows another transaction is holding instead of queueing behind it.
+        try:
+            query = (
+                select(PortModel)
+                .where(PortModel.server_uuid.is_(None))
+                .order_by(PortModel.port)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            result = await self.db.execute(query)
+            port = result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.exception(f"Error reserving port for server {server_uuid}: {e}")
+            raise DatabaseError from e
+
+        if port is None:
+            raise NoAvailablePortError("No free ports left")
+
+        port.server_uuid = server_uuid
+        return port
+
+    async def releasePort(self, server_uuid: UUID4) -> None:
+        try:
+            await self.db.execute(
+                update(PortModel)
+                .where(PortModel.server_uuid == server_uuid)
+                .values(server_uuid=None)
+            )
+        except SQLAlchemyError as e:
+            logger.exception(f"Error releasing port of server {server_uuid}: {e}")
+            raise DatabaseError from e
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+import asyncpg
+from pydantic import UUID4
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configuration import getSettings
+from src.metrics import SERVER_CACHE_LOOKUPS
+
+log = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "server_cache"
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+# Detached copy of a servers row, safe to share between requests.
+@dataclass(frozen=True)
+class CachedServer:
+    id: int
+    uuid: UUID4
+    port: int
+    rcon_port: int
+    rcon_password: str
+    version: str
+    created_at: datetime
+    node: str | None = None
+    profile: str | None = None
+    memory_mb: int | None = None
+    cpus: float | None = None
+    cpuset: str | None = None
+    pids_limit: int | None = None
+
+
+class ServerCache:
+    def __init__(
+        self,
+        size: int | None = None,
+        ttl: float | None = None,
+    ):
+        settings = getSettings()
+        self.size = size or settings.SERVER_CACHE_SIZE
+        self.ttl = settings.SERVER_CACHE_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CachedServer]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, uuid) -> CachedServer | None:
+        key = str(uuid)
+        cached = self._entries.get(key)
+        if cached is None or cached[0] < time.monotonic():
+            if cached is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return cached[1]
+
+    def put(self, server: CachedServer) -> None:
+        key = str(server.uuid)
+        self._entries[key] = (time.monotonic() + self.ttl, server)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, uuid) -> None:
+        self._entries.pop(str(uuid), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_serverCache: ServerCache | None = None
+
+
+def getServerCache() -> ServerCache:
+    global _serverCache
+    if _serverCache is None:
+        cache = _serverCache = ServerCache()
+        SERVER_CACHE_LOOKUPS.set_function(
+            lambda: [
+                ({"result": "hit"}, cache.hits),
+                ({"result": "miss"}, cache.misses),
+            ]
+        )
+    return _serverCache
+
+
+async def notifyServerChanged(session: AsyncSession, uuid) -> None:
+    # Delivered to every listener when the surrounding transaction commits.
+    await session.execute(
+        text("SELECT pg_notify(:channel, :uuid)"),
+        {"channel": NOTIFY_CHANNEL, "uuid": str(uuid)},
+    )
+
+
+class ServerCacheListener:
+    def __init__(self, cache: ServerCache | None = None):
+        self.cache = getServerCache() if cache is None else cache
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.cache.invalidate(payload)
+
+    async def _run(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            connection = None
+            try:
+                settings = getSettings()
+                connection = await asyncpg.connect(
+                    host=settings.POSTGRES_HOST,
+                    port=settings.POSTGRES_PORT,
+                    user=settings.POSTGRES_USERNAME,
+                    password=settings.POSTGRES_PASSWORD,
+                    database=settings.POSTGRES_DB,
+                )
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Anything could have changed while nobody was listening.
+                self.cache.clear()
+                delay = RECONNECT_DELAY
+
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await lost.wait()
+                log.warning("Server cache listener lost Postgres, reconnecting")
+            except (OSError, asyncpg.PostgresError) as e:
+                log.error(f"Server cache listener cannot connect: {e!r}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            # Without invalidations entries could go stale for a whole TTL.
+            self.cache.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+__all__ = [
+    "CachedServer",
+    "ServerCache",
+    "ServerCacheListener",
+    "getServerCache",
+    "notifyServerChanged",
+]
@@ -1,21 +1,45 @@
 import logging
-from typing import Optional
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
 from pydantic import UUID4
+from sqlalchemy import Row, Select, tuple_
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from src.exceptions import DatabaseError, ServerCreateError, ServerDeleteError
+from src.metrics import DB_QUERY_SECONDS, timed
 from src.models.ServerModel import ServerModel
+from src.repositories.ServerCache import CachedServer, getServerCache
 
 logger = logging.getLogger(__name__)
 
+# Everything ServerResponseSchema needs, plus the keyset columns.
+LIST_COLUMNS = (
+    ServerModel.id,
+    ServerModel.created_at,
+    ServerModel.uuid,
+    ServerModel.port,
+    ServerModel.rcon_port,
+    ServerModel.rcon_password,
+    ServerModel.version,
+    ServerModel.node,
+    ServerModel.profile,
+    ServerModel.memory_mb,
+    ServerModel.cpus,
+    ServerModel.cpuset,
+    ServerModel.pids_limit,
+)
+
+STREAM_BATCH_SIZE = 500
+
 
 class ServerRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @timed(DB_QUERY_SECONDS, query="getServerByPort")
     async def getServerByPort(self, port: int) -> Optional[ServerModel]:
         try:
             query = select(ServerModel).where(ServerModel.port == port)
@@ -25,6 +49,7 @@ class ServerRepository:
             logger.exception(f"Error getting server by port {port}: {e}")
             raise DatabaseError from e
 
+    @timed(DB_QUERY_SECONDS, query="getServerByUuid")
     async def getServerByUuid(self, uuid: UUID4) -> Optional[ServerModel]:
         try:
             query = select(ServerModel).where(ServerModel.uuid == uuid)
@@ -34,26 +59,110 @@ class ServerRepository:
             logger.exception(f"Error getting server by UUID {uuid}: {e}")
             raise DatabaseError from e
 
-    async def getAllServers(self) -> Optional[list[ServerModel]]:
+    async def getCachedServer(self, uuid: UUID4) -> Optional[CachedServer]:
+        cache = getServerCache()
+        server = cache.get(uuid)
+        if server is None:
+            server = await self.getServerRecord(uuid)
+            if server is not None:
+                cache.put(server)
+        return server
+
+    @timed(DB_QUERY_SECONDS, query="getServerRecord")
+    async def getServerRecord(self, uuid: UUID4) -> Optional[CachedServer]:
+        try:
+            query = select(*LIST_COLUMNS).where(ServerModel.uuid == uuid)
+            result = await self.db.execute(query)
+            row = result.first()
+        except SQLAlchemyError as e:
+            logger.exception(f"Error getting server by UUID {uuid}: {e}")
+            raise DatabaseError from e
+
+        return CachedServer(**row._asdict()) if row is not None else None
+
+    def _listQuery(
+        self,
+        order_by: str = "id",
+        after: Optional[tuple] = None,
+        version: Optional[str] = None,
+        port_min: Optional[int] = None,
+        port_max: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Select:
+        query = select(*LIST_COLUMNS)
+        if version is not None:
+            query = query.where(ServerModel.version == version)
+        if port_min is not None:
+            query = query.where(ServerModel.port >= port_min)
+        if port_max is not None:
+            query = query.where(ServerModel.port <= port_max)
+        if created_after is not None:
+            query = query.where(ServerModel.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(ServerModel.created_at < created_before)
+
+        if order_by == "created_at":
+            if after is not None:
+                query = query.where(
+                    tuple_(ServerModel.created_at, ServerModel.id) > tuple_(*after)
+                )
+            return query.order_by(ServerModel.created_at, ServerModel.id)
+
+        if after is not None:
+            query = query.where(ServerModel.id > after[0])
+        return query.order_by(ServerModel.id)
+
+    @timed(DB_QUERY_SECONDS, query="listServers")
+    async def listServers(self, limit: int, **params) -> list[Row]:
+        try:
+            result = await self.db.execute(self._listQuery(**params).limit(limit))
+            return result.all()
+        except SQLAlchemyError as e:
+            logger.exception(f"Error listing servers: {e}")
+            raise DatabaseError from e
+
+    async def streamServers(self, **params) -> AsyncIterator[Row]:
+        # Server-side cursor: rows are fetched in batches as the consumer reads.
+        query = self._listQuery(**params).execution_options(yield_per=STREAM_BATCH_SIZE)
+        try:
+            result = await self.db.stream(query)
+            async for row in result:
+                yield row
+        except SQLAlchemyError as e:
+            logger.exception(f"Error streaming servers: {e}")
+            raise DatabaseError from e
+
+    @timed(DB_QUERY_SECONDS, query="getServers")
+    async def getServers(
+        self, uuids: Optional[list[UUID4]] = None, version: Optional[str] = None
+    ) -> list[ServerModel]:
         try:
             query = select(ServerModel)
+            if uuids is not None:
+                query = query.where(ServerModel.uuid.in_(uuids))
+            if version is not None:
+                query = query.where(ServerModel.version == version)
             result = await self.db.execute(query)
             return result.scalars().all()
         except SQLAlchemyError as e:
-            logger.exception(f"Error getting list of all servers: {e}")
+            logger.exception(f"Error getting servers for bulk action: {e}")
             raise DatabaseError from e
 
-    async def getAllServersPorts(self) -> Optional[list[(int, int)]]:
+    @timed(DB_QUERY_SECONDS, query="getServerPorts")
+    async def getServerPorts(self, version: Optional[str] = None) -> list[Row]:
         try:
-            query = select(ServerModel)
+            query = select(ServerModel.uuid, ServerModel.port, ServerModel.node)
+            query = query.order_by(ServerModel.id)
+            if version is not None:
+                query = query.where(ServerModel.version == version)
             result = await self.db.execute(query)
-            return [
-                (result.port, result.rcon_port) for result in result.scalars().all()
-            ]
+            return result.all()
         except SQLAlchemyError as e:
-            logger.exception(f"Error getting all servers ports: {e}")
+            logger.exception(f"Error getting server ports: {e}")
             raise DatabaseError from e
 
+    @timed(DB_QUERY_SECONDS, query="createServer")
     async def createServer(self, data: dict) -> Optional[ServerModel]:
         try:
             newServer = ServerModel(**data)
@@ -72,6 +181,7 @@ class ServerRepository:
             logger.exception(f"Unknown error while creating server: {e}")
             raise DatabaseError from e
 
+    @timed(DB_QUERY_SECONDS, query="deleteServerByUuid")
     async def deleteServerByUuid(self, uuid: UUID4) -> bool:
         try:
             server = await self.getServerByUuid(uuid)
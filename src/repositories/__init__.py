@@ -1,3 +1,12 @@
+from .JobRepository import JobRepository
+from .PortRepository import PortRepository
+from .ServerCache import ServerCacheListener, getServerCache
 from .ServerRepository import ServerRepository
 
-__all__ = ["ServerRepository"]
+__all__ = [
+    "ServerRepository",
+    "PortRepository",
+    "JobRepository",
+    "ServerCacheListener",
+    "getServerCache",
+]
@@ -0,0 +1,198 @@
+import logging
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import getSession
+from src.exceptions import (
+    BackupError,
+    BackupNotFoundError,
+    DatabaseError,
+    JobQueueFullError,
+)
+from src.repositories.ServerCache import CachedServer
+from src.repositories.ServerRepository import ServerRepository
+from src.schemas.pydantic import BackupSchema
+from src.server.backups import Backup, BackupManager, getBackups
+from src.server.jobs import JobQueue, getJobQueue
+from src.server.manager import ServerManager, getManager
+
+logger = logging.getLogger(__name__)
+
+backupRouter = APIRouter(prefix="/v1/servers", tags=["Backups"])
+
+
+def toSchema(backup: Backup) -> BackupSchema:
+    return BackupSchema(
+        id=backup.id,
+        server_uuid=backup.server,
+        created_at=datetime.fromtimestamp(backup.created_at, timezone.utc),
+        status=backup.status,
+        files=backup.files,
+        size=backup.size,
+        stored=backup.stored,
+        error=backup.error,
+    )
+
+
+async def getServer(uuid: UUID4, session: AsyncSession) -> CachedServer:
+    try:
+        server = await ServerRepository(session).getCachedServer(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if server is None:
+        logger.warning(f"Server with UUID {uuid} not found")
+        raise HTTPException(status_code=404, detail="Server not found")
+    return server
+
+
+@backupRouter.post(
+    "/{uuid}/backups",
+    summary="Back up server",
+    response_model=BackupSchema,
+    status_code=201,
+    responses={
+        202: {"description": "Backup started", "model": BackupSchema},
+        404: {"description": "Server not found"},
+        500: {"description": "Backup failed"},
+    },
+)
+async def createBackup(
+    request: Request,
+    uuid: UUID4,
+    async_: bool = Query(False, alias="async"),
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    backups: BackupManager = Depends(getBackups),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    server = await getServer(uuid, session)
+
+    def getRcon():
+        return serverManager.running_rcon(server)
+
+    def runner(action, serverUuid, func):
+        return jobs.run(action, func, serverUuid)
+
+    if async_:
+        backup = backups.schedule(str(uuid), getRcon, runner)
+        statusUrl = str(
+            request.url_for("getBackup", uuid=str(uuid), backup_id=backup.id)
+        )
+        return JSONResponse(
+            status_code=202,
+            content=toSchema(backup).model_dump(mode="json"),
+            headers={"Location": statusUrl},
+        )
+
+    try:
+        return toSchema(await backups.create(str(uuid), getRcon, runner))
+    except JobQueueFullError as e:
+        logger.error(f"Job queue error: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending jobs, retry later",
+            headers={"Retry-After": "5"},
+        )
+    except (BackupError, OSError) as e:
+        logger.error(f"Backup of server {uuid} failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Backup failed: {e}")
+
+
+@backupRouter.get(
+    "/{uuid}/backups",
+    summary="List server backups",
+    response_model=List[BackupSchema],
+)
+async def getBackupList(uuid: UUID4, backups: BackupManager = Depends(getBackups)):
+    return [toSchema(backup) for backup in await backups.list_backups(str(uuid))]
+
+
+@backupRouter.get(
+    "/{uuid}/backups/{backup_id}",
+    summary="Get server backup",
+    response_model=BackupSchema,
+    responses={404: {"description": "Backup not found"}},
+)
+async def getBackup(
+    uuid: UUID4, backup_id: str, backups: BackupManager = Depends(getBackups)
+):
+    try:
+        return toSchema(await backups.get(str(uuid), backup_id))
+    except BackupNotFoundError:
+        raise HTTPException(status_code=404, detail="Backup not found")
+
+
+@backupRouter.post(
+    "/{uuid}/backups/{backup_id}/restore",
+    summary="Restore server from backup",
+    status_code=201,
+    responses={
+        201: {"description": "Server directory restored"},
+        404: {"description": "Server or backup not found"},
+        409: {"description": "Server is running"},
+        500: {"description": "Restore failed"},
+    },
+)
+async def restoreBackup(
+    uuid: UUID4,
+    backup_id: str,
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    backups: BackupManager = Depends(getBackups),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    await getServer(uuid, session)
+
+    async def restore():
+        # Checked in the queue, so a start queued earlier has already run.
+        state = serverManager.get_state(str(uuid))
+        if state is not None and state.state == "running":
+            raise HTTPException(
+                status_code=409, detail="Stop the server before restoring it"
+            )
+        # A hibernated server would wake into the old world otherwise.
+        await serverManager.hibernation.release(str(uuid))
+        await backups.restore(str(uuid), backup_id)
+
+    try:
+        await jobs.run("restore", restore, str(uuid))
+    except BackupNotFoundError:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    except JobQueueFullError as e:
+        logger.error(f"Job queue error: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending jobs, retry later",
+            headers={"Retry-After": "5"},
+        )
+    except (BackupError, OSError) as e:
+        logger.error(f"Restore of server {uuid} failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Restore failed: {e}")
+
+    return Response(status_code=201)
+
+
+@backupRouter.delete(
+    "/{uuid}/backups/{backup_id}",
+    summary="Delete server backup",
+    status_code=204,
+    responses={404: {"description": "Backup not found"}},
+)
+async def deleteBackup(
+    uuid: UUID4, backup_id: str, backups: BackupManager = Depends(getBackups)
+):
+    try:
+        await backups.delete(str(uuid), backup_id)
+    except BackupNotFoundError:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return Response(status_code=204)
+
+
+__all__ = ["backupRouter"]
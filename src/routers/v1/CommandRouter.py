@@ -1,19 +1,36 @@
+import asyncio
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+import anyio
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from pydantic import UUID4
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.database import getSession
+from src.configuration import getSettings
+from src.database.database import async_session, getSession
 from src.exceptions.DatabaseExceptions import (
     DatabaseError,
 )
+from src.exceptions.DockerExceptions import NoAvailableNodeError
+from src.exceptions.RconExceptions import RconError
 from src.repositories.ServerRepository import ServerRepository
 from src.schemas.pydantic import CommandChoices, ServerPropertiesPatch
+from src.server.console import ConsoleManager, ConsolePolicy
+from src.server.nodes import node_host
 from src.services import ConsoleService
 from src.utils import update_properties
 
+settings = getSettings()
+
 logger = logging.getLogger(__name__)
 
 commandRouter = APIRouter(prefix="/v1/commands", tags=["Commands"])
@@ -28,7 +45,7 @@ async def runCommand(
 ):
     try:
         serverRepo = ServerRepository(session)
-        server = await serverRepo.getServerByUuid(uuid)
+        server = await serverRepo.getCachedServer(uuid)
 
         if not server:
             logger.error("Server not found")
@@ -51,7 +68,7 @@ async def updateProperties(
 ):
     try:
         serverRepo = ServerRepository(session)
-        server = await serverRepo.getServerByUuid(uuid)
+        server = await serverRepo.getCachedServer(uuid)
 
         if not server:
             logger.error("Server not found")
@@ -68,4 +85,91 @@ async def updateProperties(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@commandRouter.websocket("/{uuid}/console")
+async def console(
+    websocket: WebSocket,
+    uuid: UUID4,
+    token: str | None = Query(None, description="Selects the command allow-list"),
+):
+    policy = ConsolePolicy.for_token(token)
+    if policy is None:
+        logger.warning(f"Console for server {uuid} refused: unknown token")
+        await websocket.close(code=4403)
+        return
+
+    # Looked up on a short-lived session; the socket may stay open for hours.
+    try:
+        async with async_session() as session:
+            server = await ServerRepository(session).getCachedServer(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error while opening console: {e}")
+        await websocket.close(code=1011)
+        return
+
+    if not server:
+        logger.error("Server not found")
+        await websocket.close(code=4404)
+        return
+
+    # Every client of this server shares its RCON pool, commands are
+    # pipelined on the pooled connections.
+    try:
+        consoleManager = ConsoleManager(
+            rcon_host=node_host(server.node),
+            rcon_port=server.rcon_port,
+            rcon_password=server.rcon_password,
+        )
+    except NoAvailableNodeError as e:
+        logger.error(f"Cannot open console of server {uuid}: {e}")
+        await websocket.close(code=1011)
+        return
+    inFlight = asyncio.Semaphore(settings.CONSOLE_MAX_IN_FLIGHT)
+    sendLock = asyncio.Lock()
+
+    async def reply(message: dict) -> None:
+        async with sendLock:
+            try:
+                await websocket.send_json(message)
+            except (WebSocketDisconnect, RuntimeError):
+                # The client is gone; in-flight commands have nobody to answer.
+                taskGroup.cancel_scope.cancel()
+
+    async def run(requestId, command: str) -> None:
+        try:
+            response = await consoleManager.send_rcon_command(command)
+            await reply({"id": requestId, "response": response})
+        except RconError as e:
+            await reply({"id": requestId, "error": str(e)})
+        finally:
+            inFlight.release()
+
+    await websocket.accept()
+    async with anyio.create_task_group() as taskGroup:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except WebSocketDisconnect:
+                taskGroup.cancel_scope.cancel()
+                break
+            except ValueError:
+                await reply({"error": "Message must be JSON"})
+                continue
+
+            if not isinstance(message, dict) or not isinstance(
+                message.get("command"), str
+            ):
+                await reply({"error": "Expected {'id': ..., 'command': str}"})
+                continue
+
+            requestId = message.get("id")
+            error = policy.check(message["command"])
+            if error is not None:
+                await reply({"id": requestId, "error": error})
+                continue
+
+            # Reading stops while a client has too many commands outstanding.
+            await inFlight.acquire()
+            taskGroup.start_soon(run, requestId, message["command"])
+
+
 __all__ = ["commandRouter"]
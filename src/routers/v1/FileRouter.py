@@ -0,0 +1,197 @@
+import logging
+import mimetypes
+import stat
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from src.database.database import getSession
+from src.exceptions import (
+    DatabaseError,
+    ServerFileError,
+    ServerFileExistsError,
+    ServerFileNotFoundError,
+    UploadTooLargeError,
+)
+from src.repositories.ServerRepository import ServerRepository
+from src.schemas.pydantic import (
+    ArchiveFormat,
+    FileEntrySchema,
+    FileListSchema,
+)
+from src.server.files import CHUNK_SIZE, FileEntry, FileManager, getFiles
+
+logger = logging.getLogger(__name__)
+
+fileRouter = APIRouter(prefix="/v1/servers", tags=["Files"])
+
+ARCHIVE_MEDIA_TYPES = {
+    ArchiveFormat.tar: "application/x-tar",
+    ArchiveFormat.zip: "application/zip",
+}
+
+
+class ServerFileResponse(FileResponse):
+    # Handles Range and If-Range; hands the file to the server through the
+    # ASGI pathsend extension (sendfile) when the server offers it.
+    chunk_size = CHUNK_SIZE
+
+
+def toSchema(entry: FileEntry) -> FileEntrySchema:
+    return FileEntrySchema(
+        name=entry.name,
+        path=entry.path,
+        type=entry.type,
+        size=entry.size,
+        modified=datetime.fromtimestamp(entry.modified, timezone.utc),
+    )
+
+
+def fileError(uuid: UUID4, e: ServerFileError) -> HTTPException:
+    if isinstance(e, ServerFileNotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, ServerFileExistsError):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, UploadTooLargeError):
+        return HTTPException(status_code=413, detail=str(e))
+    logger.warning(f"Rejected file path for server {uuid}: {e}")
+    return HTTPException(status_code=400, detail=str(e))
+
+
+def contentDisposition(filename: str) -> str:
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+async def checkServer(uuid: UUID4, session: AsyncSession) -> None:
+    try:
+        server = await ServerRepository(session).getCachedServer(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if server is None:
+        logger.warning(f"Server with UUID {uuid} not found")
+        raise HTTPException(status_code=404, detail="Server not found")
+
+
+@fileRouter.get(
+    "/{uuid}/files",
+    summary="List server directory",
+    response_model=FileListSchema,
+    responses={
+        400: {"description": "Path outside the server directory or not a directory"},
+        404: {"description": "Server or path not found"},
+    },
+)
+async def listFiles(
+    uuid: UUID4,
+    path: str = Query("", description="Directory relative to the server root"),
+    session: AsyncSession = Depends(getSession),
+    files: FileManager = Depends(getFiles),
+):
+    await checkServer(uuid, session)
+    try:
+        entries = await files.list_directory(str(uuid), path)
+    except ServerFileError as e:
+        raise fileError(uuid, e)
+    return FileListSchema(path=path, entries=[toSchema(e) for e in entries])
+
+
+@fileRouter.get(
+    "/{uuid}/files/{path:path}",
+    summary="Download server file or directory",
+    responses={
+        200: {
+            "description": "The file, or the directory as an archive",
+            "content": {
+                "application/octet-stream": {},
+                "application/x-tar": {},
+                "application/zip": {},
+            },
+        },
+        206: {"description": "Requested byte range of the file"},
+        400: {"description": "Path outside the server directory"},
+        404: {"description": "Server or path not found"},
+        416: {"description": "Range not satisfiable"},
+    },
+)
+async def downloadFile(
+    uuid: UUID4,
+    path: str,
+    format: ArchiveFormat = Query(
+        ArchiveFormat.tar, description="Archive format for directories"
+    ),
+    session: AsyncSession = Depends(getSession),
+    files: FileManager = Depends(getFiles),
+):
+    await checkServer(uuid, session)
+    try:
+        target, result = await files.stat(str(uuid), path)
+    except ServerFileError as e:
+        raise fileError(uuid, e)
+
+    if stat.S_ISDIR(result.st_mode):
+        # Generated while it is sent, a world of any size never sits in memory.
+        return StreamingResponse(
+            files.archive(target, format.value),
+            media_type=ARCHIVE_MEDIA_TYPES[format],
+            headers={
+                "Content-Disposition": contentDisposition(
+                    f"{target.name}.{format.value}"
+                )
+            },
+        )
+    if not stat.S_ISREG(result.st_mode):
+        raise HTTPException(status_code=400, detail="Not a regular file")
+
+    return ServerFileResponse(
+        target,
+        stat_result=result,
+        filename=target.name,
+        media_type=mimetypes.guess_type(target.name)[0] or "application/octet-stream",
+    )
+
+
+@fileRouter.put(
+    "/{uuid}/files/{path:path}",
+    summary="Upload server file",
+    response_model=FileEntrySchema,
+    status_code=201,
+    responses={
+        400: {"description": "Path outside the server directory or a directory"},
+        404: {"description": "Server not found"},
+        409: {"description": "File exists and overwrite is off"},
+        413: {"description": "Upload too large"},
+    },
+)
+async def uploadFile(
+    request: Request,
+    uuid: UUID4,
+    path: str,
+    overwrite: bool = Query(True),
+    session: AsyncSession = Depends(getSession),
+    files: FileManager = Depends(getFiles),
+):
+    await checkServer(uuid, session)
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > files.upload_max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Upload exceeds {files.upload_max_bytes} bytes"
+        )
+
+    try:
+        entry = await files.upload(str(uuid), path, request.stream(), overwrite)
+    except ServerFileError as e:
+        raise fileError(uuid, e)
+    except ClientDisconnect:
+        logger.warning(f"Upload of '{path}' to server {uuid} interrupted")
+        raise HTTPException(status_code=400, detail="Upload interrupted")
+    return toSchema(entry)
+
+
+__all__ = ["fileRouter"]
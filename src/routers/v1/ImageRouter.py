@@ -0,0 +1,51 @@
+import logging
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, Response
+
+from src.schemas.pydantic import ImagePullSchema, ImageStatusSchema
+from src.server.manager import ServerManager, getManager
+
+logger = logging.getLogger(__name__)
+
+imageRouter = APIRouter(prefix="/v1/images", tags=["Images"])
+
+
+@imageRouter.get("/", summary="Get image cache", response_model=List[ImageStatusSchema])
+async def getImages(serverManager: ServerManager = Depends(getManager)):
+    statuses = []
+    for node in serverManager.nodes.all():
+        images = node.images
+        names = sorted(set(images.prewarm) | set(images.pulls) | images.local)
+        for name in names:
+            pull = images.pulls.get(name)
+            statuses.append(
+                ImageStatusSchema(
+                    node=node.name,
+                    image=name,
+                    local=images.is_local(name),
+                    status=pull.status if pull else None,
+                    progress=pull.progress if pull else None,
+                    error=pull.error if pull else None,
+                )
+            )
+    return statuses
+
+
+@imageRouter.post(
+    "/pull",
+    summary="Pull image in background on every node",
+    status_code=202,
+    responses={202: {"description": "Pull scheduled"}},
+)
+async def pullImage(
+    image: Annotated[ImagePullSchema, Depends()],
+    serverManager: ServerManager = Depends(getManager),
+):
+    logger.info(f"Scheduling pull of {image.image}")
+    for node in serverManager.nodes.all():
+        node.images.schedule(image.image)
+    return Response(status_code=202)
+
+
+__all__ = ["imageRouter"]
@@ -0,0 +1,37 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import getSession
+from src.exceptions import DatabaseError
+from src.repositories import JobRepository
+from src.schemas.pydantic import JobResponseSchema
+
+logger = logging.getLogger(__name__)
+
+jobRouter = APIRouter(prefix="/v1/jobs", tags=["Jobs"])
+
+
+@jobRouter.get(
+    "/{uuid}",
+    summary="Get job by uuid",
+    response_model=JobResponseSchema,
+    responses={404: {"description": "Job not found"}},
+)
+async def getJobByUuid(uuid: UUID4, session: AsyncSession = Depends(getSession)):
+    try:
+        job = await JobRepository(session).getJobByUuid(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if job is None:
+        logger.warning(f"Job with UUID {uuid} not found")
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+__all__ = ["jobRouter"]
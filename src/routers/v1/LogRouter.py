@@ -0,0 +1,162 @@
+import json
+import logging
+
+import anyio
+from aiodocker.exceptions import DockerError
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    WebSocket,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import UUID4
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configuration import getSettings
+from src.database.database import async_session, getSession
+from src.exceptions import DatabaseError, NoAvailableNodeError
+from src.repositories.ServerRepository import ServerRepository
+from src.schemas.pydantic import ServerLogsSchema
+from src.server.logs import batches
+from src.server.manager import ServerManager, getManager
+
+settings = getSettings()
+
+logger = logging.getLogger(__name__)
+
+logRouter = APIRouter(prefix="/v1/servers", tags=["Logs"])
+
+KEEPALIVE_INTERVAL = 15.0
+
+
+def logsError(uuid: UUID4, e: DockerError | NoAvailableNodeError) -> HTTPException:
+    if isinstance(e, DockerError) and e.status == 404:
+        return HTTPException(status_code=404, detail="Server container not found")
+    logger.error(f"Cannot read logs of server {uuid}: {e}")
+    return HTTPException(status_code=500, detail="Server manager error")
+
+
+def sseEvents(lines: list[str], dropped: int) -> str:
+    events = [f"event: dropped\ndata: {dropped}\n\n"] if dropped else []
+    events.extend(f"data: {line}\n\n" for line in lines)
+    return "".join(events)
+
+
+@logRouter.get(
+    "/{uuid}/logs",
+    summary="Get server console output",
+    response_model=ServerLogsSchema,
+    responses={
+        200: {
+            "description": "Last lines as JSON, or an event stream when following",
+            "content": {"text/event-stream": {}},
+        },
+        404: {"description": "Server or its container not found"},
+    },
+)
+async def getServerLogs(
+    uuid: UUID4,
+    tail: int = Query(100, ge=0, le=settings.LOG_BACKLOG),
+    follow: bool = Query(False, description="Keep streaming as Server-Sent Events"),
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+):
+    try:
+        server = await ServerRepository(session).getCachedServer(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error while reading logs: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if server is None:
+        logger.warning(f"Server with UUID {uuid} not found")
+        raise HTTPException(status_code=404, detail="Server not found")
+
+    if not follow:
+        try:
+            lines = await serverManager.logs.tail(str(uuid), server.node, tail)
+        except (DockerError, NoAvailableNodeError) as e:
+            raise logsError(uuid, e)
+        return ServerLogsSchema(uuid=uuid, lines=lines)
+
+    try:
+        subscriber = await serverManager.logs.subscribe(str(uuid), server.node, tail)
+    except (DockerError, NoAvailableNodeError) as e:
+        raise logsError(uuid, e)
+
+    async def events():
+        try:
+            async for batch in batches(subscriber, KEEPALIVE_INTERVAL):
+                yield ": keepalive\n\n" if batch is None else sseEvents(*batch)
+            yield "event: end\ndata: \n\n"
+        finally:
+            serverManager.logs.unsubscribe(str(uuid), subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@logRouter.websocket("/{uuid}/logs")
+async def streamServerLogs(
+    websocket: WebSocket,
+    uuid: UUID4,
+    tail: int = Query(100, ge=0, le=settings.LOG_BACKLOG),
+    serverManager: ServerManager = Depends(getManager),
+):
+    # Looked up on a short-lived session; the socket may stay open for hours.
+    try:
+        async with async_session() as session:
+            server = await ServerRepository(session).getCachedServer(uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error while streaming logs: {e}")
+        await websocket.close(code=1011)
+        return
+
+    if server is None:
+        logger.warning(f"Server with UUID {uuid} not found")
+        await websocket.close(code=4404)
+        return
+
+    try:
+        subscriber = await serverManager.logs.subscribe(str(uuid), server.node, tail)
+    except (DockerError, NoAvailableNodeError) as e:
+        logger.warning(f"Cannot stream logs of server {uuid}: {e}")
+        missing = isinstance(e, DockerError) and e.status == 404
+        await websocket.close(code=4404 if missing else 1011)
+        return
+
+    await websocket.accept()
+
+    async def pump():
+        async for batch in batches(subscriber, KEEPALIVE_INTERVAL):
+            if batch is None:
+                continue
+            lines, dropped = batch
+            if dropped:
+                await websocket.send_text(
+                    json.dumps({"type": "dropped", "count": dropped})
+                )
+            if lines:
+                await websocket.send_text(json.dumps({"type": "log", "lines": lines}))
+        await websocket.send_text(json.dumps({"type": "end"}))
+        await websocket.close()
+        taskGroup.cancel_scope.cancel()
+
+    async def watchDisconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        taskGroup.cancel_scope.cancel()
+
+    try:
+        async with anyio.create_task_group() as taskGroup:
+            taskGroup.start_soon(pump)
+            taskGroup.start_soon(watchDisconnect)
+    finally:
+        serverManager.logs.unsubscribe(str(uuid), subscriber)
+
+
+__all__ = ["logRouter"]
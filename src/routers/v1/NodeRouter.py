@@ -0,0 +1,40 @@
+import logging
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from src.schemas.pydantic import NodeSchema
+from src.server.manager import ServerManager, getManager
+
+logger = logging.getLogger(__name__)
+
+nodeRouter = APIRouter(prefix="/v1/nodes", tags=["Nodes"])
+
+
+@nodeRouter.get(
+    "/", summary="Get Docker nodes and their capacity", response_model=List[NodeSchema]
+)
+async def getNodes(serverManager: ServerManager = Depends(getManager)):
+    nodes = []
+    for node in serverManager.nodes.all():
+        capacity = node.capacity
+        nodes.append(
+            NodeSchema(
+                name=node.name,
+                host=node.host,
+                containers=capacity.containers,
+                memory_total=capacity.memory_total,
+                memory_free=capacity.memory_free,
+                refreshed_at=(
+                    datetime.fromtimestamp(capacity.refreshed_at, timezone.utc)
+                    if capacity.refreshed_at is not None
+                    else None
+                ),
+                error=capacity.error,
+            )
+        )
+    return nodes
+
+
+__all__ = ["nodeRouter"]
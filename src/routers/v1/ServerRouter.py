@@ -1,30 +1,67 @@
+import asyncio
 import logging
+from datetime import datetime, timezone
 from functools import wraps
 from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import UUID4
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.database import getSession
+from src.configuration import getSettings
+from src.database.database import async_session, getSession
 from src.exceptions.DatabaseExceptions import (
     DatabaseError,
     ServerCreateError,
     ServerDeleteError,
 )
 from src.exceptions.DockerExceptions import (
+    ImageNotReadyError,
+    NoAvailableNodeError,
+    NoAvailablePortError,
     ServerManagerError,
+    ServerNotFoundError,
+    ServerNotReadyError,
     ServerRestartError,
     ServerStartError,
     ServerStopError,
+    ServerUpdateError,
 )
+from src.exceptions.JobExceptions import JobQueueFullError
+from src.exceptions.RconExceptions import RconError
+from src.exceptions.TemplateExceptions import TemplateNotFoundError
+from src.repositories.ServerCache import getServerCache
 from src.repositories.ServerRepository import ServerRepository
 from src.schemas.pydantic import (
+    BulkAction,
+    BulkActionSchema,
+    BulkResultSchema,
+    JobAcceptedSchema,
+    ServerCacheStatsSchema,
     ServerCreateSchema,
+    ServerListSchema,
+    ServerLoadSchema,
+    ServerPingSchema,
+    ServerReadySchema,
+    ServerResourcesSchema,
     ServerResponseSchema,
+    ServerStateSchema,
+    ServerStatsSchema,
+    StatsMetric,
+    StatsWindow,
+    WaitMode,
 )
+from src.server.hibernation import SLEEPING_MOTD
+from src.server.jobs import Job, JobQueue, getJobQueue
 from src.server.manager import ServerManager, getManager
+from src.server.nodes import node_host
+from src.server.status import ServerStatus, get_status_prober
+from src.server.templates import TemplateStore, getTemplates
 from src.services import ServerService
+from src.utils import decode_cursor, encode_cursor, stored_limits
+
+settings = getSettings()
 
 logger = logging.getLogger(__name__)
 
@@ -42,15 +79,143 @@ def handle_db_and_manager_errors(func):
         except ServerManagerError as e:
             logger.error(f"Server manager error: {e}")
             raise HTTPException(status_code=500, detail="Server manager error")
+        except JobQueueFullError as e:
+            logger.error(f"Job queue error: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Too many pending jobs, retry later",
+                headers={"Retry-After": "5"},
+            )
 
     return wrapper
 
 
-@serverRouter.get("/{uuid}", summary="Get server by uuid", response_model=Optional[ServerResponseSchema])
+def jobAccepted(request: Request, job: Job) -> JSONResponse:
+    statusUrl = str(request.url_for("getJobByUuid", uuid=job.uuid))
+    body = JobAcceptedSchema(
+        job_id=job.uuid, status_url=statusUrl, server_uuid=job.server_uuid
+    )
+    return JSONResponse(
+        status_code=202,
+        content=body.model_dump(mode="json"),
+        headers={"Location": statusUrl},
+    )
+
+
+async def waitUntilReady(
+    serverManager: ServerManager, uuid: UUID4, node: Optional[str], timeout: float
+) -> JSONResponse:
+    try:
+        readiness = await serverManager.wait_ready(str(uuid), node, timeout)
+    except ServerNotReadyError as e:
+        logger.warning(f"Server {uuid} not ready: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+
+    body = ServerReadySchema(
+        uuid=uuid,
+        started_at=datetime.fromtimestamp(readiness.started_at, timezone.utc),
+        ready_at=datetime.fromtimestamp(readiness.ready_at, timezone.utc),
+        time_to_ready=round(readiness.seconds, 3),
+        source=readiness.source,
+    )
+    return JSONResponse(status_code=201, content=body.model_dump(mode="json"))
+
+
+def checkWait(wait: Optional[WaitMode], async_: bool) -> None:
+    if wait is not None and async_:
+        raise HTTPException(
+            status_code=400, detail="wait=ready cannot be combined with async"
+        )
+
+
+# Must stay above `/{uuid}`, which would otherwise match "cache".
+@serverRouter.get(
+    "/cache/stats",
+    summary="Get server lookup cache stats",
+    response_model=ServerCacheStatsSchema,
+)
+async def getServerCacheStats():
+    cache = getServerCache()
+    return ServerCacheStatsSchema(
+        size=len(cache),
+        capacity=cache.size,
+        hits=cache.hits,
+        misses=cache.misses,
+    )
+
+
+@serverRouter.get(
+    "/stats/heaviest",
+    summary="Get servers with the highest average resource usage",
+    response_model=List[ServerLoadSchema],
+)
+async def getHeaviestServers(
+    metric: StatsMetric = StatsMetric.cpu_percent,
+    window: StatsWindow = StatsWindow.five,
+    limit: int = Query(10, ge=1, le=100),
+    serverManager: ServerManager = Depends(getManager),
+):
+    # Served from the collector's buffers, Docker is not asked.
+    loads = serverManager.stats.heaviest(metric.value, window.value, limit)
+    return [ServerLoadSchema(uuid=uuid, avg=avg) for uuid, avg in loads]
+
+
+@serverRouter.get(
+    "/status",
+    summary="Ping every server with the Server List Ping protocol",
+    response_model=List[ServerPingSchema],
+)
+@handle_db_and_manager_errors
+async def getServersStatus(
+    version: Optional[str] = None,
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+):
+    servers = await ServerRepository(session).getServerPorts(version=version)
+
+    # Stopped containers are reported from the index instead of waiting on a
+    # refused connection.
+    running = [
+        server
+        for server in servers
+        if (state := serverManager.get_state(str(server.uuid)))
+        and state.state == "running"
+    ]
+    probed = dict(
+        zip(
+            (server.uuid for server in running),
+            await get_status_prober().probe_many(
+                [server.port for server in running],
+                [node_host(server.node) for server in running],
+            ),
+        )
+    )
+    stopped = ServerStatus(online=False, error="Container is not running")
+    sleeping = ServerStatus(online=False, motd=SLEEPING_MOTD, error="Hibernating")
+    hibernating = serverManager.hibernation.sleeping
+
+    return [
+        ServerPingSchema(
+            uuid=server.uuid,
+            port=server.port,
+            **vars(
+                probed.get(server.uuid)
+                or (sleeping if str(server.uuid) in hibernating else stopped)
+            ),
+        )
+        for server in servers
+    ]
+
+
+@serverRouter.get(
+    "/{uuid}",
+    summary="Get server by uuid",
+    response_model=Optional[ServerResponseSchema],
+)
 @handle_db_and_manager_errors
 async def getServerByUuid(uuid: UUID4, session: AsyncSession = Depends(getSession)):
     serverRepo = ServerRepository(session)
-    server = await serverRepo.getServerByUuid(uuid)
+    server = await serverRepo.getCachedServer(uuid)
 
     if server is None:
         logger.warning(f"Server with UUID {uuid} not found")
@@ -59,41 +224,242 @@ async def getServerByUuid(uuid: UUID4, session: AsyncSession = Depends(getSessio
     return server
 
 
-@serverRouter.get("/", summary="Get all servers", response_model=List[ServerResponseSchema])
+@serverRouter.get(
+    "/{uuid}/state",
+    summary="Get container state",
+    response_model=ServerStateSchema,
+    responses={404: {"description": "Server container not found"}},
+)
+async def getServerState(
+    uuid: UUID4, serverManager: ServerManager = Depends(getManager)
+):
+    state = serverManager.get_state(str(uuid))
+
+    if state is None:
+        logger.warning(f"Container for server {uuid} not found")
+        raise HTTPException(status_code=404, detail="Server container not found")
+
+    return state
+
+
+@serverRouter.get(
+    "/{uuid}/stats",
+    summary="Get resource usage aggregates",
+    response_model=ServerStatsSchema,
+    responses={404: {"description": "No stats collected for this server"}},
+)
+async def getServerStats(
+    uuid: UUID4, serverManager: ServerManager = Depends(getManager)
+):
+    windows = serverManager.stats.summary(str(uuid))
+
+    if windows is None:
+        logger.warning(f"No stats collected for server {uuid}")
+        raise HTTPException(status_code=404, detail="No stats collected for server")
+
+    return ServerStatsSchema(uuid=uuid, windows=windows)
+
+
+@serverRouter.get(
+    "/",
+    summary="List servers",
+    response_model=List[ServerResponseSchema],
+    responses={
+        200: {
+            "description": "A page of servers; X-Next-Cursor is set when more remain",
+            "content": {"application/x-ndjson": {}},
+        },
+        400: {"description": "Malformed cursor"},
+    },
+)
 @handle_db_and_manager_errors
-async def getAllServers(session: AsyncSession = Depends(getSession)):
+async def getAllServers(
+    request: Request,
+    response: Response,
+    params: Annotated[ServerListSchema, Depends()],
+    session: AsyncSession = Depends(getSession),
+):
+    try:
+        after = (
+            decode_cursor(params.cursor, params.order_by.value)
+            if params.cursor
+            else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = {"order_by": params.order_by.value, "after": after, **params.filters()}
+
+    if params.stream:
+        return StreamingResponse(
+            streamServers(query), media_type="application/x-ndjson"
+        )
+
     serverRepo = ServerRepository(session)
-    servers = await serverRepo.getAllServers()
+    servers = await serverRepo.listServers(limit=params.limit + 1, **query)
 
-    if not servers:
-        logger.warning("No servers found")
-        raise HTTPException(status_code=404, detail="No servers found")
+    if len(servers) > params.limit:
+        servers = servers[: params.limit]
+        nextCursor = encode_cursor(params.order_by.value, servers[-1])
+        nextUrl = request.url.include_query_params(cursor=nextCursor)
+        response.headers["X-Next-Cursor"] = nextCursor
+        response.headers["Link"] = f'<{nextUrl}>; rel="next"'
 
     return servers
 
 
-@serverRouter.post("/", summary="Add server", response_model=ServerResponseSchema, status_code=201)
+async def streamServers(query: dict):
+    # The request session is closed before the body is sent, so the export
+    # holds its own for as long as the client keeps reading.
+    async with async_session() as session:
+        try:
+            async for server in ServerRepository(session).streamServers(**query):
+                schema = ServerResponseSchema.model_validate(
+                    server, from_attributes=True
+                )
+                yield schema.model_dump_json().encode() + b"\n"
+        except DatabaseError as e:
+            logger.error(f"Server export aborted: {e}")
+
+
+@serverRouter.post(
+    "/",
+    summary="Add server",
+    response_model=ServerResponseSchema,
+    status_code=201,
+    responses={
+        202: {"description": "Container creation queued", "model": JobAcceptedSchema},
+        404: {"description": "Template not found"},
+    },
+)
 @handle_db_and_manager_errors
 async def addServer(
+    request: Request,
     server: Annotated[ServerCreateSchema, Depends()],
+    template: Optional[str] = Query(None, description="Template to start from"),
+    async_: bool = Query(False, alias="async"),
     session: AsyncSession = Depends(getSession),
     serverManager: ServerManager = Depends(getManager),
+    templates: TemplateStore = Depends(getTemplates),
+    jobs: JobQueue = Depends(getJobQueue),
 ):
     try:
+        if template is not None:
+            # Checked before a port is reserved for nothing.
+            await templates.get(template)
+
         service = ServerService(session)
-        newServer = await service.addServer(server)
-
-        await serverManager.create_server(
-            uuid=newServer.uuid,
-            port=newServer.port,
-            rcon_port=newServer.rcon_port,
-            rcon_password=newServer.rcon_password,
-            version=server.version,
-        )
+        newServer = await service.addServer(server, place=serverManager.place)
+        serverUuid = str(newServer.uuid)
+
+        async def create():
+            if template is not None:
+                await templates.copy_template(template, serverUuid)
+            await serverManager.create_server(
+                uuid=newServer.uuid,
+                port=newServer.port,
+                rcon_port=newServer.rcon_port,
+                rcon_password=newServer.rcon_password,
+                version=server.version,
+                node=newServer.node,
+                limits=stored_limits(newServer),
+            )
+
+        if async_:
+            return jobAccepted(request, await jobs.submit("create", create, serverUuid))
+
+        await jobs.run("create", create, serverUuid)
         return newServer
+    except TemplateNotFoundError:
+        raise HTTPException(status_code=404, detail="Template not found")
+    except (RconError, OSError) as e:
+        logger.error(f"Cannot copy template {template}: {e}")
+        raise HTTPException(status_code=500, detail=f"Copy failed: {e}")
     except ServerCreateError as e:
         logger.error(f"Integrity error while adding server: {e}")
         raise HTTPException(status_code=400, detail="Server already exists")
+    except NoAvailablePortError as e:
+        logger.error(f"No free ports while adding server: {e}")
+        raise HTTPException(status_code=503, detail="No free ports available")
+    except NoAvailableNodeError as e:
+        logger.error(f"No Docker node can take the server: {e}")
+        raise HTTPException(status_code=503, detail="No Docker node has capacity")
+    except ImageNotReadyError as e:
+        logger.warning(f"Image not ready while adding server: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server image is being downloaded, retry later",
+            headers={"Retry-After": "30"},
+        )
+
+
+# Declared before the per-server routes, which would otherwise claim
+# `/bulk/{action}` with "bulk" as the uuid.
+@serverRouter.post(
+    "/bulk/{action}",
+    summary="Run lifecycle action on many servers",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One BulkResultSchema line per server, as each completes",
+            "content": {"application/x-ndjson": {}},
+        },
+    },
+)
+@handle_db_and_manager_errors
+async def bulkAction(
+    action: BulkAction,
+    selection: BulkActionSchema,
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    serverFilter = selection.filter
+    servers = await ServerRepository(session).getServers(
+        uuids=selection.uuids, version=serverFilter.version if serverFilter else None
+    )
+
+    # Each server is acted on where it was placed.
+    targets = {str(server.uuid): server.node for server in servers}
+    if serverFilter and serverFilter.state:
+        targets = {
+            uuid: node
+            for uuid, node in targets.items()
+            if (state := serverManager.get_state(uuid))
+            and state.state == serverFilter.state
+        }
+    found = {str(server.uuid) for server in servers}
+    missing = [uuid for uuid in selection.uuids or [] if str(uuid) not in found]
+    logger.info(f"Bulk {action.value} on {len(targets)} servers")
+
+    def runBulkJob(action, uuid, func):
+        return jobs.run(action, func, uuid)
+
+    def line(result: BulkResultSchema) -> bytes:
+        return result.model_dump_json().encode() + b"\n"
+
+    async def results():
+        for uuid in missing:
+            yield line(
+                BulkResultSchema(
+                    uuid=uuid, status="not_found", error="Server not found"
+                )
+            )
+
+        async for uuid, error in serverManager.bulk(action.value, targets, runBulkJob):
+            if error is None:
+                yield line(BulkResultSchema(uuid=uuid, status="ok"))
+            elif isinstance(error, ServerNotFoundError):
+                yield line(
+                    BulkResultSchema(uuid=uuid, status="not_found", error=str(error))
+                )
+            else:
+                logger.error(f"Bulk {action.value} failed for {uuid}: {error}")
+                yield line(
+                    BulkResultSchema(uuid=uuid, status="error", error=str(error))
+                )
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 
 @serverRouter.post(
@@ -101,26 +467,51 @@ async def addServer(
     summary="Start server",
     status_code=201,
     responses={
-        201: {"description": "Server started successfully"},
+        201: {
+            "description": "Server started successfully; with wait=ready, "
+            "once it accepts players",
+            "model": ServerReadySchema,
+        },
+        202: {"description": "Job queued", "model": JobAcceptedSchema},
         404: {"description": "Server not found"},
         500: {"description": "Server manager error"},
     },
 )
 @handle_db_and_manager_errors
 async def startServer(
+    request: Request,
     uuid: UUID4,
+    async_: bool = Query(False, alias="async"),
+    wait: Optional[WaitMode] = Query(
+        None, description="ready: respond once the server accepts players"
+    ),
+    timeout: float = Query(settings.READY_TIMEOUT, gt=0, le=settings.READY_MAX_WAIT),
     session: AsyncSession = Depends(getSession),
     serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
 ):
+    checkWait(wait, async_)
     try:
         service = ServerRepository(session)
-        server = await service.getServerByUuid(uuid)
+        server = await service.getCachedServer(uuid)
 
         if not server:
             logger.error("Server not found")
             raise HTTPException(status_code=404, detail="Server not found")
 
-        await serverManager.start_server(uuid=server.uuid)
+        def start():
+            return serverManager.start_server(uuid=server.uuid, node=server.node)
+
+        if async_:
+            return jobAccepted(
+                request, await jobs.submit("start", start, str(server.uuid))
+            )
+
+        await jobs.run("start", start, str(server.uuid))
+        if wait is WaitMode.ready:
+            return await waitUntilReady(
+                serverManager, server.uuid, server.node, timeout
+            )
         return Response(status_code=201)
     except ServerStartError as e:
         logger.error(f"Server manager error while starting server: {e}")
@@ -132,26 +523,51 @@ async def startServer(
     summary="Restart server",
     status_code=201,
     responses={
-        201: {"description": "Server restarted successfully"},
+        201: {
+            "description": "Server restarted successfully; with wait=ready, "
+            "once it accepts players",
+            "model": ServerReadySchema,
+        },
+        202: {"description": "Job queued", "model": JobAcceptedSchema},
         404: {"description": "Server not found"},
         500: {"description": "Server manager error"},
     },
 )
 @handle_db_and_manager_errors
 async def restartServer(
+    request: Request,
     uuid: UUID4,
+    async_: bool = Query(False, alias="async"),
+    wait: Optional[WaitMode] = Query(
+        None, description="ready: respond once the server accepts players"
+    ),
+    timeout: float = Query(settings.READY_TIMEOUT, gt=0, le=settings.READY_MAX_WAIT),
     session: AsyncSession = Depends(getSession),
     serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
 ):
+    checkWait(wait, async_)
     try:
         service = ServerRepository(session)
-        server = await service.getServerByUuid(uuid)
+        server = await service.getCachedServer(uuid)
 
         if not server:
             logger.error("Server not found")
             raise HTTPException(status_code=404, detail="Server not found")
 
-        await serverManager.restart_server(uuid=server.uuid)
+        def restart():
+            return serverManager.restart_server(uuid=server.uuid, node=server.node)
+
+        if async_:
+            return jobAccepted(
+                request, await jobs.submit("restart", restart, str(server.uuid))
+            )
+
+        await jobs.run("restart", restart, str(server.uuid))
+        if wait is WaitMode.ready:
+            return await waitUntilReady(
+                serverManager, server.uuid, server.node, timeout
+            )
         return Response(status_code=201)
     except ServerRestartError as e:
         logger.error(f"Server manager error while starting server: {e}")
@@ -164,25 +580,37 @@ async def restartServer(
     status_code=201,
     responses={
         201: {"description": "Server stopped successfully"},
+        202: {"description": "Job queued", "model": JobAcceptedSchema},
         404: {"description": "Server not found"},
         500: {"description": "Server manager error"},
     },
 )
 @handle_db_and_manager_errors
 async def stopServer(
+    request: Request,
     uuid: UUID4,
+    async_: bool = Query(False, alias="async"),
     session: AsyncSession = Depends(getSession),
     serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
 ):
     try:
         service = ServerRepository(session)
-        server = await service.getServerByUuid(uuid)
+        server = await service.getCachedServer(uuid)
 
         if not server:
             logger.error("Server not found")
             raise HTTPException(status_code=404, detail="Server not found")
 
-        await serverManager.stop_server(uuid=server.uuid)
+        def stop():
+            return serverManager.stop_server(uuid=server.uuid, node=server.node)
+
+        if async_:
+            return jobAccepted(
+                request, await jobs.submit("stop", stop, str(server.uuid))
+            )
+
+        await jobs.run("stop", stop, str(server.uuid))
 
         return Response(status_code=201)
     except ServerStopError as e:
@@ -190,6 +618,134 @@ async def stopServer(
         raise HTTPException(status_code=500, detail="Server manager error")
 
 
+@serverRouter.patch(
+    "/{uuid}/resources",
+    summary="Change server resource limits",
+    response_model=ServerResponseSchema,
+    responses={
+        400: {"description": "Invalid resource profile"},
+        404: {"description": "Server not found"},
+        500: {"description": "Server manager error"},
+    },
+)
+@handle_db_and_manager_errors
+async def updateServerResources(
+    uuid: UUID4,
+    resources: ServerResourcesSchema,
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    try:
+        service = ServerService(session)
+        server = await service.serverRepo.getServerByUuid(uuid)
+
+        if not server:
+            logger.warning(f"Server with UUID {uuid} not found")
+            raise HTTPException(status_code=404, detail="Server not found")
+
+        profile, limits = service.resolveResources(resources, current=server)
+
+        def update():
+            return serverManager.update_resources(str(uuid), server.node, limits)
+
+        # Limits change in place; the container keeps running.
+        await jobs.run("update", update, str(uuid))
+        return await service.setResources(server, profile, limits)
+    except ServerNotFoundError as e:
+        logger.warning(f"Container for server {uuid} not found: {e}")
+        raise HTTPException(status_code=404, detail="Server container not found")
+    except ServerUpdateError as e:
+        logger.error(f"Server manager error while updating resources: {e}")
+        raise HTTPException(status_code=500, detail="Server manager error")
+
+
+@serverRouter.post(
+    "/{uuid}/clone",
+    summary="Clone server",
+    response_model=ServerResponseSchema,
+    status_code=201,
+    responses={
+        202: {"description": "Clone queued", "model": JobAcceptedSchema},
+        400: {"description": "Invalid resource profile"},
+        404: {"description": "Server not found"},
+        500: {"description": "Copy failed"},
+    },
+)
+@handle_db_and_manager_errors
+async def cloneServer(
+    request: Request,
+    uuid: UUID4,
+    resources: Annotated[ServerResourcesSchema, Depends()],
+    async_: bool = Query(False, alias="async"),
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    templates: TemplateStore = Depends(getTemplates),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    try:
+        service = ServerService(session)
+        source = await service.serverRepo.getServerByUuid(uuid)
+
+        if not source:
+            logger.warning(f"Server with UUID {uuid} not found")
+            raise HTTPException(status_code=404, detail="Server not found")
+
+        newServer = await service.addServer(
+            ServerCreateSchema(version=source.version, **resources.model_dump()),
+            place=serverManager.place,
+            current=source,
+        )
+        sourceUuid = str(uuid)
+        serverUuid = str(newServer.uuid)
+
+        def copy():
+            # Whether the source runs is only known once it is its turn.
+            return templates.copy_server(
+                sourceUuid, serverUuid, serverManager.running_rcon(source)
+            )
+
+        def create():
+            return serverManager.create_server(
+                uuid=newServer.uuid,
+                port=newServer.port,
+                rcon_port=newServer.rcon_port,
+                rcon_password=newServer.rcon_password,
+                version=newServer.version,
+                node=newServer.node,
+                limits=stored_limits(newServer),
+            )
+
+        # Ordered with the source's start, stop and restore calls, then with
+        # the new server's own. One job never waits on another from inside.
+        copyJob = jobs.enqueue("clone", copy, sourceUuid)
+        if async_:
+            return jobAccepted(
+                request,
+                await jobs.submit("create", create, serverUuid, after=copyJob),
+            )
+
+        await asyncio.shield(copyJob.future)
+        await jobs.run("create", create, serverUuid)
+        return newServer
+    except (RconError, OSError) as e:
+        logger.error(f"Cannot copy server {uuid}: {e}")
+        raise HTTPException(status_code=500, detail=f"Copy failed: {e}")
+    except NoAvailablePortError as e:
+        logger.error(f"No free ports while cloning server: {e}")
+        raise HTTPException(status_code=503, detail="No free ports available")
+    except NoAvailableNodeError as e:
+        logger.error(f"No Docker node can take the server: {e}")
+        raise HTTPException(status_code=503, detail="No Docker node has capacity")
+    except ImageNotReadyError as e:
+        logger.warning(f"Image not ready while cloning server: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server image is being downloaded, retry later",
+            headers={"Retry-After": "30"},
+        )
+
+
 @serverRouter.delete(
     "/{uuid}/delete",
     summary="Delete server",
@@ -205,16 +761,21 @@ async def deleteServer(
     uuid: UUID4,
     session: AsyncSession = Depends(getSession),
     serverManager: ServerManager = Depends(getManager),
+    jobs: JobQueue = Depends(getJobQueue),
 ):
     try:
         service = ServerService(session)
-        server = await service.get_by_uuid(uuid)
+        server = await service.serverRepo.getServerByUuid(uuid)
 
         if not server:
             logger.warning(f"Server with UUID {uuid} not found")
             raise HTTPException(status_code=404, detail="Server not found")
 
-        await serverManager.remove_server(uuid=str(uuid))
+        def remove():
+            return serverManager.remove_server(uuid=str(uuid), node=server.node)
+
+        # Queued behind any pending lifecycle job of the same server.
+        await jobs.run("remove", remove, str(uuid))
         await service.removeServer(uuid)
 
         return Response(status_code=204)
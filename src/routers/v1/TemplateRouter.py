@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import getSession
+from src.exceptions import (
+    DatabaseError,
+    JobQueueFullError,
+    RconError,
+    TemplateExistsError,
+    TemplateNotFoundError,
+)
+from src.repositories.ServerRepository import ServerRepository
+from src.schemas.pydantic import TemplateCreateSchema, TemplateSchema
+from src.server.jobs import JobQueue, getJobQueue
+from src.server.manager import ServerManager, getManager
+from src.server.templates import Template, TemplateStore, getTemplates
+
+logger = logging.getLogger(__name__)
+
+templateRouter = APIRouter(prefix="/v1/templates", tags=["Templates"])
+
+
+def toSchema(template: Template) -> TemplateSchema:
+    return TemplateSchema(
+        name=template.name,
+        created_at=datetime.fromtimestamp(template.created_at, timezone.utc),
+        version=template.version,
+        source=template.source,
+    )
+
+
+@templateRouter.get(
+    "/",
+    summary="List server templates",
+    response_model=List[TemplateSchema],
+)
+async def getTemplateList(templates: TemplateStore = Depends(getTemplates)):
+    return [toSchema(t) for t in await templates.list_templates()]
+
+
+@templateRouter.get(
+    "/{name}",
+    summary="Get server template",
+    response_model=TemplateSchema,
+    responses={404: {"description": "Template not found"}},
+)
+async def getTemplate(name: str, templates: TemplateStore = Depends(getTemplates)):
+    try:
+        return toSchema(await templates.get(name))
+    except TemplateNotFoundError:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+
+@templateRouter.post(
+    "/",
+    summary="Save server as template",
+    response_model=TemplateSchema,
+    status_code=201,
+    responses={
+        404: {"description": "Server not found"},
+        409: {"description": "Template already exists"},
+        500: {"description": "Copy failed"},
+    },
+)
+async def createTemplate(
+    body: TemplateCreateSchema,
+    session: AsyncSession = Depends(getSession),
+    serverManager: ServerManager = Depends(getManager),
+    templates: TemplateStore = Depends(getTemplates),
+    jobs: JobQueue = Depends(getJobQueue),
+):
+    try:
+        server = await ServerRepository(session).getCachedServer(body.server_uuid)
+    except DatabaseError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if server is None:
+        logger.warning(f"Server with UUID {body.server_uuid} not found")
+        raise HTTPException(status_code=404, detail="Server not found")
+
+    def create():
+        # Whether the server runs is only known once it is our turn.
+        return templates.create(
+            body.name,
+            str(server.uuid),
+            server.version,
+            serverManager.running_rcon(server),
+        )
+
+    try:
+        template = await jobs.run("template", create, str(server.uuid))
+    except TemplateExistsError:
+        raise HTTPException(status_code=409, detail="Template already exists")
+    except JobQueueFullError as e:
+        logger.error(f"Job queue error: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending jobs, retry later",
+            headers={"Retry-After": "5"},
+        )
+    except (RconError, OSError) as e:
+        logger.error(f"Cannot save server {server.uuid} as template: {e}")
+        raise HTTPException(status_code=500, detail=f"Copy failed: {e}")
+    return toSchema(template)
+
+
+@templateRouter.delete(
+    "/{name}",
+    summary="Delete server template",
+    status_code=204,
+    responses={404: {"description": "Template not found"}},
+)
+async def deleteTemplate(name: str, templates: TemplateStore = Depends(getTemplates)):
+    try:
+        await templates.delete(name)
+    except TemplateNotFoundError:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return Response(status_code=204)
+
+
+__all__ = ["templateRouter"]
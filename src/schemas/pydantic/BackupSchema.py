@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import UUID4, BaseModel
+
+
+class BackupSchema(BaseModel):
+    id: str
+    server_uuid: UUID4
+    created_at: datetime
+    status: str
+    files: int
+    size: int
+    stored: int
+    error: Optional[str] = None
+
+
+__all__ = ["BackupSchema"]
@@ -0,0 +1,32 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class FileType(str, Enum):
+    file = "file"
+    directory = "directory"
+    symlink = "symlink"
+    other = "other"
+
+
+class ArchiveFormat(str, Enum):
+    tar = "tar"
+    zip = "zip"
+
+
+class FileEntrySchema(BaseModel):
+    name: str
+    path: str
+    type: FileType
+    size: int
+    modified: datetime
+
+
+class FileListSchema(BaseModel):
+    path: str
+    entries: list[FileEntrySchema]
+
+
+__all__ = ["FileType", "ArchiveFormat", "FileEntrySchema", "FileListSchema"]
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ImageStatusSchema(BaseModel):
+    node: str
+    image: str
+    local: bool
+    status: Optional[str] = None
+    progress: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ImagePullSchema(BaseModel):
+    image: str
+
+
+__all__ = ["ImageStatusSchema", "ImagePullSchema"]
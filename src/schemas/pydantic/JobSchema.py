@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import UUID4, BaseModel
+
+
+class JobResponseSchema(BaseModel):
+    uuid: UUID4
+    server_uuid: Optional[UUID4] = None
+    action: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobAcceptedSchema(BaseModel):
+    job_id: UUID4
+    status_url: str
+    server_uuid: Optional[UUID4] = None
+
+
+__all__ = ["JobResponseSchema", "JobAcceptedSchema"]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class NodeSchema(BaseModel):
+    name: str
+    host: str
+    containers: int
+    memory_total: int
+    memory_free: int
+    refreshed_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+__all__ = ["NodeSchema"]
@@ -1,7 +1,26 @@
-from pydantic import UUID4, BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Optional
 
+from pydantic import UUID4, BaseModel, Field, model_validator
 
-class ServerCreateSchema(BaseModel):
+
+class ResourceProfile(str, Enum):
+    small = "small"
+    medium = "medium"
+    large = "large"
+    custom = "custom"
+
+
+class ServerResourcesSchema(BaseModel):
+    profile: Optional[ResourceProfile] = None
+    memory_mb: Optional[int] = Field(None, ge=512)
+    cpus: Optional[float] = Field(None, gt=0)
+    cpuset: Optional[str] = Field(None, pattern=r"^\d+(-\d+)?(,\d+(-\d+)?)*$")
+    pids_limit: Optional[int] = Field(None, ge=64)
+
+
+class ServerCreateSchema(ServerResourcesSchema):
     version: str
 
 
@@ -14,10 +33,179 @@ class ServerResponseSchema(ServerCreateSchema):
     rcon_port: int
     rcon_password: str
     uuid: UUID4
+    node: Optional[str] = None
 
 
 class UserServerResponseSchema(ServerCreateSchema):
     port: int
 
 
-__all__ = ["ServerCreateSchema", "ServerResponseSchema", "ServerActivationSchema"]
+class ServerStateSchema(BaseModel):
+    uuid: UUID4
+    container_id: str
+    state: str
+    health: Optional[str] = None
+    ports: dict[str, int]
+
+
+class StatsAggregateSchema(BaseModel):
+    min: float
+    avg: float
+    max: float
+    p95: float
+
+
+class StatsWindowSchema(BaseModel):
+    cpu_percent: Optional[StatsAggregateSchema] = None
+    memory_bytes: Optional[StatsAggregateSchema] = None
+    net_rx_bps: Optional[StatsAggregateSchema] = None
+    net_tx_bps: Optional[StatsAggregateSchema] = None
+    block_read_bps: Optional[StatsAggregateSchema] = None
+    block_write_bps: Optional[StatsAggregateSchema] = None
+
+
+class ServerStatsSchema(BaseModel):
+    uuid: UUID4
+    windows: dict[str, StatsWindowSchema]
+
+
+class StatsMetric(str, Enum):
+    cpu_percent = "cpu_percent"
+    memory_bytes = "memory_bytes"
+    net_rx_bps = "net_rx_bps"
+    net_tx_bps = "net_tx_bps"
+    block_read_bps = "block_read_bps"
+    block_write_bps = "block_write_bps"
+
+
+class StatsWindow(str, Enum):
+    one = "1m"
+    five = "5m"
+    fifteen = "15m"
+
+
+class ServerLoadSchema(BaseModel):
+    uuid: UUID4
+    avg: float
+
+
+class ServerLogsSchema(BaseModel):
+    uuid: UUID4
+    lines: list[str]
+
+
+class ServerCacheStatsSchema(BaseModel):
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+
+
+class ServerPingSchema(BaseModel):
+    uuid: UUID4
+    port: int
+    online: bool
+    latency_ms: Optional[float] = None
+    motd: Optional[str] = None
+    version: Optional[str] = None
+    protocol: Optional[int] = None
+    players_online: Optional[int] = None
+    players_max: Optional[int] = None
+    error: Optional[str] = None
+
+
+class WaitMode(str, Enum):
+    ready = "ready"
+
+
+class ServerReadySchema(BaseModel):
+    uuid: UUID4
+    started_at: datetime
+    ready_at: datetime
+    time_to_ready: float
+    source: str
+
+
+class ServerOrder(str, Enum):
+    id = "id"
+    created_at = "created_at"
+
+
+class ServerListSchema(BaseModel):
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None
+    order_by: ServerOrder = ServerOrder.id
+    version: Optional[str] = None
+    port_min: Optional[int] = None
+    port_max: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    stream: bool = Field(
+        False, description="Stream every matching server as NDJSON, ignoring limit"
+    )
+
+    def filters(self) -> dict:
+        return self.model_dump(
+            include={
+                "version",
+                "port_min",
+                "port_max",
+                "created_after",
+                "created_before",
+            }
+        )
+
+
+class BulkAction(str, Enum):
+    start = "start"
+    stop = "stop"
+    restart = "restart"
+
+
+class BulkFilterSchema(BaseModel):
+    version: Optional[str] = None
+    state: Optional[str] = None
+
+
+class BulkActionSchema(BaseModel):
+    uuids: Optional[list[UUID4]] = None
+    filter: Optional[BulkFilterSchema] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.uuids is None and self.filter is None:
+            raise ValueError("Either uuids or filter must be given")
+        return self
+
+
+class BulkResultSchema(BaseModel):
+    uuid: UUID4
+    status: str
+    error: Optional[str] = None
+
+
+__all__ = [
+    "ResourceProfile",
+    "ServerResourcesSchema",
+    "ServerCreateSchema",
+    "ServerResponseSchema",
+    "ServerActivationSchema",
+    "ServerStateSchema",
+    "ServerCacheStatsSchema",
+    "ServerLogsSchema",
+    "StatsAggregateSchema",
+    "StatsWindowSchema",
+    "ServerStatsSchema",
+    "StatsMetric",
+    "StatsWindow",
+    "ServerLoadSchema",
+    "ServerPingSchema",
+    "ServerReadySchema",
+    "WaitMode",
+    "ServerOrder",
+    "ServerListSchema",
+    "BulkAction",
+    "BulkFilterSchema",
+    "BulkActionSchema",
+    "BulkResultSchema",
+]
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import UUID4, BaseModel, Field
+
+
+class TemplateCreateSchema(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+    server_uuid: UUID4
+
+
+class TemplateSchema(BaseModel):
+    name: str
+    created_at: datetime
+    version: Optional[str] = None
+    source: Optional[str] = None
+
+
+__all__ = ["TemplateCreateSchema", "TemplateSchema"]
@@ -1,15 +1,73 @@
+from .BackupSchema import BackupSchema
 from .CommandSchema import CommandChoices, CommandURLChoice, ServerPropertiesPatch
+from .FileSchema import ArchiveFormat, FileEntrySchema, FileListSchema, FileType
+from .ImageSchema import ImagePullSchema, ImageStatusSchema
+from .JobSchema import JobAcceptedSchema, JobResponseSchema
+from .NodeSchema import NodeSchema
 from .ServerSchema import (
+    BulkAction,
+    BulkActionSchema,
+    BulkFilterSchema,
+    BulkResultSchema,
+    ResourceProfile,
     ServerActivationSchema,
+    ServerCacheStatsSchema,
     ServerCreateSchema,
+    ServerListSchema,
+    ServerLoadSchema,
+    ServerLogsSchema,
+    ServerOrder,
+    ServerPingSchema,
+    ServerReadySchema,
+    ServerResourcesSchema,
     ServerResponseSchema,
+    ServerStateSchema,
+    ServerStatsSchema,
+    StatsAggregateSchema,
+    StatsMetric,
+    StatsWindow,
+    StatsWindowSchema,
+    WaitMode,
 )
+from .TemplateSchema import TemplateCreateSchema, TemplateSchema
 
 __all__ = [
+    "ResourceProfile",
+    "ServerResourcesSchema",
     "ServerCreateSchema",
     "ServerResponseSchema",
     "ServerActivationSchema",
+    "ServerStateSchema",
+    "ServerCacheStatsSchema",
+    "ServerLogsSchema",
+    "StatsAggregateSchema",
+    "StatsWindowSchema",
+    "ServerStatsSchema",
+    "StatsMetric",
+    "StatsWindow",
+    "ServerLoadSchema",
+    "ServerPingSchema",
+    "ServerReadySchema",
+    "WaitMode",
+    "ServerOrder",
+    "ServerListSchema",
+    "BulkAction",
+    "BulkFilterSchema",
+    "BulkActionSchema",
+    "BulkResultSchema",
     "CommandURLChoice",
     "CommandChoices",
     "ServerPropertiesPatch",
+    "ImageStatusSchema",
+    "ImagePullSchema",
+    "JobResponseSchema",
+    "JobAcceptedSchema",
+    "NodeSchema",
+    "BackupSchema",
+    "FileType",
+    "ArchiveFormat",
+    "FileEntrySchema",
+    "FileListSchema",
+    "TemplateCreateSchema",
+    "TemplateSchema",
 ]
@@ -0,0 +1,460 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid as uuid_lib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from stat import S_ISREG
+from typing import TYPE_CHECKING, Callable
+
+from fastapi import Request
+
+from src.configuration import getSettings
+from src.exceptions import BackupError, BackupNotFoundError, RconError
+from src.metrics import FILE_OPERATION_SECONDS, timed
+from src.server.rcon import RconPool, saving_paused
+from src.utils import clone_file, ensure_server_dir, properties_store, trash
+from src.utils.trash import lower_io_priority
+
+if TYPE_CHECKING:
+    from src.server.manager import BulkRunner
+
+log = logging.getLogger(__name__)
+
+# Fixed-size chunks line up with the 4 KiB sectors of region files, so a
+# region that changed in a few places stores only those chunks again.
+CHUNK_SIZE = 2**20
+COMPRESSION_LEVEL = 3
+
+# Top-level entries not worth restoring.
+EXCLUDED = {"logs", "crash-reports", ".hibernated"}
+
+BACKUP_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{6}$")
+
+
+async def getBackups(request: Request) -> "BackupManager":
+    return request.app.state.backups
+
+
+def new_backup_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid_lib.uuid4().hex[:6]}"
+
+
+@dataclass
+class Backup:
+    id: str
+    server: str
+    created_at: float
+    status: str = "completed"
+    files: int = 0
+    size: int = 0
+    stored: int = 0
+    error: str | None = None
+
+
+class BackupManager:
+    def __init__(
+        self,
+        root: Path | None = None,
+        servers_root: Path | None = None,
+        concurrency: int | None = None,
+        workers: int | None = None,
+        keep_last: int | None = None,
+        keep_daily: int | None = None,
+        save_timeout: float | None = None,
+    ):
+        settings = getSettings()
+        servers_root = servers_root or Path(settings.SERVERS_DIR).resolve()
+        self.root = root or Path(settings.BACKUP_DIR or servers_root / ".backups")
+        self.chunks = self.root / "chunks"
+        self.manifests = self.root / "servers"
+        # Next to the server directories, so a snapshot can be a reflink.
+        self.snapshots = servers_root / ".snapshots"
+        self.workers = max(workers or settings.BACKUP_WORKERS, 1)
+        self.keep_last = max(keep_last or settings.BACKUP_KEEP_LAST, 1)
+        self.keep_daily = (
+            settings.BACKUP_KEEP_DAILY if keep_daily is None else keep_daily
+        )
+        self.save_timeout = save_timeout or settings.BACKUP_SAVE_TIMEOUT
+        # Per host: the disk is what a backup saturates.
+        self._limit = asyncio.Semaphore(
+            max(concurrency or settings.BACKUP_CONCURRENCY, 1)
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        # In progress or failed since start; completed ones live on disk.
+        self._active: dict[tuple[str, str], Backup] = {}
+        self._tasks: dict[tuple[str, str], asyncio.Task] = {}
+        self._startup_gc: asyncio.Task | None = None
+        # Chunk collection must not race a backup that reuses chunks of the
+        # previous manifest or writes new ones before its own is on disk.
+        self._gc_lock = asyncio.Lock()
+        self._archiving = 0
+        self._gc_pending = True
+
+    async def start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="backup",
+            initializer=lower_io_priority,
+        )
+        # Whatever is left was interrupted by a crash or shutdown.
+        await self._run(shutil.rmtree, self.snapshots, True)
+        # Reads every manifest and chunk; the API does not wait for it.
+        self._startup_gc = asyncio.create_task(self._collect())
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        if self._startup_gc is not None:
+            tasks.append(self._startup_gc)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self, func: Callable, *args) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _chunk(self, digest: str) -> Path:
+        return self.chunks / digest[:2] / digest
+
+    def _manifest(self, server: str, backup_id: str) -> Path:
+        if not BACKUP_ID.match(backup_id):
+            raise BackupNotFoundError(f"Backup '{backup_id}' not found")
+        return self.manifests / server / f"{backup_id}.json"
+
+    def _read(self, server: str, backup_id: str) -> dict:
+        try:
+            return json.loads(self._manifest(server, backup_id).read_text())
+        except FileNotFoundError:
+            raise BackupNotFoundError(f"Backup '{backup_id}' not found") from None
+
+    def _list(self, server: str) -> list[dict]:
+        manifests = []
+        for path in (self.manifests / server).glob("*.json"):
+            try:
+                manifests.append(json.loads(path.read_text()))
+            except (OSError, ValueError) as e:
+                log.warning(f"Skipping unreadable backup manifest {path}: {e}")
+        # Ids only have second resolution, newest first by creation time.
+        return sorted(manifests, key=lambda m: (m["created_at"], m["id"]), reverse=True)
+
+    @staticmethod
+    def _summary(manifest: dict) -> Backup:
+        return Backup(**{k: v for k, v in manifest.items() if k != "entries"})
+
+    async def list_backups(self, server: str) -> list[Backup]:
+        stored = [self._summary(m) for m in await asyncio.to_thread(self._list, server)]
+        active = [b for (s, _), b in self._active.items() if s == server]
+        return sorted(active + stored, key=lambda b: (b.created_at, b.id), reverse=True)
+
+    async def get(self, server: str, backup_id: str) -> Backup:
+        backup = self._active.get((server, backup_id))
+        if backup is not None:
+            return backup
+        return self._summary(await asyncio.to_thread(self._read, server, backup_id))
+
+    def schedule(
+        self,
+        server: str,
+        get_rcon: Callable[[], RconPool | None],
+        runner: "BulkRunner | None" = None,
+    ) -> Backup:
+        backup = Backup(
+            id=new_backup_id(), server=server, created_at=time.time(), status="pending"
+        )
+        key = (server, backup.id)
+        self._active[key] = backup
+        task = self._tasks[key] = asyncio.create_task(
+            self._create(backup, get_rcon, runner)
+        )
+        task.add_done_callback(lambda t: self._tasks.pop(key, None))
+        # Failures are reported through the backup's status.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return backup
+
+    async def create(
+        self,
+        server: str,
+        get_rcon: Callable[[], RconPool | None],
+        runner: "BulkRunner | None" = None,
+    ) -> Backup:
+        backup = self.schedule(server, get_rcon, runner)
+        # The client going away does not abort the backup.
+        return await asyncio.shield(self._tasks[(server, backup.id)])
+
+    async def _create(
+        self,
+        backup: Backup,
+        get_rcon: Callable[[], RconPool | None],
+        runner: "BulkRunner | None",
+    ) -> Backup:
+        key = (backup.server, backup.id)
+        snapshot = self.snapshots / f"{backup.server}-{backup.id}"
+        try:
+            # Waiting here keeps the job queue's workers free.
+            async with self._limit, self._holding_chunks():
+                backup.status = "running"
+                previous = await self._run(self._previous, backup.server)
+
+                async def take() -> list[dict]:
+                    # Whether the server runs is only known once it is our turn.
+                    return await self._snapshot(
+                        backup.server, snapshot, previous, get_rcon()
+                    )
+
+                # Ordered with the server's start, stop and restore calls.
+                entries = (
+                    await take()
+                    if runner is None
+                    else await runner("backup", backup.server, take)
+                )
+                await self._archive(backup, snapshot, entries)
+        except Exception as e:
+            backup.status = "failed"
+            backup.error = str(e) or type(e).__name__
+            # Chunks it already wrote belong to no manifest.
+            self._gc_pending = True
+            log.error(f"Backup {backup.id} of server '{backup.server}' failed: {e!r}")
+            raise
+        finally:
+            await self._run(shutil.rmtree, snapshot, True)
+
+        del self._active[key]
+        if await self._run(self._apply_retention, backup.server):
+            self._gc_pending = True
+        await self._collect()
+        return backup
+
+    @asynccontextmanager
+    async def _holding_chunks(self):
+        # Taken under the lock, so a collection already running finishes
+        # before the previous manifest is read.
+        async with self._gc_lock:
+            self._archiving += 1
+        try:
+            yield
+        finally:
+            self._archiving -= 1
+
+    def _previous(self, server: str) -> dict[str, dict]:
+        manifests = self._list(server)
+        if not manifests:
+            return {}
+        return {entry["path"]: entry for entry in manifests[0]["entries"]}
+
+    @timed(FILE_OPERATION_SECONDS, operation="backup_snapshot")
+    async def _snapshot(
+        self,
+        server: str,
+        snapshot: Path,
+        previous: dict[str, dict],
+        rcon: RconPool | None,
+    ) -> list[dict]:
+        source = await ensure_server_dir(server)
+        try:
+            async with saving_paused(rcon, self.save_timeout):
+                return await self._run(self._copy_changed, source, snapshot, previous)
+        except RconError as e:
+            raise BackupError(f"Cannot pause saving on '{server}': {e}") from e
+
+    def _copy_changed(
+        self, source: Path, snapshot: Path, previous: dict[str, dict]
+    ) -> list[dict]:
+        # Saving is off for as long as this runs, so only files that differ
+        # from the last backup are copied; the rest reuse its chunks.
+        entries = []
+        for root, dirs, files in os.walk(source):
+            if Path(root) == source:
+                dirs[:] = [d for d in dirs if d not in EXCLUDED]
+                files = [f for f in files if f not in EXCLUDED]
+            for name in files:
+                path = Path(root, name)
+                stat = path.lstat()
+                if not S_ISREG(stat.st_mode):
+                    continue
+                relpath = path.relative_to(source).as_posix()
+                entry = {
+                    "path": relpath,
+                    "size": stat.st_size,
+                    "mode": stat.st_mode & 0o7777,
+                    "mtime_ns": stat.st_mtime_ns,
+                }
+                known = previous.get(relpath)
+                if known is not None and (known["size"], known["mtime_ns"]) == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    entry["chunks"] = known["chunks"]
+                else:
+                    target = snapshot / relpath
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    clone_file(path, target)
+                entries.append(entry)
+        return entries
+
+    @timed(FILE_OPERATION_SECONDS, operation="backup_archive")
+    async def _archive(self, backup: Backup, snapshot: Path, entries: list[dict]):
+        changed = [entry for entry in entries if "chunks" not in entry]
+        results = await asyncio.gather(
+            *(self._run(self._store_file, snapshot / e["path"]) for e in changed)
+        )
+        for entry, (chunks, stored) in zip(changed, results):
+            entry["chunks"] = chunks
+            backup.stored += stored
+
+        backup.files = len(entries)
+        backup.size = sum(entry["size"] for entry in entries)
+        backup.status = "completed"
+        await self._run(self._write_manifest, backup, entries)
+        log.info(
+            f"Backup {backup.id} of server '{backup.server}': {backup.files} files, "
+            f"{backup.size} bytes, {backup.stored} bytes new"
+        )
+
+    def _store_file(self, path: Path) -> tuple[list[str], int]:
+        chunks = []
+        stored = 0
+        with path.open("rb") as f:
+            while data := f.read(CHUNK_SIZE):
+                digest = hashlib.sha256(data).hexdigest()
+                chunks.append(digest)
+                target = self._chunk(digest)
+                if target.exists():
+                    continue
+                packed = zlib.compress(data, COMPRESSION_LEVEL)
+                body = b"z" + packed if len(packed) < len(data) else b"r" + data
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{digest}.{uuid_lib.uuid4().hex}")
+                tmp.write_bytes(body)
+                os.replace(tmp, target)
+                stored += len(body)
+        return chunks, stored
+
+    def _write_manifest(self, backup: Backup, entries: list[dict]) -> None:
+        path = self._manifest(backup.server, backup.id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps({**asdict(backup), "entries": entries}))
+        os.replace(tmp, path)
+
+    def _read_chunk(self, digest: str) -> bytes:
+        body = self._chunk(digest).read_bytes()
+        data = zlib.decompress(body[1:]) if body[:1] == b"z" else body[1:]
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"Chunk {digest} is corrupt")
+        return data
+
+    @timed(FILE_OPERATION_SECONDS, operation="backup_restore")
+    async def restore(self, server: str, backup_id: str) -> None:
+        # The caller makes sure the server is stopped.
+        manifest = await asyncio.to_thread(self._read, server, backup_id)
+        entries = manifest["entries"]
+        missing = await self._run(self._missing_chunks, entries)
+        if missing:
+            raise BackupError(f"Backup '{backup_id}' is missing {missing} chunks")
+
+        staging = self.snapshots / f".restore-{server}-{uuid_lib.uuid4().hex}"
+        try:
+            await self._run(staging.mkdir, 0o755, True, True)
+            await asyncio.gather(
+                *(self._run(self._restore_file, staging, entry) for entry in entries)
+            )
+            server_path = await ensure_server_dir(server)
+            # Swapped by rename; the old directory goes the way of deleted ones.
+            trash.move_to_trash(server_path)
+            os.rename(staging, server_path)
+        finally:
+            await self._run(shutil.rmtree, staging, True)
+        properties_store.forget(server)
+        log.info(f"Server '{server}' restored from backup {backup_id}")
+
+    def _missing_chunks(self, entries: list[dict]) -> int:
+        digests = {digest for entry in entries for digest in entry["chunks"]}
+        return sum(not self._chunk(digest).exists() for digest in digests)
+
+    def _restore_file(self, staging: Path, entry: dict) -> None:
+        relpath = Path(entry["path"])
+        if relpath.is_absolute() or ".." in relpath.parts:
+            raise BackupError(f"Refusing to restore {entry['path']}")
+        path = staging / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            for digest in entry["chunks"]:
+                f.write(self._read_chunk(digest))
+        os.chmod(path, entry["mode"])
+        os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    async def delete(self, server: str, backup_id: str) -> None:
+        path = self._manifest(server, backup_id)
+        try:
+            await asyncio.to_thread(path.unlink)
+        except FileNotFoundError:
+            raise BackupNotFoundError(f"Backup '{backup_id}' not found") from None
+        self._gc_pending = True
+        await self._collect()
+
+    def _apply_retention(self, server: str) -> int:
+        # The newest keep_last, plus the newest of each of the last
+        # keep_daily days.
+        backups = [m["id"] for m in self._list(server) if m["status"] == "completed"]
+        keep = set(backups[: self.keep_last])
+        days: list[str] = []
+        for backup_id in backups:
+            day = backup_id[:8]
+            if day not in days:
+                days.append(day)
+                if len(days) <= self.keep_daily:
+                    keep.add(backup_id)
+
+        removed = 0
+        for backup_id in backups:
+            if backup_id not in keep:
+                self._manifest(server, backup_id).unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            log.info(f"Retention removed {removed} backups of server '{server}'")
+        return removed
+
+    async def _collect(self) -> None:
+        async with self._gc_lock:
+            if not self._gc_pending or self._archiving:
+                # The last archive to finish runs it instead.
+                return
+            self._gc_pending = False
+            await self._run(self._collect_garbage)
+
+    def _collect_garbage(self) -> None:
+        referenced = set()
+        for path in self.manifests.glob("*/*.json"):
+            try:
+                manifest = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Unreadable, so nothing it might reference can be dropped.
+                return
+            for entry in manifest["entries"]:
+                referenced.update(entry["chunks"])
+
+        removed = freed = 0
+        for path in self.chunks.glob("*/*"):
+            if path.name in referenced or path.name.startswith("."):
+                continue
+            freed += path.stat().st_size
+            path.unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            log.info(f"Removed {removed} unused backup chunks, {freed} bytes")
+
+
+__all__ = ["Backup", "BackupManager", "getBackups"]
@@ -1,10 +1,54 @@
-import asyncio
-import concurrent.futures
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 
 from fastapi import HTTPException
-from mcrcon import MCRcon
 
+from src.configuration import getSettings
+from src.metrics import RCON_COMMAND_SECONDS
 from src.schemas.pydantic import CommandURLChoice
+from src.server.rcon import rcon_pools
+
+# Requests longer than this are dropped by the Minecraft RCON listener.
+MAX_COMMAND_LENGTH = 1446
+
+
+@lru_cache
+def metric_commands() -> frozenset[str]:
+    # Verbs reported individually in metrics; anything else is "other".
+    return frozenset(choice.value for choice in CommandURLChoice) | frozenset(
+        getSettings().CONSOLE_DEFAULT_COMMANDS
+    )
+
+
+@dataclass(frozen=True)
+class ConsolePolicy:
+    allowed: frozenset[str]
+
+    @classmethod
+    def for_token(cls, token: str | None) -> "ConsolePolicy | None":
+        settings = getSettings()
+        if token is None:
+            return cls(frozenset(settings.CONSOLE_DEFAULT_COMMANDS))
+        allowed = settings.CONSOLE_TOKENS.get(token)
+        if allowed is None:
+            return None
+        return cls(frozenset(allowed))
+
+    def check(self, command: str) -> str | None:
+        if not command.strip():
+            return "Empty command"
+        if "\n" in command or "\r" in command:
+            return "Command must be a single line"
+        if len(command.encode()) > MAX_COMMAND_LENGTH:
+            return "Command is too long"
+        parts = command.strip().lstrip("/").split(maxsplit=1)
+        if not parts:
+            return "Empty command"
+        verb = parts[0].lower()
+        if "*" not in self.allowed and verb not in self.allowed:
+            return f"Command '{verb}' is not allowed"
+        return None
 
 
 class ConsoleManager:
@@ -12,23 +56,32 @@ class ConsoleManager:
         self.rcon_host = rcon_host
         self.rcon_port = rcon_port
         self.rcon_password = rcon_password
+        self.pool = rcon_pools.get(rcon_host, rcon_port, rcon_password)
 
-    def sync_rcon(self, command: str) -> str:
-        with MCRcon(
-            host=self.rcon_host, password=self.rcon_password, port=self.rcon_port
-        ) as mcr:
-            return mcr.command(command)
+    @staticmethod
+    def metric_label(command: str) -> str:
+        verb = command.lstrip("/").partition(" ")[0].lower()
+        return verb if verb in metric_commands() else "other"
 
     async def send_rcon_command(self, command: str) -> str:
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ProcessPoolExecutor() as executor:
-            return await loop.run_in_executor(executor, self.sync_rcon, command)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self.pool.command(command)
+            outcome = "ok"
+            return response
+        finally:
+            RCON_COMMAND_SECONDS.observe(
+                time.perf_counter() - started,
+                command=self.metric_label(command),
+                outcome=outcome,
+            )
 
-    async def execute_command(self, command: CommandURLChoice, query: str):
+    async def execute_command(self, command: CommandURLChoice, query: str) -> str:
         try:
-            await self.send_rcon_command(f"{command.value} {query}")
+            return await self.send_rcon_command(f"{command.value} {query}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
 
-__all__ = ["ConsoleManager"]
+__all__ = ["ConsoleManager", "ConsolePolicy"]
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import os
+import stat as stat_lib
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, Iterator
+
+from fastapi import Request
+
+from src.configuration import getSettings
+from src.exceptions import (
+    ServerFileExistsError,
+    ServerFileNotFoundError,
+    ServerPathError,
+    UploadTooLargeError,
+)
+from src.metrics import FILE_OPERATION_SECONDS, timed
+from src.utils.trash import lower_io_priority
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2**20
+# Archive chunks produced ahead of a slow client.
+ARCHIVE_QUEUE_SIZE = 8
+ARCHIVE_FORMATS = ("tar", "zip")
+
+
+async def getFiles(request: Request) -> "FileManager":
+    return request.app.state.files
+
+
+@dataclass
+class FileEntry:
+    name: str
+    path: str
+    type: str
+    size: int
+    modified: float
+
+
+def file_type(mode: int) -> str:
+    if stat_lib.S_ISDIR(mode):
+        return "directory"
+    if stat_lib.S_ISREG(mode):
+        return "file"
+    if stat_lib.S_ISLNK(mode):
+        return "symlink"
+    return "other"
+
+
+class ArchiveCancelled(Exception):
+    pass
+
+
+class ChunkWriter:
+    # Unseekable on purpose: zipfile then writes data descriptors instead of
+    # seeking back to patch headers, tarfile is opened in stream mode.
+    def __init__(self, put: Callable[[bytes], None]):
+        self._put = put
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+def walk(root: Path) -> Iterator[tuple[Path, str]]:
+    # Symlinks are never followed: one could point out of the server
+    # directory.
+    yield root, root.name
+    for dirpath, dirnames, filenames in os.walk(root):
+        current = Path(dirpath)
+        dirnames[:] = sorted(d for d in dirnames if not (current / d).is_symlink())
+        files = sorted(f for f in filenames if not (current / f).is_symlink())
+        for name in dirnames + files:
+            path = current / name
+            yield path, f"{root.name}/{path.relative_to(root).as_posix()}"
+
+
+def write_archive(root: Path, fmt: str, out: ChunkWriter) -> None:
+    if fmt == "zip":
+        # Region files are compressed already; level 1 keeps the CPU cost low.
+        archive = zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        add = archive.write
+    else:
+        archive = tarfile.open(fileobj=out, mode="w|", format=tarfile.PAX_FORMAT)
+
+        def add(path: Path, arcname: str) -> None:
+            archive.add(path, arcname, recursive=False)
+
+    with archive:
+        for path, arcname in walk(root):
+            try:
+                add(path, arcname)
+            except FileNotFoundError:
+                # Gone since the walk listed it, like a rotated log.
+                continue
+    out.close()
+
+
+class FileManager:
+    def __init__(
+        self,
+        root: Path | None = None,
+        upload_max_bytes: int | None = None,
+        archive_workers: int | None = None,
+    ):
+        settings = getSettings()
+        self.root = root or Path(settings.SERVERS_DIR).resolve()
+        self.upload_max_bytes = upload_max_bytes or settings.FILE_UPLOAD_MAX_BYTES
+        self.archive_workers = max(archive_workers or settings.FILE_ARCHIVE_WORKERS, 1)
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.archive_workers,
+            thread_name_prefix="archive",
+            initializer=lower_io_priority,
+        )
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _server_path(self, server: str) -> Path:
+        server_path = (self.root / server).resolve()
+        if not server_path.is_dir():
+            raise ServerFileNotFoundError(f"Directory of server '{server}' not found")
+        return server_path
+
+    def resolve(self, server: str, relpath: str = "") -> Path:
+        if "\0" in relpath:
+            raise ServerPathError("Path contains a NUL byte")
+        server_path = self._server_path(server)
+        # Resolved before the check, so a symlink out of the directory is
+        # refused like "..".
+        path = (server_path / relpath.lstrip("/")).resolve()
+        if not path.is_relative_to(server_path):
+            raise ServerPathError(f"Path '{relpath}' is outside the server directory")
+        return path
+
+    def _entry(self, server_path: Path, path: Path, stat: os.stat_result) -> FileEntry:
+        return FileEntry(
+            name=path.name,
+            path=path.relative_to(server_path).as_posix(),
+            type=file_type(stat.st_mode),
+            size=stat.st_size,
+            modified=stat.st_mtime,
+        )
+
+    @timed(FILE_OPERATION_SECONDS, operation="files_list")
+    async def list_directory(self, server: str, relpath: str) -> list[FileEntry]:
+        return await asyncio.to_thread(self._list_directory, server, relpath)
+
+    def _list_directory(self, server: str, relpath: str) -> list[FileEntry]:
+        server_path = self._server_path(server)
+        path = self.resolve(server, relpath)
+        try:
+            scanner = os.scandir(path)
+        except FileNotFoundError:
+            raise ServerFileNotFoundError(f"'{relpath}' not found") from None
+        except NotADirectoryError:
+            raise ServerPathError(f"'{relpath}' is not a directory") from None
+
+        entries = []
+        with scanner:
+            for item in scanner:
+                try:
+                    stat = item.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                entries.append(self._entry(server_path, Path(item.path), stat))
+        entries.sort(key=lambda e: (e.type != "directory", e.name))
+        return entries
+
+    async def stat(self, server: str, relpath: str) -> tuple[Path, os.stat_result]:
+        return await asyncio.to_thread(self._stat, server, relpath)
+
+    def _stat(self, server: str, relpath: str) -> tuple[Path, os.stat_result]:
+        path = self.resolve(server, relpath)
+        try:
+            return path, path.stat()
+        except FileNotFoundError:
+            raise ServerFileNotFoundError(f"'{relpath}' not found") from None
+
+    @timed(FILE_OPERATION_SECONDS, operation="files_upload")
+    async def upload(
+        self,
+        server: str,
+        relpath: str,
+        chunks: AsyncIterable[bytes],
+        overwrite: bool = True,
+    ) -> FileEntry:
+        target = await asyncio.to_thread(self._upload_target, server, relpath)
+        if not overwrite and await asyncio.to_thread(target.exists):
+            raise ServerFileExistsError(f"'{relpath}' already exists")
+
+        # Next to the target, so the final rename is atomic and a running
+        # server never reads a half-written file.
+        fd, tmp = tempfile.mkstemp(
+            dir=target.parent, prefix=f".{target.name}.", suffix=".part"
+        )
+        tmp_path = Path(tmp)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                size = 0
+                buffer = bytearray()
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.upload_max_bytes:
+                        raise UploadTooLargeError(
+                            f"Upload exceeds {self.upload_max_bytes} bytes"
+                        )
+                    buffer += chunk
+                    if len(buffer) >= CHUNK_SIZE:
+                        data, buffer = buffer, bytearray()
+                        await asyncio.to_thread(f.write, data)
+                await asyncio.to_thread(self._finish_upload, f, buffer, target)
+            return await asyncio.to_thread(
+                self._commit_upload, server, tmp_path, target, overwrite
+            )
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _upload_target(self, server: str, relpath: str) -> Path:
+        server_path = self._server_path(server)
+        target = self.resolve(server, relpath)
+        if target == server_path or target.is_dir():
+            raise ServerPathError(f"'{relpath}' is a directory")
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        except (FileExistsError, NotADirectoryError):
+            raise ServerPathError(f"A parent of '{relpath}' is a file") from None
+        return target
+
+    @staticmethod
+    def _finish_upload(f, rest: bytearray, target: Path) -> None:
+        f.write(rest)
+        f.flush()
+        # The server inside the container must keep being able to read and
+        # replace it.
+        try:
+            current = target.stat()
+            mode = current.st_mode & 0o777
+        except FileNotFoundError:
+            current = target.parent.stat()
+            mode = 0o644
+        os.fchmod(f.fileno(), mode)
+        try:
+            os.fchown(f.fileno(), current.st_uid, current.st_gid)
+        except PermissionError:
+            pass
+        os.fsync(f.fileno())
+
+    def _commit_upload(
+        self, server: str, tmp: Path, target: Path, overwrite: bool
+    ) -> FileEntry:
+        if overwrite:
+            os.replace(tmp, target)
+        else:
+            try:
+                # Fails instead of replacing a file created during the upload.
+                os.link(tmp, target)
+            except FileExistsError:
+                raise ServerFileExistsError(f"'{target.name}' already exists") from None
+        return self._entry(self._server_path(server), target, target.stat())
+
+    async def archive(self, path: Path, fmt: str) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(
+            ARCHIVE_QUEUE_SIZE
+        )
+        cancelled = threading.Event()
+
+        def put(item: bytes | Exception | None) -> None:
+            if cancelled.is_set():
+                raise ArchiveCancelled()
+            future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=1)
+                except FutureTimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        raise ArchiveCancelled() from None
+
+        def produce() -> None:
+            try:
+                try:
+                    write_archive(path, fmt, ChunkWriter(put))
+                except ArchiveCancelled:
+                    raise
+                except Exception as e:
+                    put(e)
+                else:
+                    put(None)
+            except (ArchiveCancelled, RuntimeError):
+                # The client is gone, or the loop with it.
+                pass
+
+        # Waits for a free worker when all of them are archiving.
+        loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await chunks.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    log.error(f"Cannot archive {path}: {item}")
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            # Unblocks a put in flight; the next one sees the flag.
+            while not chunks.empty():
+                chunks.get_nowait()
+
+
+__all__ = [
+    "ARCHIVE_FORMATS",
+    "CHUNK_SIZE",
+    "FileEntry",
+    "FileManager",
+    "getFiles",
+]
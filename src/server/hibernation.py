@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from src.configuration import getSettings
+from src.server.status import (
+    PACKET_PING,
+    PACKET_STATUS,
+    StatusProber,
+    decode_string,
+    decode_varint,
+    encode_packet,
+    encode_string,
+    get_status_prober,
+    read_packet,
+)
+from src.utils import clear_hibernated, list_hibernated, mark_hibernated
+
+if TYPE_CHECKING:
+    from src.server.manager import BulkRunner, ServerManager
+
+log = logging.getLogger(__name__)
+
+GAME_PORT = "25565/tcp"
+
+NEXT_STATE_LOGIN = 2
+PACKET_LOGIN_DISCONNECT = 0x00
+
+# A client that has not finished its handshake by then is dropped.
+CLIENT_TIMEOUT = 10.0
+
+# Docker may hold on to the port for a moment after the container stops.
+BIND_ATTEMPTS = 10
+BIND_RETRY_DELAY = 0.5
+
+SLEEPING_MOTD = "Server is sleeping, join to wake it up"
+WAKING_MESSAGE = "Server is starting, reconnect in a minute"
+
+
+def sleeping_status(protocol: int) -> bytes:
+    # Echoing the client's protocol keeps it from showing "outdated server".
+    status = {
+        "version": {"name": "Sleeping", "protocol": protocol},
+        "players": {"max": 0, "online": 0},
+        "description": {"text": SLEEPING_MOTD},
+    }
+    return encode_packet(PACKET_STATUS, encode_string(json.dumps(status)))
+
+
+# Holds a hibernated server's game port: answers the server list with a
+# sleeping MOTD and wakes the server on the first login attempt.
+class SleepingServer:
+    def __init__(
+        self,
+        uuid: str,
+        port: int,
+        node: str | None,
+        on_login: Callable[[str], None],
+    ):
+        self.uuid = uuid
+        self.port = port
+        self.node = node
+        self.on_login = on_login
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self, host: str) -> None:
+        self._server = await asyncio.start_server(self._handle, host, self.port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            async with asyncio.timeout(CLIENT_TIMEOUT):
+                packet_id, payload = await read_packet(reader)
+                if packet_id != 0x00:
+                    return
+                protocol, offset = decode_varint(payload)
+                _, offset = decode_string(payload, offset)
+                next_state, _ = decode_varint(payload, offset + 2)
+
+                if next_state == NEXT_STATE_LOGIN:
+                    writer.write(
+                        encode_packet(
+                            PACKET_LOGIN_DISCONNECT,
+                            encode_string(json.dumps({"text": WAKING_MESSAGE})),
+                        )
+                    )
+                    await writer.drain()
+                    self.on_login(self.uuid)
+                    return
+
+                packet_id, _ = await read_packet(reader)
+                if packet_id != PACKET_STATUS:
+                    return
+                writer.write(sleeping_status(protocol))
+                await writer.drain()
+                packet_id, payload = await read_packet(reader)
+                if packet_id == PACKET_PING:
+                    writer.write(encode_packet(PACKET_PING, payload))
+                    await writer.drain()
+        except (TimeoutError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            log.debug(f"Sleeping server '{self.uuid}' dropped a client: {e!r}")
+        except IndexError:
+            pass
+        finally:
+            writer.close()
+
+
+class Hibernator:
+    def __init__(
+        self,
+        manager: "ServerManager",
+        idle_after: float | None = None,
+        interval: float | None = None,
+        host: str | None = None,
+        prober: StatusProber | None = None,
+    ):
+        settings = getSettings()
+        self.manager = manager
+        self.idle_after = settings.HIBERNATE_AFTER if idle_after is None else idle_after
+        self.interval = interval or settings.HIBERNATE_CHECK_INTERVAL
+        self.host = host or settings.HIBERNATE_BIND_HOST
+        self.prober = prober or get_status_prober()
+        self.runner: "BulkRunner | None" = None
+        self.sleeping: dict[str, SleepingServer] = {}
+        self._idle_since: dict[str, float] = {}
+        self._waking: dict[str, asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self, runner: "BulkRunner | None" = None) -> None:
+        self.runner = runner
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        tasks = [t for t in (self._task, *self._waking.values()) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        # Markers stay on disk, the listeners come back with the next start.
+        for sleeper in self.sleeping.values():
+            await sleeper.close()
+        self.sleeping.clear()
+
+    def _call(self, action: str, uuid: str, func: Callable[[], Awaitable[None]]):
+        # Through the runner, hibernation is ordered with the API's own calls.
+        if self.runner is None:
+            return func()
+        return self.runner(action, uuid, func)
+
+    async def _run(self) -> None:
+        await self.manager.index.ready.wait()
+        await self._restore()
+        if self.idle_after <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                log.error(f"Idle check failed: {e!r}")
+
+    async def _restore(self) -> None:
+        for uuid, port in (await asyncio.to_thread(list_hibernated)).items():
+            entry = self.manager.get_state(uuid)
+            if entry is None or entry.state == "running":
+                await asyncio.to_thread(clear_hibernated, uuid)
+                continue
+            try:
+                await self._listen(uuid, port, self.manager.index.node_of(uuid))
+            except OSError as e:
+                log.error(f"Cannot listen for hibernated server '{uuid}': {e}")
+
+    async def check(self) -> None:
+        # The sleeping listener binds here, so only servers on a local daemon
+        # can hibernate.
+        running = {
+            entry.uuid: (entry.ports[GAME_PORT], node.host, node.name)
+            for node in self.manager.nodes.all()
+            if node.local
+            for entry in node.index.all()
+            if entry.state == "running" and GAME_PORT in entry.ports
+        }
+        for uuid in set(self._idle_since) - set(running):
+            del self._idle_since[uuid]
+
+        statuses = await self.prober.probe_many(
+            [port for port, _, _ in running.values()],
+            [host for _, host, _ in running.values()],
+        )
+        now = time.monotonic()
+        for (uuid, (port, _, node)), status in zip(running.items(), statuses):
+            # A server that does not answer is still booting or busy.
+            if not status.online or status.players_online:
+                self._idle_since.pop(uuid, None)
+                continue
+            since = self._idle_since.setdefault(uuid, now)
+            if now - since >= self.idle_after:
+                del self._idle_since[uuid]
+                try:
+                    await self.hibernate(uuid, port, node)
+                except Exception as e:
+                    log.error(f"Cannot hibernate server '{uuid}': {e}")
+
+    async def hibernate(self, uuid: str, port: int, node: str) -> None:
+        async def stop_and_listen() -> None:
+            await self.manager.stop_server(uuid, node)
+            await asyncio.to_thread(mark_hibernated, uuid, port)
+            await self._listen(uuid, port, node)
+
+        log.info(f"Server '{uuid}' idle, hibernating")
+        await self._call("stop", uuid, stop_and_listen)
+
+    async def _listen(self, uuid: str, port: int, node: str | None) -> None:
+        sleeper = SleepingServer(uuid, port, node, self._wake)
+        for attempt in range(BIND_ATTEMPTS):
+            try:
+                await sleeper.start(self.host)
+                break
+            except OSError:
+                if attempt == BIND_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(BIND_RETRY_DELAY)
+        self.sleeping[uuid] = sleeper
+
+    async def release(self, uuid: str) -> None:
+        # The container is about to take the port back, or the server is no
+        # longer to be woken.
+        sleeper = self.sleeping.pop(str(uuid), None)
+        if sleeper is not None:
+            await sleeper.close()
+        await asyncio.to_thread(clear_hibernated, str(uuid))
+
+    def _wake(self, uuid: str) -> None:
+        if uuid in self._waking:
+            return
+        log.info(f"Login attempt on hibernated server '{uuid}', waking")
+        sleeper = self.sleeping[uuid]
+        task = asyncio.create_task(self._start(uuid, sleeper.port, sleeper.node))
+        self._waking[uuid] = task
+        task.add_done_callback(lambda t: self._waking.pop(uuid, None))
+
+    async def _start(self, uuid: str, port: int, node: str | None) -> None:
+        try:
+            await self._call(
+                "start", uuid, lambda: self.manager.start_server(uuid=uuid, node=node)
+            )
+        except Exception as e:
+            log.error(f"Cannot wake server '{uuid}': {e}")
+            # Keep the port answering so the next login retries.
+            if uuid not in self.sleeping:
+                try:
+                    await asyncio.to_thread(mark_hibernated, uuid, port)
+                    await self._listen(uuid, port, node)
+                except OSError as e:
+                    log.error(f"Cannot listen for hibernated server '{uuid}': {e}")
+
+
+__all__ = ["Hibernator", "SleepingServer", "SLEEPING_MOTD"]
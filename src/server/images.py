@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from aiodocker import Docker
+from aiodocker.exceptions import DockerError
+
+from src.exceptions import ImageNotFoundError
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ImagePull:
+    image: str
+    status: str = "pulling"
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    layers: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def progress(self) -> float:
+        total = sum(size for _, size in self.layers.values())
+        if self.status == "ready":
+            return 1.0
+        if not total:
+            return 0.0
+        return sum(done for done, _ in self.layers.values()) / total
+
+    def update(self, message: dict) -> None:
+        layer = message.get("id")
+        if layer is None:
+            return
+        detail = message.get("progressDetail") or {}
+        done, size = self.layers.get(layer, (0, 0))
+        if message.get("status") == "Downloading" and detail.get("total"):
+            done, size = detail.get("current", 0), detail["total"]
+        elif message.get("status") in ("Download complete", "Pull complete"):
+            done = size
+        self.layers[layer] = (done, size)
+
+
+def split_image(image: str) -> tuple[str, str]:
+    name, _, tag = image.rpartition(":")
+    if not name or "/" in tag:
+        return image, "latest"
+    return name, tag
+
+
+class ImageManager:
+    def __init__(self, docker: Docker, prewarm: list[str], pull_timeout: float):
+        self.docker = docker
+        self.prewarm = prewarm
+        self.pull_timeout = pull_timeout
+        self.local: set[str] = set()
+        self.pulls: dict[str, ImagePull] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._prewarm_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._prewarm_task = asyncio.create_task(self._prewarm())
+
+    async def close(self) -> None:
+        tasks = [self._prewarm_task, *self._tasks.values()]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in tasks if t is not None), return_exceptions=True
+        )
+
+    async def _prewarm(self) -> None:
+        try:
+            await self.refresh()
+        except DockerError as e:
+            log.error(f"Cannot list local images: {e}")
+
+        # Failures are logged by _forget, a later create retries the pull.
+        await asyncio.gather(
+            *(self.pull(image) for image in self.prewarm if not self.is_local(image)),
+            return_exceptions=True,
+        )
+
+    async def refresh(self) -> None:
+        images = await self.docker.images.list()
+        self.local = {tag for image in images for tag in image.get("RepoTags") or []}
+
+    def is_local(self, image: str) -> bool:
+        return image in self.local
+
+    def schedule(self, image: str) -> asyncio.Task:
+        task = self._tasks.get(image)
+        if task is None:
+            task = self._tasks[image] = asyncio.create_task(self._pull(image))
+            task.add_done_callback(self._forget)
+        return task
+
+    def pull(self, image: str) -> asyncio.Future:
+        # Cancelling one waiter must not abort a pull others are waiting on.
+        return asyncio.shield(self.schedule(image))
+
+    def _forget(self, task: asyncio.Task) -> None:
+        for image, pending in list(self._tasks.items()):
+            if pending is task:
+                del self._tasks[image]
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"Image pull failed: {task.exception()}")
+
+    async def _pull(self, image: str) -> None:
+        name, tag = split_image(image)
+        pull = self.pulls[image] = ImagePull(image=image)
+        log.info(f"Pulling image {image}")
+        try:
+            async for message in self.docker.images.pull(
+                name, tag=tag, stream=True, timeout=self.pull_timeout
+            ):
+                if "error" in message:
+                    raise ImageNotFoundError(f"Cannot pull image {image}: {message}")
+                pull.update(message)
+        except (DockerError, asyncio.TimeoutError) as e:
+            pull.status, pull.error = "failed", str(e)
+            raise ImageNotFoundError(f"Cannot pull image {image}") from e
+        except ImageNotFoundError as e:
+            pull.status, pull.error = "failed", str(e)
+            raise
+        finally:
+            pull.finished_at = time.time()
+
+        pull.status = "ready"
+        self.local.add(image)
+        log.info(f"Image {image} pulled in {pull.finished_at - pull.started_at:.1f}s")
+
+
+__all__ = ["ImageManager", "ImagePull"]
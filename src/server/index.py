@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable
+
+from aiodocker import Docker
+from aiodocker.exceptions import DockerError
+
+from src.utils import MANAGED_LABEL, UUID_LABEL
+
+MANAGED_FILTER = {"label": [f"{MANAGED_LABEL}=true"]}
+
+RESYNC_DELAY = 1.0
+MAX_RESYNC_DELAY = 30.0
+
+# Container event action -> resulting state. Health events are handled apart.
+EVENT_STATES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "kill": "exited",
+}
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ContainerState:
+    uuid: str
+    container_id: str
+    state: str
+    health: str | None = None
+    ports: dict[str, int] = field(default_factory=dict)
+
+
+def parse_health(status: str) -> str | None:
+    if "(healthy)" in status:
+        return "healthy"
+    if "(unhealthy)" in status:
+        return "unhealthy"
+    if "(health: starting)" in status:
+        return "starting"
+    return None
+
+
+def state_from_summary(data: dict) -> ContainerState:
+    return ContainerState(
+        uuid=data["Labels"][UUID_LABEL],
+        container_id=data["Id"],
+        state=data["State"],
+        health=parse_health(data.get("Status", "")),
+        ports={
+            f"{port['PrivatePort']}/{port['Type']}": port["PublicPort"]
+            for port in data.get("Ports") or []
+            if port.get("PublicPort")
+        },
+    )
+
+
+def state_from_inspect(data: dict) -> ContainerState:
+    health = data["State"].get("Health")
+    return ContainerState(
+        uuid=data["Config"]["Labels"][UUID_LABEL],
+        container_id=data["Id"],
+        state=data["State"]["Status"],
+        health=health["Status"] if health else None,
+        # Unlike NetworkSettings, the bindings are reported for stopped
+        # containers too.
+        ports={
+            port: int(bindings[0]["HostPort"])
+            for port, bindings in (data["HostConfig"].get("PortBindings") or {}).items()
+            if bindings
+        },
+    )
+
+
+class ContainerIndex:
+    def __init__(self, docker: Docker):
+        self.docker = docker
+        self.ready = asyncio.Event()
+        self._entries: dict[str, ContainerState] = {}
+        self._task: asyncio.Task | None = None
+        self._refreshes: set[asyncio.Task] = set()
+        # Called with every entry that is added or changed.
+        self.listeners: list[Callable[[ContainerState], None]] = []
+
+    def _notify(self, entry: ContainerState) -> None:
+        for listener in self.listeners:
+            listener(entry)
+
+    def get(self, uuid: str) -> ContainerState | None:
+        return self._entries.get(str(uuid))
+
+    def all(self) -> list[ContainerState]:
+        return list(self._entries.values())
+
+    def put(self, entry: ContainerState) -> None:
+        self._entries[entry.uuid] = entry
+        self._notify(entry)
+
+    def update(self, uuid: str, **changes) -> None:
+        entry = self._entries.get(str(uuid))
+        if entry is not None:
+            entry = self._entries[entry.uuid] = replace(entry, **changes)
+            self._notify(entry)
+
+    def discard(self, uuid: str) -> None:
+        self._entries.pop(str(uuid), None)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def resync(self) -> None:
+        containers = await self.docker.containers.list(all=True, filters=MANAGED_FILTER)
+        self._entries = {
+            entry.uuid: entry
+            for entry in (state_from_summary(c._container) for c in containers)
+        }
+        log.info(f"Container index synced, {len(self._entries)} servers")
+
+    async def _refresh(self, container_id: str) -> None:
+        try:
+            container = await self.docker.containers.get(container_id)
+        except DockerError:
+            return
+        self.put(state_from_inspect(container._container))
+
+    def _apply(self, event: dict) -> None:
+        action = event.get("Action", "")
+        actor = event.get("Actor", {})
+        uuid = actor.get("Attributes", {}).get(UUID_LABEL)
+        if uuid is None:
+            return
+
+        if action == "destroy":
+            self.discard(uuid)
+        elif action.startswith("health_status"):
+            self.update(uuid, health=action.partition(": ")[2])
+        elif action in EVENT_STATES:
+            entry = self.get(uuid)
+            state = EVENT_STATES[action]
+            if entry is None or not entry.ports:
+                # Ports are not part of the event, pick them up once.
+                task = asyncio.create_task(self._refresh(actor["ID"]))
+                self._refreshes.add(task)
+                task.add_done_callback(self._refreshes.discard)
+            self.update(uuid, state=state, health=None)
+
+    async def _run(self) -> None:
+        subscriber = self.docker.events.subscribe(create_task=False)
+        delay = RESYNC_DELAY
+        while True:
+            since = int(time.time())
+            runner = None
+            try:
+                await self.resync()
+                self.ready.set()
+                delay = RESYNC_DELAY
+                # Replaying from before the listing covers events that happened
+                # while it was being taken.
+                runner = asyncio.create_task(
+                    self.docker.events.run(
+                        since=since, filters={"type": ["container"], **MANAGED_FILTER}
+                    )
+                )
+                while (event := await subscriber.get()) is not None:
+                    self._apply(event)
+                log.warning("Docker event stream closed, resyncing")
+            except Exception as e:
+                log.error(f"Container index lost Docker: {e!r}")
+            finally:
+                if runner is not None:
+                    runner.cancel()
+                    try:
+                        await runner
+                    except asyncio.CancelledError:
+                        pass
+                    except Exception as e:
+                        log.error(f"Docker event stream failed: {e!r}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESYNC_DELAY)
+
+
+class AllReady:
+    def __init__(self, events: list[asyncio.Event]):
+        self.events = events
+
+    def is_set(self) -> bool:
+        return all(event.is_set() for event in self.events)
+
+    async def wait(self) -> None:
+        for event in self.events:
+            await event.wait()
+
+
+# Read-mostly view over the indexes of every Docker node.
+class FleetIndex:
+    def __init__(self, indexes: dict[str, ContainerIndex]):
+        self.indexes = indexes
+        self.ready = AllReady([index.ready for index in indexes.values()])
+        self.listeners: list[Callable[[ContainerState], None]] = []
+        for index in indexes.values():
+            index.listeners.append(self._notify)
+
+    def _notify(self, entry: ContainerState) -> None:
+        for listener in self.listeners:
+            listener(entry)
+
+    def node_of(self, uuid: str) -> str | None:
+        for name, index in self.indexes.items():
+            if index.get(uuid) is not None:
+                return name
+        return None
+
+    def get(self, uuid: str) -> ContainerState | None:
+        for index in self.indexes.values():
+            entry = index.get(uuid)
+            if entry is not None:
+                return entry
+        return None
+
+    def all(self) -> list[ContainerState]:
+        return [entry for index in self.indexes.values() for entry in index.all()]
+
+    def update(self, uuid: str, **changes) -> None:
+        for index in self.indexes.values():
+            index.update(uuid, **changes)
+
+    def discard(self, uuid: str) -> None:
+        for index in self.indexes.values():
+            index.discard(uuid)
+
+
+__all__ = ["ContainerIndex", "ContainerState", "FleetIndex", "MANAGED_FILTER"]
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import uuid as uuid_lib
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request
+
+from src.configuration import getSettings
+from src.database.database import async_session
+from src.exceptions import DatabaseError, JobError, JobQueueFullError
+from src.repositories.JobRepository import JobRepository
+
+log = logging.getLogger(__name__)
+
+JobFunc = Callable[[], Awaitable[Any]]
+
+
+async def getJobQueue(request: Request) -> "JobQueue":
+    return request.app.state.jobs
+
+
+@dataclass
+class Job:
+    func: JobFunc
+    action: str
+    server_uuid: str | None = None
+    uuid: uuid_lib.UUID = field(default_factory=uuid_lib.uuid4)
+    persist: bool = False
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+    @property
+    def key(self) -> str:
+        # Jobs without a server have nothing to be ordered against.
+        return self.server_uuid or str(self.uuid)
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+    ):
+        settings = getSettings()
+        self.workers = max(workers or settings.JOB_WORKERS, 1)
+        self.max_pending = max_pending or settings.JOB_QUEUE_SIZE
+        # Only the head of each server's queue is ever handed to a worker, so
+        # jobs for one server run in submission order while other servers
+        # proceed in parallel.
+        self._pending: dict[str, deque[Job]] = {}
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        self._size = 0
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def recover(self) -> None:
+        try:
+            async with async_session() as session:
+                failed = await JobRepository(session).failUnfinishedJobs(
+                    "Interrupted by restart"
+                )
+            if failed:
+                log.warning(f"Marked {failed} unfinished jobs as failed")
+        except DatabaseError as e:
+            log.error(f"Cannot clean up unfinished jobs: {e}")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for jobs in self._pending.values():
+            for job in jobs:
+                job.future.cancel()
+        self._pending.clear()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def submit(
+        self,
+        action: str,
+        func: JobFunc,
+        server_uuid: str | None = None,
+        after: Job | None = None,
+    ) -> Job:
+        self._check_capacity()
+        job = Job(func=func, action=action, server_uuid=server_uuid, persist=True)
+        async with async_session() as session:
+            await JobRepository(session).createJob(
+                {"uuid": job.uuid, "server_uuid": server_uuid, "action": action}
+            )
+        if after is None:
+            self._enqueue(job)
+        else:
+            # Queued once `after` is done. Awaiting it from inside a job would
+            # hold a worker the other job may need.
+            after.future.add_done_callback(lambda _: self._chain(job, after))
+        return job
+
+    def enqueue(
+        self, action: str, func: JobFunc, server_uuid: str | None = None
+    ) -> Job:
+        self._check_capacity()
+        job = Job(func=func, action=action, server_uuid=server_uuid)
+        self._enqueue(job)
+        return job
+
+    async def run(
+        self, action: str, func: JobFunc, server_uuid: str | None = None
+    ) -> Any:
+        job = self.enqueue(action, func, server_uuid)
+        # The caller going away must not cancel a job others are queued behind.
+        return await asyncio.shield(job.future)
+
+    def _chain(self, job: Job, after: Job) -> None:
+        func = job.func
+
+        async def chained() -> Any:
+            # Fails, with the reason recorded, when `after` did.
+            if after.future.cancelled():
+                raise JobError(f"Job {after.action} {after.uuid} was cancelled")
+            after.future.result()
+            return await func()
+
+        job.func = chained
+        self._enqueue(job)
+
+    def _check_capacity(self) -> None:
+        if self._size >= self.max_pending:
+            raise JobQueueFullError(f"Job queue is full ({self._size} pending)")
+
+    def _enqueue(self, job: Job) -> None:
+        job.future.add_done_callback(self._retrieve)
+        self._size += 1
+        jobs = self._pending.get(job.key)
+        if jobs is None:
+            self._pending[job.key] = deque([job])
+            self._ready.put_nowait(job.key)
+        else:
+            jobs.append(job)
+
+    @staticmethod
+    def _retrieve(future: asyncio.Future) -> None:
+        # Background jobs report failures through their record.
+        if not future.cancelled():
+            future.exception()
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            jobs = self._pending[key]
+            job = jobs[0]
+            try:
+                await self._execute(job)
+            finally:
+                jobs.popleft()
+                self._size -= 1
+                if jobs:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+
+    async def _execute(self, job: Job) -> None:
+        await self._record(job, status="running", started_at=now())
+        try:
+            result = await job.func()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            await asyncio.shield(
+                self._record(job, status="failed", error="Cancelled", finished_at=now())
+            )
+            raise
+        except Exception as e:
+            log.error(f"Job {job.action} {job.uuid} failed: {e!r}")
+            job.future.set_exception(e)
+            await self._record(job, status="failed", error=str(e), finished_at=now())
+        else:
+            job.future.set_result(result)
+            await self._record(job, status="succeeded", finished_at=now())
+
+    async def _record(self, job: Job, **values) -> None:
+        if not job.persist:
+            return
+        try:
+            async with async_session() as session:
+                await JobRepository(session).updateJob(job.uuid, values)
+        except DatabaseError as e:
+            log.error(f"Cannot record job {job.uuid} state: {e}")
+
+
+__all__ = ["Job", "JobQueue", "getJobQueue"]
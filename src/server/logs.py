@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+import aiohttp
+from aiodocker.containers import DockerContainer
+from aiodocker.exceptions import DockerError
+
+from src.configuration import getSettings
+from src.exceptions import NoAvailableNodeError
+
+log = logging.getLogger(__name__)
+
+MAX_LINE_LENGTH = 16 * 1024
+
+
+class LineSplitter:
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, chunk: str) -> list[str]:
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()[-MAX_LINE_LENGTH:]
+        return [line.rstrip("\r")[:MAX_LINE_LENGTH] for line in lines]
+
+
+class LogSubscriber:
+    def __init__(self, size: int):
+        # A slow client loses its oldest lines instead of stalling the stream.
+        self.lines: deque[str] = deque(maxlen=size)
+        self.dropped = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, line: str) -> None:
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def wait(self) -> None:
+        await self._wakeup.wait()
+        self._wakeup.clear()
+
+    def drain(self) -> tuple[list[str], int]:
+        lines, dropped = list(self.lines), self.dropped
+        self.lines.clear()
+        self.dropped = 0
+        return lines, dropped
+
+
+async def batches(subscriber: LogSubscriber, keepalive: float):
+    # Yields (lines, dropped) as they arrive, None after `keepalive` seconds of
+    # silence, and stops once the upstream is gone and everything is sent.
+    while True:
+        lines, dropped = subscriber.drain()
+        if lines or dropped:
+            yield lines, dropped
+        if subscriber.closed:
+            return
+        try:
+            async with asyncio.timeout(keepalive):
+                await subscriber.wait()
+        except TimeoutError:
+            yield None
+
+
+# One upstream Docker log stream per server, fanned out to every subscriber.
+class LogStream:
+    def __init__(
+        self,
+        uuid: str,
+        node: str | None,
+        get_container: Callable[[str, str | None], Awaitable[DockerContainer]],
+        backlog: int,
+    ):
+        self.uuid = uuid
+        self.node = node
+        self.get_container = get_container
+        self.backlog: deque[str] = deque(maxlen=backlog)
+        self.subscribers: set[LogSubscriber] = set()
+        self.waiting = 0
+        self.ready = asyncio.Event()
+        self.finished = False
+        # Set when the stream fails before it is ready, for subscribe to raise.
+        self.error: Exception | None = None
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run())
+
+    @property
+    def idle(self) -> bool:
+        return not self.subscribers and not self.waiting
+
+    def publish(self, line: str) -> None:
+        self.backlog.append(line)
+        for subscriber in self.subscribers:
+            subscriber.push(line)
+
+    async def _run(self) -> None:
+        try:
+            container = await self.get_container(self.uuid, self.node)
+            # The tail is read once into the shared backlog; following from
+            # the same instant picks up where it ends.
+            since = time.time()
+            splitter = LineSplitter()
+            for chunk in await container.log(
+                stdout=True, stderr=True, tail=self.backlog.maxlen, until=since
+            ):
+                self.backlog.extend(splitter.feed(chunk))
+            self.ready.set()
+
+            while True:
+                try:
+                    async for chunk in container.log(
+                        stdout=True, stderr=True, follow=True, since=since
+                    ):
+                        since = time.time()
+                        for line in splitter.feed(chunk):
+                            self.publish(line)
+                    return
+                except asyncio.TimeoutError:
+                    continue
+        except (DockerError, aiohttp.ClientError, NoAvailableNodeError) as e:
+            if not self.ready.is_set():
+                self.error = e
+            log.warning(f"Log stream for server '{self.uuid}' ended: {e}")
+        finally:
+            self.finished = True
+            self.ready.set()
+            for subscriber in self.subscribers:
+                subscriber.close()
+
+
+class LogHub:
+    def __init__(
+        self,
+        get_container: Callable[[str, str | None], Awaitable[DockerContainer]],
+        get_stream_container: Callable[[str, str | None], Awaitable[DockerContainer]],
+        backlog: int | None = None,
+        client_buffer: int | None = None,
+    ):
+        settings = getSettings()
+        self.get_container = get_container
+        self.get_stream_container = get_stream_container
+        self.backlog = backlog or settings.LOG_BACKLOG
+        self.client_buffer = client_buffer or settings.LOG_CLIENT_BUFFER
+        self.streams: dict[str, LogStream] = {}
+
+    async def tail(self, uuid: str, node: str | None, lines: int) -> list[str]:
+        stream = self.streams.get(uuid)
+        if stream is not None and not stream.finished:
+            await stream.ready.wait()
+            return list(stream.backlog)[-lines:] if lines else []
+
+        container = await self.get_container(uuid, node)
+        splitter = LineSplitter()
+        result = []
+        for chunk in await container.log(stdout=True, stderr=True, tail=lines):
+            result.extend(splitter.feed(chunk))
+        return result[-lines:] if lines else []
+
+    async def subscribe(self, uuid: str, node: str | None, tail: int) -> LogSubscriber:
+        stream = self.streams.get(uuid)
+        if stream is None or stream.finished:
+            stream = self.streams[uuid] = LogStream(
+                uuid, node, self.get_stream_container, self.backlog
+            )
+            stream.start()
+
+        stream.waiting += 1
+        try:
+            await stream.ready.wait()
+        except asyncio.CancelledError:
+            stream.waiting -= 1
+            if stream.idle:
+                self._stop(uuid, stream)
+            raise
+        stream.waiting -= 1
+        if stream.error is not None:
+            # Never attached, e.g. no such container; the next one retries.
+            if self.streams.get(uuid) is stream:
+                del self.streams[uuid]
+            raise stream.error
+
+        # Backlog copy and registration happen without yielding, so no line
+        # is missed or delivered twice.
+        subscriber = LogSubscriber(self.client_buffer)
+        tail = min(tail, self.client_buffer)
+        for line in list(stream.backlog)[-tail:] if tail else []:
+            subscriber.push(line)
+        if stream.finished:
+            subscriber.close()
+        else:
+            stream.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, uuid: str, subscriber: LogSubscriber) -> None:
+        stream = self.streams.get(uuid)
+        if stream is None:
+            return
+        stream.subscribers.discard(subscriber)
+        if stream.idle:
+            self._stop(uuid, stream)
+
+    def _stop(self, uuid: str, stream: LogStream) -> None:
+        # Nobody is reading, stop pulling from Docker.
+        if self.streams.get(uuid) is stream:
+            del self.streams[uuid]
+        if stream.task is not None:
+            stream.task.cancel()
+
+    async def close(self) -> None:
+        tasks = [s.task for s in self.streams.values() if s.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.streams.clear()
+
+
+__all__ = ["LogHub", "LogStream", "LogSubscriber", "batches"]
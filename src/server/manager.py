@@ -1,111 +1,376 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
 from aiodocker import Docker
 from aiodocker.containers import DockerContainer
 from aiodocker.exceptions import DockerError
+from fastapi.requests import HTTPConnection
 
+from src.configuration import getSettings
 from src.exceptions import (
-    ImageNotFoundError,
+    DockerTimeoutError,
+    ImageNotReadyError,
     ServerDeleteError,
     ServerManagerError,
     ServerNotFoundError,
     ServerStartError,
     ServerStopError,
+    ServerUpdateError,
 )
+from src.metrics import CONTAINERS, DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, timed
+from src.server.hibernation import Hibernator
+from src.server.index import MANAGED_FILTER, ContainerState, FleetIndex
+from src.server.logs import LogHub
+from src.server.nodes import (
+    DEFAULT_NODE,
+    DockerNode,
+    NodeRegistry,
+    node_host,
+    node_urls,
+)
+from src.server.rcon import RconPool, rcon_pools
+from src.server.readiness import Readiness, ReadinessTracker
+from src.server.stats import StatsCollector
 from src.utils import (
-    IMAGE_NAME,
+    ResourceLimits,
+    content_cache,
     create_properties_from_template,
     ensure_server_dir,
     get_container_config,
+    host_config_limits,
+    image_for_version,
     remove_server_dir,
 )
 
-DOCKER_PATH = "unix:///var/run/docker.sock"
-
 log = logging.getLogger(__name__)
 
+BULK_ACTIONS = ("start", "stop", "restart")
+
+# Runs one server's operation; lets callers route it through the job queue.
+BulkRunner = Callable[[str, str, Callable[[], Awaitable[None]]], Awaitable[None]]
 
-async def getManager():
-    manager = ServerManager()
-    try:
-        yield manager
-    finally:
-        await manager.close()
+
+async def getManager(connection: HTTPConnection) -> "ServerManager":
+    return connection.app.state.server_manager
 
 
 class ServerManager:
-    def __init__(self):
-        self.docker = Docker(url=DOCKER_PATH)
+    def __init__(
+        self,
+        url: str | None = None,
+        pool_size: int | None = None,
+        timeout: float | None = None,
+        stop_timeout: int | None = None,
+        bulk_concurrency: int | None = None,
+        nodes: dict[str, str] | None = None,
+        refresh_interval: float | None = None,
+    ):
+        settings = getSettings()
+        if nodes is None:
+            nodes = {DEFAULT_NODE: url} if url is not None else node_urls()
+        self.timeout = timeout or settings.DOCKER_TIMEOUT
+        self.nodes = NodeRegistry(
+            nodes, pool_size or settings.DOCKER_POOL_SIZE, self.timeout
+        )
+        self.stop_timeout = (
+            settings.DOCKER_STOP_TIMEOUT if stop_timeout is None else stop_timeout
+        )
+        self.refresh_interval = refresh_interval or settings.NODE_REFRESH_INTERVAL
+        # Shared by all bulk requests so overlapping maintenance calls do not
+        # multiply the load on the daemons.
+        self.bulk_limit = asyncio.Semaphore(
+            max(bulk_concurrency or settings.BULK_CONCURRENCY, 1)
+        )
+        self.index = FleetIndex({node.name: node.index for node in self.nodes.all()})
+        self.stats = StatsCollector(self.streams_for, self.index)
+        self.logs = LogHub(self.get_container, self.get_stream_container)
+        self.readiness = ReadinessTracker(
+            self.index, self.get_container, self.get_stream_container
+        )
+        self.hibernation = Hibernator(self)
+        self._refresh_task: asyncio.Task | None = None
+        # Servers whose files were offered to the content cache this run.
+        self._harvested: set[str] = set()
+        self._harvests: set[asyncio.Task] = set()
+        self.index.listeners.append(self._on_change)
+
+    async def start(self, runner: BulkRunner | None = None) -> None:
+        CONTAINERS.set_function(self.count_states)
+        for node in self.nodes.all():
+            await node.start()
+        await self.stats.start()
+        self._refresh_task = asyncio.create_task(self._refresh_nodes())
+        await self.hibernation.start(runner)
+
+    def node_for(self, node: str | None) -> DockerNode:
+        # Calls go to the node recorded with the server, whether or not its
+        # index has caught up; an unknown name raises instead of reaching
+        # another daemon.
+        return self.nodes.get(node)
+
+    def located(self, uuid: str) -> str:
+        # For callers driven by the indexes rather than a database row.
+        node = self.index.node_of(str(uuid))
+        if node is None:
+            raise ServerNotFoundError(f"Server '{uuid}' is not on any node")
+        return node
+
+    def streams_for(self, uuid: str) -> Docker:
+        return self.node_for(self.located(uuid)).streams
 
-    async def ensure_image(self) -> None:
+    async def get_container(self, uuid: str, node: str | None) -> DockerContainer:
+        target = self.node_for(node)
+        entry = target.index.get(uuid)
+        if entry is not None:
+            return target.docker.containers.container(entry.container_id)
+        # Not indexed yet, or created before containers were labelled.
+        return await target.docker.containers.get(f"mc_{uuid}")
+
+    async def get_stream_container(
+        self, uuid: str, node: str | None
+    ) -> DockerContainer:
+        # A followed log holds its connection for as long as it is read; on
+        # the bounded pool enough of them would starve the lifecycle calls.
+        container = await self.get_container(uuid, node)
+        return self.node_for(node).streams.containers.container(container.id)
+
+    def memory_used(self, node: DockerNode) -> int:
+        # A stopped server will want its memory back when it starts, so every
+        # managed container counts; measured usage replaces the estimate.
+        used = 0
+        for entry in node.index.all():
+            buffer = self.stats.get(entry.uuid) if entry.state == "running" else None
+            latest = buffer.latest("memory_bytes") if buffer is not None else None
+            used += int(latest) if latest is not None else self.nodes.server_memory
+        return used
+
+    async def refresh_nodes(self) -> None:
+        await asyncio.gather(
+            *(node.refresh(self.memory_used(node)) for node in self.nodes.all())
+        )
+
+    async def _refresh_nodes(self) -> None:
+        while True:
+            await self.refresh_nodes()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def place(
+        self,
+        port: int,
+        rcon_port: int,
+        version: str,
+        limits: ResourceLimits | None = None,
+    ) -> str:
+        # Only before the first refresh; a node that failed one is retried by
+        # the background loop, not on every create.
+        if any(
+            node.capacity.refreshed_at is None and node.capacity.error is None
+            for node in self.nodes.all()
+        ):
+            await self.refresh_nodes()
+        node = self.nodes.place(
+            (port, rcon_port),
+            image_for_version(version),
+            limits.memory_mb * 2**20 if limits is not None else None,
+        )
+        self.check_image(version, node.name)
+        log.info(f"Placing server on port {port} on node '{node.name}'")
+        return node.name
+
+    def _on_change(self, entry: ContainerState) -> None:
+        # Healthy means the image has finished downloading into the directory.
+        if entry.health != "healthy" or entry.uuid in self._harvested:
+            return
+        self._harvested.add(entry.uuid)
+        task = asyncio.create_task(self._harvest(entry.uuid))
+        self._harvests.add(task)
+        task.add_done_callback(self._harvests.discard)
+
+    async def _harvest(self, uuid: str) -> None:
         try:
-            log.info(f"Found image {IMAGE_NAME}")
-            await self.docker.images.inspect(IMAGE_NAME)
-        except DockerError:
-            try:
-                log.info(f"Pulling image {IMAGE_NAME}")
-                await self.docker.images.pull(IMAGE_NAME)
-            except DockerError as e:
-                raise ImageNotFoundError(f"Cannot pull image {IMAGE_NAME}") from e
+            async with self.deadline():
+                container = await self.get_container(uuid, self.located(uuid))
+                env = (await container.show())["Config"].get("Env") or []
+            version = next(
+                (v.partition("=")[2] for v in env if v.startswith("VERSION=")), None
+            )
+            if version:
+                await content_cache.harvest(await ensure_server_dir(uuid), version)
+        except Exception as e:
+            self._harvested.discard(uuid)
+            log.warning(f"Cannot cache files of server '{uuid}': {e!r}")
+
+    def count_states(self) -> list[tuple[dict, int]]:
+        counts: dict[str, int] = {}
+        for entry in self.index.all():
+            counts[entry.state] = counts.get(entry.state, 0) + 1
+        return [({"state": state}, count) for state, count in counts.items()]
 
+    def get_state(self, uuid: str) -> ContainerState | None:
+        return self.index.get(uuid)
+
+    def running_rcon(self, server) -> RconPool | None:
+        # A stopped server writes nothing, so it needs no save-off.
+        state = self.get_state(str(server.uuid))
+        if state is None or state.state != "running":
+            return None
+        return rcon_pools.get(
+            node_host(server.node), server.rcon_port, server.rcon_password
+        )
+
+    @asynccontextmanager
+    async def deadline(self, timeout: float | None = None):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            async with asyncio.timeout(timeout):
+                yield
+        except TimeoutError as e:
+            raise DockerTimeoutError(
+                f"Docker did not answer within {timeout} seconds"
+            ) from e
+
+    def check_image(self, version: str, node: str | None = None) -> None:
+        images = self.nodes.get(node).images
+        image = image_for_version(version)
+        if not images.is_local(image):
+            images.schedule(image)
+            raise ImageNotReadyError(f"Image {image} is still being pulled")
+
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="create")
     async def create_server(
-        self, uuid: str, port: int, rcon_port: int, rcon_password: str, version: str
+        self,
+        uuid: str,
+        port: int,
+        rcon_port: int,
+        rcon_password: str,
+        version: str,
+        node: str | None = None,
+        limits: ResourceLimits | None = None,
     ) -> None:
+        target = self.nodes.get(node)
+        self.check_image(version, target.name)
         server_dir = await ensure_server_dir(server_name=str(uuid))
+        shared_dir = None
+        try:
+            shared_dir = await content_cache.populate(server_dir, version)
+        except OSError as e:
+            # Only a cold start is lost; the image downloads what is missing.
+            log.warning(f"Cannot copy cached files for server '{uuid}': {e}")
 
         container_config = get_container_config(
+            uuid=str(uuid),
             server_dir=server_dir,
             port=port,
             rcon_port=rcon_port,
             rcon_password=rcon_password,
             version=version,
+            limits=limits,
+            shared_dir=shared_dir,
         )
 
         try:
-            await self.docker.containers.create(
-                name=f"mc_{uuid}", config=container_config
+            async with self.deadline():
+                container = await target.docker.containers.create(
+                    name=f"mc_{uuid}", config=container_config
+                )
+        except BaseException as e:
+            # No container mounts the tree.
+            content_cache.release(str(uuid))
+            if isinstance(e, DockerError):
+                raise ServerManagerError(f"Failed to create container: {e}") from e
+            raise
+        target.index.put(
+            ContainerState(
+                uuid=str(uuid),
+                container_id=container.id,
+                state="created",
+                ports={"25565/tcp": port, "25575/tcp": rcon_port},
             )
+        )
 
-            await create_properties_from_template(
-                server_name=str(uuid), rcon_password=rcon_password
-            )
+        await create_properties_from_template(
+            server_name=str(uuid), rcon_password=rcon_password
+        )
 
-            log.info(f"Server '{uuid}' running on port {port}")
-        except DockerError as e:
-            raise ServerManagerError(f"Failed to create container: {e}") from e
+        log.info(f"Server '{uuid}' running on port {port} on node '{target.name}'")
 
-    async def start_server(self, uuid: str) -> None:
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="start")
+    async def start_server(self, uuid: str, node: str | None) -> None:
+        await self.hibernation.release(uuid)
         try:
-            container = await self.docker.containers.get(f"mc_{uuid}")
-            await container.start()
+            async with self.deadline():
+                container = await self.get_container(uuid, node)
+                await container.start()
+            self.index.update(uuid, state="running", health=None)
         except DockerError as e:
             if getattr(e, "status", None) == 404:
                 raise ServerNotFoundError(f"Server '{uuid}' not found") from e
             raise ServerStartError(f"Failed to start server '{uuid}'. {e}") from e
 
-    async def restart_server(self, uuid: str) -> None:
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="restart")
+    async def restart_server(self, uuid: str, node: str | None) -> None:
+        await self.hibernation.release(uuid)
         try:
-            container = await self.docker.containers.get(f"mc_{uuid}")
-            await container.restart()
+            async with self.deadline(self.stop_timeout + self.timeout):
+                container = await self.get_container(uuid, node)
+                await container.restart(timeout=self.stop_timeout)
+            self.index.update(uuid, state="running", health=None)
         except DockerError as e:
             if getattr(e, "status", None) == 404:
                 raise ServerNotFoundError(f"Server '{uuid}' not found") from e
             raise ServerStartError(f"Failed to start server '{uuid}'. {e}") from e
 
-    async def stop_server(self, uuid: str) -> None:
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="update")
+    async def update_resources(
+        self, uuid: str, node: str | None, limits: ResourceLimits
+    ) -> None:
+        # Applied to the cgroup in place, running or not; the heap follows the
+        # new memory limit on the next start.
+        try:
+            async with self.deadline():
+                container = await self.get_container(uuid, node)
+                await container.docker._query_json(
+                    f"containers/{container.id}/update",
+                    method="POST",
+                    data=host_config_limits(limits),
+                )
+            log.info(f"Server '{uuid}' resources updated to {limits}")
+        except DockerError as e:
+            if getattr(e, "status", None) == 404:
+                raise ServerNotFoundError(f"Server '{uuid}' not found") from e
+            raise ServerUpdateError(
+                f"Failed to update resources of server '{uuid}'. {e}"
+            ) from e
+
+    async def wait_ready(
+        self, uuid: str, node: str | None, timeout: float
+    ) -> Readiness:
+        return await self.readiness.wait(str(uuid), node, timeout)
+
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="stop")
+    async def stop_server(self, uuid: str, node: str | None) -> None:
+        await self.hibernation.release(uuid)
         try:
-            container = await self.docker.containers.get(f"mc_{uuid}")
-            await container.stop()
+            async with self.deadline(self.stop_timeout + self.timeout):
+                container = await self.get_container(uuid, node)
+                await container.stop(t=self.stop_timeout)
+            self.index.update(uuid, state="exited", health=None)
             log.info(f"Server '{uuid}' stopped")
         except DockerError as e:
             if getattr(e, "status", None) == 404:
                 raise ServerNotFoundError(f"Server '{uuid}' not found") from e
             raise ServerStopError(f"Failed to stop server '{uuid}'") from e
 
-    async def remove_server(self, uuid: str) -> None:
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="remove")
+    async def remove_server(self, uuid: str, node: str | None) -> None:
+        await self.hibernation.release(uuid)
         try:
-            container = await self.docker.containers.get(f"mc_{uuid}")
-            await container.delete(force=True)
+            async with self.deadline():
+                container = await self.get_container(uuid, node)
+                await container.delete(force=True)
+            self.index.discard(uuid)
             log.info(f"Server '{uuid}' removed")
         except DockerError as e:
             if getattr(e, "status", None) == 404:
@@ -114,12 +379,65 @@ class ServerManager:
 
         await remove_server_dir(uuid)
 
+    async def bulk(
+        self,
+        action: str,
+        targets: dict[str, str | None],
+        runner: BulkRunner | None = None,
+    ) -> AsyncIterator[tuple[str, Exception | None]]:
+        # `targets` maps each server to its recorded node.
+        if action not in BULK_ACTIONS:
+            raise ValueError(f"Unknown bulk action '{action}'")
+        method = getattr(self, f"{action}_server")
+
+        async def run_one(uuid: str) -> tuple[str, Exception | None]:
+            node = targets[uuid]
+            async with self.bulk_limit:
+                try:
+                    if runner is None:
+                        await method(uuid=uuid, node=node)
+                    else:
+                        await runner(action, uuid, lambda: method(uuid=uuid, node=node))
+                except Exception as e:
+                    return uuid, e
+            return uuid, None
+
+        tasks = [asyncio.create_task(run_one(uuid)) for uuid in targets]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @timed(DOCKER_CALL_SECONDS, DOCKER_CALLS_IN_FLIGHT, operation="list")
     async def list_servers(self, active: bool = False) -> list[DockerContainer]:
-        containers = await self.docker.containers.list(all=not active)
-        return containers
+        async with self.deadline():
+            listings = await asyncio.gather(
+                *(
+                    node.docker.containers.list(all=not active, filters=MANAGED_FILTER)
+                    for node in self.nodes.all()
+                )
+            )
+        return [container for listing in listings for container in listing]
 
     async def close(self):
-        await self.docker.close()
+        for task in self._harvests:
+            task.cancel()
+        await asyncio.gather(*self._harvests, return_exceptions=True)
+        await self.hibernation.close()
+        await self.readiness.close()
+        await self.logs.close()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        await self.stats.close()
+        for node in self.nodes.all():
+            await node.close()
 
 
-__all__ = ["ServerManager"]
+__all__ = ["ServerManager", "getManager"]
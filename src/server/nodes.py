@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiodocker import Docker
+from aiodocker.exceptions import DockerError
+
+from src.configuration import getSettings
+from src.exceptions import NoAvailableNodeError
+from src.server.images import ImageManager
+from src.server.index import ContainerIndex
+
+log = logging.getLogger(__name__)
+
+DEFAULT_NODE = "local"
+
+
+def make_connector(url: str, limit: int) -> tuple[str, aiohttp.BaseConnector]:
+    if url.startswith("unix://"):
+        # aiodocker composes request URLs from the host, the socket is dialled
+        # by the connector.
+        connector = aiohttp.UnixConnector(url.removeprefix("unix://"), limit=limit)
+        return "unix://localhost", connector
+    return url.replace("tcp://", "http://", 1), aiohttp.TCPConnector(limit=limit)
+
+
+def node_urls() -> dict[str, str]:
+    settings = getSettings()
+    return dict(settings.DOCKER_NODES) or {DEFAULT_NODE: settings.DOCKER_URL}
+
+
+def node_host(name: str | None) -> str:
+    # Where a node's game and RCON ports are reached from the API.
+    settings = getSettings()
+    urls = node_urls()
+    if name is None:
+        # Servers without a recorded node predate the registry.
+        name = next(iter(urls))
+    elif name not in urls:
+        raise NoAvailableNodeError(f"Unknown Docker node '{name}'")
+    if name in settings.DOCKER_NODE_HOSTS:
+        return settings.DOCKER_NODE_HOSTS[name]
+    url = urls[name]
+    if url.startswith("unix://"):
+        return settings.SERVERS_HOST
+    return urlsplit(url).hostname or settings.SERVERS_HOST
+
+
+@dataclass
+class NodeCapacity:
+    memory_total: int = 0
+    memory_used: int = 0
+    containers: int = 0
+    used_ports: set[int] = field(default_factory=set)
+    refreshed_at: float | None = None
+    error: str | None = None
+
+    @property
+    def memory_free(self) -> int:
+        return max(self.memory_total - self.memory_used, 0)
+
+
+class DockerNode:
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        pool_size: int,
+        timeout: float,
+        host: str | None = None,
+    ):
+        settings = getSettings()
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.local = url.startswith("unix://")
+        self.host = host or (
+            settings.SERVERS_HOST
+            if self.local
+            else urlsplit(url).hostname or settings.SERVERS_HOST
+        )
+        self.docker = self._client(url, pool_size, timeout)
+        # One stats stream per running server holds its connection for good;
+        # on the bounded pool they would starve the lifecycle calls.
+        self.streams = self._client(url, 0, timeout)
+        self.index = ContainerIndex(self.docker)
+        self.images = ImageManager(
+            self.docker, settings.PREWARM_IMAGES, settings.IMAGE_PULL_TIMEOUT
+        )
+        self.capacity = NodeCapacity()
+
+    @staticmethod
+    def _client(url: str, pool_size: int, timeout: float) -> Docker:
+        docker_host, connector = make_connector(url, pool_size)
+        # Calls are bounded by ServerManager.deadline(); a session-wide total
+        # would also cut the long-lived event, stats and log streams.
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=timeout),
+        )
+        return Docker(url=docker_host, connector=connector, session=session)
+
+    async def start(self) -> None:
+        await self.index.start()
+        await self.images.start()
+
+    async def close(self) -> None:
+        await self.images.close()
+        await self.index.close()
+        await self.docker.close()
+        await self.streams.close()
+
+    async def refresh(self, memory_used: int) -> None:
+        try:
+            # The session has no total timeout, a hung daemon would hold up
+            # every placement.
+            async with asyncio.timeout(self.timeout):
+                info = await self.docker.system.info()
+                containers = await self.docker.containers.list(all=True)
+        except (DockerError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Left out of placement until a refresh succeeds again.
+            self.capacity.error = str(e) or type(e).__name__
+            log.warning(f"Cannot refresh Docker node '{self.name}': {e!r}")
+            return
+
+        # Stopped containers keep their bindings reserved, the index knows
+        # those for managed ones; running ones report what is published.
+        used_ports = {
+            port["PublicPort"]
+            for container in containers
+            for port in container._container.get("Ports") or []
+            if port.get("PublicPort")
+        }
+        for entry in self.index.all():
+            used_ports.update(entry.ports.values())
+
+        self.capacity = NodeCapacity(
+            memory_total=info.get("MemTotal", 0),
+            memory_used=memory_used,
+            containers=info.get("Containers", len(containers)),
+            used_ports=used_ports,
+            refreshed_at=time.time(),
+        )
+
+
+class NodeRegistry:
+    def __init__(
+        self,
+        urls: dict[str, str],
+        pool_size: int,
+        timeout: float,
+        hosts: dict[str, str] | None = None,
+        min_free_memory: int | None = None,
+        server_memory: int | None = None,
+    ):
+        settings = getSettings()
+        hosts = settings.DOCKER_NODE_HOSTS if hosts is None else hosts
+        self.nodes = {
+            name: DockerNode(name, url, pool_size, timeout, hosts.get(name))
+            for name, url in urls.items()
+        }
+        # Servers without a recorded node predate the registry.
+        self.default = next(iter(self.nodes))
+        self.min_free_memory = (
+            settings.NODE_MIN_FREE_MEMORY
+            if min_free_memory is None
+            else min_free_memory
+        )
+        self.server_memory = server_memory or settings.SERVER_MEMORY_ESTIMATE
+
+    def get(self, name: str | None) -> DockerNode:
+        if name is None:
+            return self.nodes[self.default]
+        try:
+            return self.nodes[name]
+        except KeyError:
+            raise NoAvailableNodeError(f"Unknown Docker node '{name}'") from None
+
+    def all(self) -> list[DockerNode]:
+        return list(self.nodes.values())
+
+    def place(
+        self,
+        ports: tuple[int, ...],
+        image: str | None = None,
+        memory: int | None = None,
+    ) -> DockerNode:
+        memory = memory or self.server_memory
+        candidates = [
+            node
+            for node in self.nodes.values()
+            if node.capacity.refreshed_at is not None
+            and node.capacity.error is None
+            and not node.capacity.used_ports.intersection(ports)
+            and node.capacity.memory_free >= max(self.min_free_memory, memory)
+        ]
+        if not candidates:
+            raise NoAvailableNodeError(
+                f"No Docker node can take a server on ports {list(ports)}"
+            )
+
+        # Most room for servers first, then the least crowded; a node that
+        # already has the image saves a pull.
+        node = min(
+            candidates,
+            key=lambda n: (
+                -(n.capacity.memory_free // memory),
+                n.capacity.containers,
+                image is not None and not n.images.is_local(image),
+                n.name,
+            ),
+        )
+        # Accounted for until the next refresh sees the container itself.
+        node.capacity.memory_used += memory
+        node.capacity.containers += 1
+        node.capacity.used_ports.update(ports)
+        return node
+
+
+__all__ = [
+    "DEFAULT_NODE",
+    "DockerNode",
+    "NodeCapacity",
+    "NodeRegistry",
+    "make_connector",
+    "node_host",
+    "node_urls",
+]
@@ -0,0 +1,350 @@
+import asyncio
+import itertools
+import logging
+import struct
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from src.configuration import getSettings
+from src.exceptions import (
+    RconAuthError,
+    RconConnectionError,
+    RconError,
+    RconTimeoutError,
+)
+
+log = logging.getLogger(__name__)
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# Minecraft answers a packet of unknown type with a single "Unknown request"
+# packet carrying the same id. Sending one right after a command marks the end
+# of a response that the server split over several packets.
+SENTINEL_TYPE = 200
+
+MAX_REQUEST_ID = 2**31 - 1
+
+_size = struct.Struct("<i")
+_header = struct.Struct("<ii")
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = _header.pack(request_id, packet_type) + body.encode() + b"\x00\x00"
+    return _size.pack(len(payload)) + payload
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, str]:
+    (length,) = _size.unpack(await reader.readexactly(_size.size))
+    payload = await reader.readexactly(length)
+    request_id, packet_type = _header.unpack_from(payload)
+    return (
+        request_id,
+        packet_type,
+        payload[_header.size : -2].decode("utf-8", "replace"),
+    )
+
+
+class RconConnection:
+    def __init__(self, host: str, port: int, password: str, timeout: float):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+
+        self._pending: dict[int, asyncio.Future] = {}
+        self._chunks: dict[int, list[str]] = {}
+        self._sentinels: dict[int, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        return (
+            self._writer is None
+            or self._writer.is_closing()
+            or self._reader_task is None
+            or self._reader_task.done()
+        )
+
+    def _next_id(self) -> int:
+        request_id = next(self._ids)
+        if request_id >= MAX_REQUEST_ID:
+            self._ids = itertools.count(1)
+            request_id = next(self._ids)
+        return request_id
+
+    async def connect(self) -> None:
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise RconConnectionError(
+                f"Cannot connect to RCON at {self.host}:{self.port}"
+            ) from e
+
+        try:
+            await self._authenticate()
+        except BaseException:
+            await self.close()
+            raise
+
+        self._reader_task = asyncio.create_task(self._read_loop())
+        log.info(f"RCON connection to {self.host}:{self.port} established")
+
+    async def _authenticate(self) -> None:
+        request_id = self._next_id()
+        try:
+            self._writer.write(
+                encode_packet(request_id, SERVERDATA_AUTH, self.password)
+            )
+            await self._writer.drain()
+            while True:
+                response_id, packet_type, _ = await asyncio.wait_for(
+                    read_packet(self._reader), self.timeout
+                )
+                if packet_type == SERVERDATA_AUTH_RESPONSE:
+                    break
+        except asyncio.TimeoutError as e:
+            raise RconTimeoutError(
+                f"RCON authentication timed out at {self.host}:{self.port}"
+            ) from e
+        except (asyncio.IncompleteReadError, OSError) as e:
+            raise RconConnectionError(
+                f"RCON connection to {self.host}:{self.port} lost during login"
+            ) from e
+
+        if response_id == -1:
+            raise RconAuthError(
+                f"RCON authentication failed at {self.host}:{self.port}"
+            )
+
+    async def _read_loop(self) -> None:
+        error = RconConnectionError(
+            f"RCON connection to {self.host}:{self.port} closed"
+        )
+        try:
+            while True:
+                request_id, _, body = await read_packet(self._reader)
+                command_id = self._sentinels.pop(request_id, None)
+                if command_id is not None:
+                    future = self._pending.pop(command_id, None)
+                    chunks = self._chunks.pop(command_id, [])
+                    if future is not None and not future.done():
+                        future.set_result("".join(chunks))
+                elif request_id in self._chunks:
+                    self._chunks[request_id].append(body)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            log.info(f"RCON connection to {self.host}:{self.port} lost: {e!r}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._chunks.clear()
+            self._sentinels.clear()
+            if self._writer is not None:
+                self._writer.close()
+
+    async def command(self, command: str, timeout: float | None = None) -> str:
+        if self.closed:
+            raise RconConnectionError(
+                f"RCON connection to {self.host}:{self.port} is closed"
+            )
+
+        command_id = self._next_id()
+        sentinel_id = self._next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        self._chunks[command_id] = []
+        self._sentinels[sentinel_id] = command_id
+        self.last_used = time.monotonic()
+
+        try:
+            async with self._write_lock:
+                self._writer.write(
+                    encode_packet(command_id, SERVERDATA_EXECCOMMAND, command)
+                    + encode_packet(sentinel_id, SENTINEL_TYPE, "")
+                )
+                await self._writer.drain()
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError as e:
+            raise RconTimeoutError(
+                f"RCON command timed out at {self.host}:{self.port}"
+            ) from e
+        except OSError as e:
+            raise RconConnectionError(
+                f"RCON connection to {self.host}:{self.port} lost"
+            ) from e
+        finally:
+            self._pending.pop(command_id, None)
+            self._chunks.pop(command_id, None)
+            self._sentinels.pop(sentinel_id, None)
+            self.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        if self._reader_task is not None and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+
+
+class RconPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        size: int | None = None,
+        timeout: float | None = None,
+        idle_timeout: float | None = None,
+    ):
+        settings = getSettings()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.size = max(size or settings.RCON_POOL_SIZE, 1)
+        self.timeout = timeout or settings.RCON_TIMEOUT
+        self.idle_timeout = idle_timeout or settings.RCON_IDLE_TIMEOUT
+
+        self._connections: list[RconConnection] = []
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def empty(self) -> bool:
+        return not self._connections
+
+    def _pick(self) -> RconConnection | None:
+        self._connections = [c for c in self._connections if not c.closed]
+        connection = min(self._connections, key=lambda c: c.in_flight, default=None)
+        if connection is None:
+            return None
+        if connection.in_flight == 0 or len(self._connections) >= self.size:
+            return connection
+        return None
+
+    async def acquire(self) -> RconConnection:
+        connection = self._pick()
+        if connection is not None:
+            return connection
+
+        async with self._connect_lock:
+            connection = self._pick()
+            if connection is not None:
+                return connection
+
+            connection = RconConnection(
+                self.host, self.port, self.password, self.timeout
+            )
+            await connection.connect()
+            self._connections.append(connection)
+            return connection
+
+    async def command(self, command: str, timeout: float | None = None) -> str:
+        connection = await self.acquire()
+        return await connection.command(command, timeout)
+
+    async def close_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        for connection in list(self._connections):
+            if connection.closed or (
+                connection.in_flight == 0 and connection.last_used < deadline
+            ):
+                self._connections.remove(connection)
+                await connection.close()
+
+    async def close(self) -> None:
+        connections, self._connections = self._connections, []
+        for connection in connections:
+            await connection.close()
+
+
+@asynccontextmanager
+async def saving_paused(
+    rcon: RconPool | None, flush_timeout: float | None = None
+) -> AsyncIterator[None]:
+    # Region files stay consistent while they are copied. A stopped server
+    # (no pool) writes nothing, so there is nothing to pause.
+    if rcon is None:
+        yield
+        return
+    await rcon.command("save-off")
+    try:
+        await rcon.command("save-all flush", flush_timeout)
+        yield
+    finally:
+        try:
+            await rcon.command("save-on")
+        except RconError as e:
+            log.error(f"Cannot resume saving on {rcon.host}:{rcon.port}: {e}")
+
+
+class RconPoolRegistry:
+    def __init__(self):
+        self._pools: dict[tuple[str, int, str], RconPool] = {}
+        self._reaper: asyncio.Task | None = None
+
+    def get(self, host: str, port: int, password: str) -> RconPool:
+        key = (host, port, password)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = RconPool(host, port, password)
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+        return pool
+
+    async def _reap_idle(self) -> None:
+        interval = max(getSettings().RCON_IDLE_TIMEOUT / 2, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            for key, pool in list(self._pools.items()):
+                await pool.close_idle()
+                if pool.empty:
+                    self._pools.pop(key, None)
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            await pool.close()
+
+
+rcon_pools = RconPoolRegistry()
+
+
+__all__ = [
+    "RconConnection",
+    "RconPool",
+    "RconPoolRegistry",
+    "rcon_pools",
+    "saving_paused",
+]
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import aiohttp
+from aiodocker.containers import DockerContainer
+from aiodocker.exceptions import DockerError
+
+from src.configuration import getSettings
+from src.exceptions import ServerNotReadyError, ServerStartError
+from src.metrics import SERVER_READY_SECONDS
+from src.server.index import ContainerIndex, ContainerState
+from src.server.logs import LineSplitter
+
+log = logging.getLogger(__name__)
+
+# Printed once the world is loaded: `[Server thread/INFO]: Done (4.2s)! ...`
+DONE_LINE = re.compile(r"\bDone \([^)]*\)!")
+
+TIMESTAMP = re.compile(
+    r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)$"
+)
+
+
+def parse_timestamp(value: str) -> float | None:
+    # Docker reports nanoseconds, which datetime does not parse.
+    match = TIMESTAMP.match(value)
+    if match is None:
+        return None
+    base, fraction, zone = match.groups()
+    moment = datetime.fromisoformat(base + ("+00:00" if zone == "Z" else zone))
+    if moment.year < 1970:
+        return None
+    return moment.timestamp() + (float(f"0.{fraction}") if fraction else 0.0)
+
+
+@dataclass(frozen=True)
+class Readiness:
+    started_at: float
+    ready_at: float
+    source: str
+
+    @property
+    def seconds(self) -> float:
+        return max(self.ready_at - self.started_at, 0.0)
+
+
+@dataclass
+class ReadyWatch:
+    healthy: asyncio.Future
+    task: asyncio.Task | None = None
+    waiters: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+class ReadinessTracker:
+    def __init__(
+        self,
+        index: ContainerIndex,
+        get_container: Callable[[str, str | None], Awaitable[DockerContainer]],
+        get_stream_container: Callable[[str, str | None], Awaitable[DockerContainer]],
+        max_wait: float | None = None,
+    ):
+        self.get_container = get_container
+        # Log follows last up to max_wait, so they stay off the bounded pool.
+        self.get_stream_container = get_stream_container
+        self.max_wait = max_wait or getSettings().READY_MAX_WAIT
+        self._watches: dict[str, ReadyWatch] = {}
+        index.listeners.append(self._on_change)
+
+    def _on_change(self, entry: ContainerState) -> None:
+        watch = self._watches.get(entry.uuid)
+        if watch is not None and entry.health == "healthy":
+            if not watch.healthy.done():
+                watch.healthy.set_result(time.time())
+
+    async def wait(self, uuid: str, node: str | None, timeout: float) -> Readiness:
+        # Everyone waiting on the same server shares one watcher.
+        uuid = str(uuid)
+        watch = self._watches.get(uuid)
+        if watch is None:
+            watch = self._watches[uuid] = ReadyWatch(
+                healthy=asyncio.get_running_loop().create_future()
+            )
+            watch.task = asyncio.create_task(self._watch(uuid, node, watch))
+            watch.task.add_done_callback(lambda task: self._finish(uuid, watch))
+
+        watch.waiters += 1
+        try:
+            async with asyncio.timeout(timeout):
+                return await asyncio.shield(watch.task)
+        except TimeoutError as e:
+            raise ServerNotReadyError(
+                f"Server '{uuid}' was not ready within {timeout} seconds"
+            ) from e
+        finally:
+            watch.waiters -= 1
+            if not watch.waiters and not watch.task.done():
+                # Nobody is left to answer, the next caller starts afresh.
+                self._discard(uuid, watch)
+                watch.task.cancel()
+
+    def _discard(self, uuid: str, watch: ReadyWatch) -> None:
+        if self._watches.get(uuid) is watch:
+            del self._watches[uuid]
+
+    def _finish(self, uuid: str, watch: ReadyWatch) -> None:
+        self._discard(uuid, watch)
+        if not watch.healthy.done():
+            watch.healthy.cancel()
+        if watch.task.cancelled() or watch.task.exception() is not None:
+            return
+        readiness = watch.task.result()
+        SERVER_READY_SECONDS.observe(readiness.seconds, source=readiness.source)
+        log.info(
+            f"Server '{uuid}' ready in {readiness.seconds:.1f}s "
+            f"(detected by {readiness.source})"
+        )
+
+    async def _watch(self, uuid: str, node: str | None, watch: ReadyWatch) -> Readiness:
+        try:
+            async with asyncio.timeout(self.max_wait):
+                container = await self.get_container(uuid, node)
+                state = (await container.show())["State"]
+                if not state.get("Running"):
+                    raise ServerStartError(f"Server '{uuid}' is not running")
+                started_at = parse_timestamp(state.get("StartedAt", ""))
+                started_at = started_at or watch.created_at
+                if (state.get("Health") or {}).get("Status") == "healthy":
+                    return Readiness(started_at, time.time(), "healthcheck")
+
+                follow = await self.get_stream_container(uuid, node)
+                logs = asyncio.create_task(self._scan_logs(uuid, follow, started_at))
+                try:
+                    await asyncio.wait(
+                        {logs, watch.healthy}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    logs.cancel()
+                if watch.healthy.done():
+                    return Readiness(started_at, watch.healthy.result(), "healthcheck")
+                return Readiness(started_at, logs.result(), "log")
+        except TimeoutError as e:
+            raise ServerNotReadyError(
+                f"Server '{uuid}' was not ready within {self.max_wait} seconds"
+            ) from e
+        except (DockerError, aiohttp.ClientError) as e:
+            raise ServerNotReadyError(f"Cannot watch server '{uuid}': {e}") from e
+
+    async def _scan_logs(
+        self, uuid: str, container: DockerContainer, since: float
+    ) -> float:
+        # Only the current run is read, an earlier "Done" line must not count.
+        splitter = LineSplitter()
+        while True:
+            try:
+                async for chunk in container.log(
+                    stdout=True, stderr=True, follow=True, since=since, timestamps=True
+                ):
+                    for line in splitter.feed(chunk):
+                        stamp, _, text = line.partition(" ")
+                        seen_at = parse_timestamp(stamp) or time.time()
+                        if DONE_LINE.search(text):
+                            return seen_at
+                        since = seen_at
+                break
+            except asyncio.TimeoutError:
+                continue
+        raise ServerStartError(f"Server '{uuid}' stopped before it was ready")
+
+    async def close(self) -> None:
+        tasks = [w.task for w in self._watches.values() if w.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watches.clear()
+
+
+__all__ = ["Readiness", "ReadinessTracker", "parse_timestamp"]
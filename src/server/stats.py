@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import math
+import time
+from array import array
+from typing import Callable
+
+import aiohttp
+from aiodocker import Docker
+from aiodocker.exceptions import DockerError
+
+from src.configuration import getSettings
+from src.exceptions import ServerManagerError
+from src.server.index import ContainerIndex, FleetIndex
+
+log = logging.getLogger(__name__)
+
+FIELDS = (
+    "cpu_percent",
+    "memory_bytes",
+    "net_rx_bps",
+    "net_tx_bps",
+    "block_read_bps",
+    "block_write_bps",
+)
+
+# Window label -> seconds.
+WINDOWS = {"1m": 60.0, "5m": 300.0, "15m": 900.0}
+
+
+def cpu_percent(data: dict) -> float:
+    cpu, precpu = data.get("cpu_stats") or {}, data.get("precpu_stats") or {}
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get(
+        "cpu_usage", {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    if cpu_delta <= 0 or system_delta <= 0:
+        return 0.0
+    cpus = cpu.get("online_cpus") or len(
+        cpu.get("cpu_usage", {}).get("percpu_usage") or [1]
+    )
+    return cpu_delta / system_delta * cpus * 100.0
+
+
+def memory_bytes(data: dict) -> float:
+    memory = data.get("memory_stats") or {}
+    details = memory.get("stats") or {}
+    # Page cache is reclaimable; cgroup v2 reports it as inactive_file.
+    cache = details.get("inactive_file", details.get("cache", 0))
+    return max(memory.get("usage", 0) - cache, 0)
+
+
+def io_totals(data: dict) -> tuple[int, int, int, int]:
+    rx = tx = read = write = 0
+    for network in (data.get("networks") or {}).values():
+        rx += network.get("rx_bytes", 0)
+        tx += network.get("tx_bytes", 0)
+    blkio = data.get("blkio_stats") or {}
+    for entry in blkio.get("io_service_bytes_recursive") or []:
+        op = entry.get("op", "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return rx, tx, read, write
+
+
+def sample(
+    data: dict,
+    totals: tuple[int, int, int, int],
+    previous: tuple[float, tuple[int, int, int, int]],
+    at: float,
+) -> dict[str, float]:
+    elapsed = at - previous[0]
+    rx, tx, read, write = (
+        max(current - last, 0) / elapsed for current, last in zip(totals, previous[1])
+    )
+    return {
+        "cpu_percent": cpu_percent(data),
+        "memory_bytes": memory_bytes(data),
+        "net_rx_bps": rx,
+        "net_tx_bps": tx,
+        "block_read_bps": read,
+        "block_write_bps": write,
+    }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class StatsBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = {name: array("d", bytes(8 * capacity)) for name in FIELDS}
+        self.head = 0
+        self.count = 0
+
+    def append(self, at: float, sample: dict[str, float]) -> None:
+        self.times[self.head] = at
+        for name in FIELDS:
+            self.values[name][self.head] = sample[name]
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def recent(self, name: str, since: float) -> list[float]:
+        values = self.values[name]
+        result = []
+        # Newest first, stopping at the first sample outside the window.
+        for offset in range(1, self.count + 1):
+            index = (self.head - offset) % self.capacity
+            if self.times[index] < since:
+                break
+            result.append(values[index])
+        return result
+
+    def latest(self, name: str) -> float | None:
+        if not self.count:
+            return None
+        return self.values[name][(self.head - 1) % self.capacity]
+
+    def aggregate(self, name: str, window: float, now: float) -> dict | None:
+        values = self.recent(name, now - window)
+        if not values:
+            return None
+        return {
+            "min": min(values),
+            "avg": sum(values) / len(values),
+            "max": max(values),
+            "p95": percentile(values, 0.95),
+        }
+
+
+class StatsCollector:
+    def __init__(
+        self,
+        docker_for: Callable[[str], Docker],
+        index: ContainerIndex | FleetIndex,
+        capacity: int | None = None,
+        interval: float | None = None,
+    ):
+        settings = getSettings()
+        # Streams are opened on the daemon that runs the container.
+        self.docker_for = docker_for
+        self.index = index
+        self.capacity = capacity or settings.STATS_BUFFER_SIZE
+        self.interval = interval or settings.STATS_RECONCILE_INTERVAL
+        self.buffers: dict[str, StatsBuffer] = {}
+        self._streams: dict[str, asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+
+    def get(self, uuid: str) -> StatsBuffer | None:
+        return self.buffers.get(str(uuid))
+
+    def summary(self, uuid: str) -> dict | None:
+        buffer = self.get(uuid)
+        if buffer is None:
+            return None
+        now = time.monotonic()
+        return {
+            label: {name: buffer.aggregate(name, window, now) for name in FIELDS}
+            for label, window in WINDOWS.items()
+        }
+
+    def heaviest(self, name: str, window: str, limit: int) -> list[tuple[str, float]]:
+        now = time.monotonic()
+        loads = []
+        for uuid, buffer in self.buffers.items():
+            aggregate = buffer.aggregate(name, WINDOWS[window], now)
+            if aggregate is not None:
+                loads.append((uuid, aggregate["avg"]))
+        loads.sort(key=lambda load: load[1], reverse=True)
+        return loads[:limit]
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        tasks = [self._task, *self._streams.values()]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in tasks if t is not None), return_exceptions=True
+        )
+        self._task = None
+        self._streams.clear()
+
+    def reconcile(self) -> None:
+        entries = {entry.uuid: entry for entry in self.index.all()}
+        for uuid, entry in entries.items():
+            if entry.state == "running" and uuid not in self._streams:
+                task = asyncio.create_task(self._collect(uuid, entry.container_id))
+                self._streams[uuid] = task
+                task.add_done_callback(
+                    lambda _, uuid=uuid: self._streams.pop(uuid, None)
+                )
+        for uuid in list(self._streams):
+            entry = entries.get(uuid)
+            if entry is None or entry.state != "running":
+                self._streams[uuid].cancel()
+        # History outlives a stop but not the container.
+        for uuid in list(self.buffers):
+            if uuid not in entries:
+                del self.buffers[uuid]
+
+    async def _run(self) -> None:
+        await self.index.ready.wait()
+        while True:
+            self.reconcile()
+            await asyncio.sleep(self.interval)
+
+    async def _collect(self, uuid: str, container_id: str) -> None:
+        buffer = self.buffers.get(uuid)
+        if buffer is None:
+            buffer = self.buffers[uuid] = StatsBuffer(self.capacity)
+        try:
+            container = self.docker_for(uuid).containers.container(container_id)
+        except ServerManagerError as e:
+            # Removed between the reconcile and now.
+            log.warning(f"Stats stream for server '{uuid}' not opened: {e}")
+            return
+        previous: tuple[float, tuple[int, int, int, int]] | None = None
+        while True:
+            try:
+                async for data in container.stats(stream=True):
+                    at = time.monotonic()
+                    totals = io_totals(data)
+                    # Rates need two samples, so the first one only primes them.
+                    if previous is not None and at > previous[0]:
+                        buffer.append(at, sample(data, totals, previous, at))
+                    previous = at, totals
+                return
+            except asyncio.TimeoutError:
+                # The client session caps request time; the stream is resumed.
+                continue
+            except (DockerError, aiohttp.ClientError) as e:
+                log.warning(f"Stats stream for server '{uuid}' ended: {e}")
+                return
+
+
+__all__ = ["FIELDS", "WINDOWS", "StatsBuffer", "StatsCollector"]
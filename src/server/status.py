@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import struct
+import time
+from dataclasses import dataclass
+
+from src.configuration import getSettings
+
+log = logging.getLogger(__name__)
+
+# Any version is accepted for a status request; -1 is the "unknown" marker.
+STATUS_PROTOCOL_VERSION = -1
+NEXT_STATE_STATUS = 1
+PACKET_STATUS = 0x00
+PACKET_PING = 0x01
+
+# Responses embed favicons as base64, but nothing legitimate comes near this.
+MAX_PACKET_LENGTH = 2**21
+
+_ushort = struct.Struct(">H")
+_long = struct.Struct(">q")
+
+
+def encode_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    value = 0
+    for shift in range(0, 35, 7):
+        (byte,) = await reader.readexactly(1)
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value - (1 << 32) if value & (1 << 31) else value
+    raise ValueError("VarInt is too long")
+
+
+def decode_varint(data: bytes, offset: int = 0) -> tuple[int, int]:
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return (value - (1 << 32) if value & (1 << 31) else value), offset
+    raise ValueError("VarInt is too long")
+
+
+def decode_string(data: bytes, offset: int = 0) -> tuple[str, int]:
+    length, offset = decode_varint(data, offset)
+    end = offset + length
+    if end > len(data):
+        raise ValueError("String runs past the packet")
+    return data[offset:end].decode("utf-8", "replace"), end
+
+
+def encode_string(value: str) -> bytes:
+    data = value.encode()
+    return encode_varint(len(data)) + data
+
+
+def encode_packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    length = await read_varint(reader)
+    if not 0 < length <= MAX_PACKET_LENGTH:
+        raise ValueError(f"Invalid packet length {length}")
+    body = await reader.readexactly(length)
+    packet_id, offset = decode_varint(body)
+    return packet_id, body[offset:]
+
+
+def flatten_text(component) -> str:
+    # The description is either a plain string or a chat component tree.
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(flatten_text(part) for part in component)
+    if isinstance(component, dict):
+        return component.get("text", "") + "".join(
+            flatten_text(part) for part in component.get("extra", [])
+        )
+    return ""
+
+
+@dataclass(frozen=True)
+class ServerStatus:
+    online: bool
+    latency_ms: float | None = None
+    motd: str | None = None
+    version: str | None = None
+    protocol: int | None = None
+    players_online: int | None = None
+    players_max: int | None = None
+    error: str | None = None
+
+
+def parse_status(data: dict, latency_ms: float) -> ServerStatus:
+    version = data.get("version") or {}
+    players = data.get("players") or {}
+    return ServerStatus(
+        online=True,
+        latency_ms=latency_ms,
+        motd=flatten_text(data.get("description", "")),
+        version=version.get("name"),
+        protocol=version.get("protocol"),
+        players_online=players.get("online"),
+        players_max=players.get("max"),
+    )
+
+
+async def ping(host: str, port: int, timeout: float) -> ServerStatus:
+    writer = None
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+            handshake = (
+                encode_varint(STATUS_PROTOCOL_VERSION)
+                + encode_string(host)
+                + _ushort.pack(port)
+                + encode_varint(NEXT_STATE_STATUS)
+            )
+            writer.write(encode_packet(0x00, handshake))
+            writer.write(encode_packet(PACKET_STATUS))
+            await writer.drain()
+
+            packet_id, payload = await read_packet(reader)
+            if packet_id != PACKET_STATUS:
+                raise ValueError(f"Unexpected packet {packet_id:#x}")
+            length, offset = decode_varint(payload)
+            data = json.loads(payload[offset : offset + length])
+
+            token = time.monotonic_ns()
+            started = time.perf_counter()
+            writer.write(encode_packet(PACKET_PING, _long.pack(token)))
+            await writer.drain()
+            packet_id, payload = await read_packet(reader)
+            latency_ms = (time.perf_counter() - started) * 1000
+            if packet_id != PACKET_PING or _long.unpack(payload[:8])[0] != token:
+                raise ValueError("Ping was not echoed")
+    except TimeoutError:
+        return ServerStatus(online=False, error="Timed out")
+    except (OSError, asyncio.IncompleteReadError) as e:
+        return ServerStatus(online=False, error=str(e) or type(e).__name__)
+    except (ValueError, IndexError, struct.error) as e:
+        return ServerStatus(online=False, error=f"Invalid response: {e}")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return parse_status(data, round(latency_ms, 2))
+
+
+class StatusProber:
+    def __init__(
+        self,
+        host: str | None = None,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+        ttl: float | None = None,
+    ):
+        settings = getSettings()
+        self.host = host or settings.SERVERS_HOST
+        self.timeout = timeout or settings.STATUS_TIMEOUT
+        self.ttl = settings.STATUS_CACHE_TTL if ttl is None else ttl
+        self._limit = asyncio.Semaphore(
+            max(concurrency or settings.STATUS_CONCURRENCY, 1)
+        )
+        # (host, port) -> (expires at, status)
+        self._cache: dict[tuple[str, int], tuple[float, ServerStatus]] = {}
+        self._pending: dict[tuple[str, int], asyncio.Task] = {}
+
+    def cached(self, port: int, host: str | None = None) -> ServerStatus | None:
+        entry = self._cache.get((host or self.host, port))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def _probe(self, key: tuple[str, int]) -> ServerStatus:
+        async with self._limit:
+            status = await ping(*key, self.timeout)
+        self._cache[key] = (time.monotonic() + self.ttl, status)
+        return status
+
+    def _forget(self, key: tuple[str, int], task: asyncio.Task) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
+
+    async def probe(self, port: int, host: str | None = None) -> ServerStatus:
+        status = self.cached(port, host)
+        if status is not None:
+            return status
+
+        # Concurrent dashboards asking for the same server share one probe.
+        key = (host or self.host, port)
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._probe(key))
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    async def probe_many(
+        self, ports: list[int], hosts: list[str] | None = None
+    ) -> list[ServerStatus]:
+        now = time.monotonic()
+        for key, (expires, _) in list(self._cache.items()):
+            if expires < now:
+                del self._cache[key]
+        hosts = hosts or [self.host] * len(ports)
+        return await asyncio.gather(
+            *(self.probe(port, host) for port, host in zip(ports, hosts))
+        )
+
+
+_status_prober: StatusProber | None = None
+
+
+def get_status_prober() -> StatusProber:
+    global _status_prober
+    if _status_prober is None:
+        _status_prober = StatusProber()
+    return _status_prober
+
+
+__all__ = ["ServerStatus", "StatusProber", "get_status_prober", "ping"]
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid as uuid_lib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from fastapi import Request
+
+from src.configuration import getSettings
+from src.exceptions import TemplateExistsError, TemplateNotFoundError
+from src.metrics import FILE_OPERATION_SECONDS, timed
+from src.server.rcon import RconPool, saving_paused
+from src.utils import CloneStats, clone_tree, ensure_server_dir, trash
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+# Per-instance state a new server must not inherit.
+EXCLUDED = frozenset({"logs", "crash-reports", ".hibernated"})
+
+
+async def getTemplates(request: Request) -> "TemplateStore":
+    return request.app.state.templates
+
+
+@dataclass
+class Template:
+    name: str
+    created_at: float
+    version: str | None = None
+    source: str | None = None
+
+
+class TemplateStore:
+    def __init__(
+        self,
+        root: Path | None = None,
+        servers_root: Path | None = None,
+        workers: int | None = None,
+        save_timeout: float | None = None,
+    ):
+        settings = getSettings()
+        servers_root = servers_root or Path(settings.SERVERS_DIR).resolve()
+        # On the servers' filesystem by default, so clones can be reflinks.
+        self.root = root or Path(settings.TEMPLATES_DIR or servers_root / ".templates")
+        self.workers = max(workers or settings.CLONE_WORKERS, 1)
+        self.save_timeout = save_timeout or settings.BACKUP_SAVE_TIMEOUT
+
+    def path(self, name: str) -> Path:
+        if not TEMPLATE_NAME.match(name):
+            raise TemplateNotFoundError(f"Template '{name}' not found")
+        return self.root / name
+
+    def _metadata(self, name: str) -> Path:
+        # Outside the tree, so it is never copied into a server, and in a
+        # directory no template can be named after: names never start with a
+        # dot.
+        return self.root / ".metadata" / f"{name}.json"
+
+    def _read(self, name: str) -> Template:
+        path = self.path(name)
+        if not path.is_dir():
+            raise TemplateNotFoundError(f"Template '{name}' not found")
+        try:
+            return Template(**json.loads(self._metadata(name).read_text()))
+        except (OSError, ValueError, TypeError):
+            # Put on disk by hand; only the directory is known.
+            return Template(name=name, created_at=path.stat().st_mtime)
+
+    def _list(self) -> list[Template]:
+        if not self.root.is_dir():
+            return []
+        templates = []
+        for path in sorted(self.root.iterdir()):
+            if path.is_dir() and TEMPLATE_NAME.match(path.name):
+                templates.append(self._read(path.name))
+        return templates
+
+    async def list_templates(self) -> list[Template]:
+        return await asyncio.to_thread(self._list)
+
+    async def get(self, name: str) -> Template:
+        return await asyncio.to_thread(self._read, name)
+
+    @timed(FILE_OPERATION_SECONDS, operation="server_clone")
+    async def copy(
+        self, source: Path, target: Path, rcon: RconPool | None = None
+    ) -> CloneStats:
+        started = time.monotonic()
+        async with saving_paused(rcon, self.save_timeout):
+            stats = await asyncio.to_thread(
+                clone_tree, source, target, self.workers, EXCLUDED
+            )
+        log.info(
+            f"Copied {stats.files} files ({stats.bytes} bytes) from {source} to "
+            f"{target} in {time.monotonic() - started:.2f}s: {stats.cloned} "
+            f"reflinked, {stats.copied} copied"
+        )
+        return stats
+
+    async def copy_server(
+        self, source: str, target: str, rcon: RconPool | None = None
+    ) -> CloneStats:
+        return await self.copy(
+            await ensure_server_dir(source), await ensure_server_dir(target), rcon
+        )
+
+    async def copy_template(self, name: str, target: str) -> CloneStats:
+        template = await self.get(name)
+        return await self.copy(
+            self.path(template.name), await ensure_server_dir(target)
+        )
+
+    async def create(
+        self,
+        name: str,
+        server: str,
+        version: str | None,
+        rcon: RconPool | None = None,
+    ) -> Template:
+        path = self.path(name)
+        if await asyncio.to_thread(path.exists):
+            raise TemplateExistsError(f"Template '{name}' already exists")
+
+        template = Template(
+            name=name, created_at=time.time(), version=version, source=server
+        )
+        # Built aside and renamed in, a clone never sees half a template.
+        staging = self.root / f".{name}.{uuid_lib.uuid4().hex}"
+        try:
+            await self.copy(await ensure_server_dir(server), staging, rcon)
+            await asyncio.to_thread(self._publish, template, staging)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, staging, True)
+        return template
+
+    def _publish(self, template: Template, staging: Path) -> None:
+        try:
+            os.rename(staging, self.path(template.name))
+        except OSError as e:
+            # Taken by a concurrent create: rename only replaces empty ones.
+            raise TemplateExistsError(
+                f"Template '{template.name}' already exists"
+            ) from e
+        metadata = self._metadata(template.name)
+        metadata.parent.mkdir(exist_ok=True)
+        metadata.write_text(json.dumps(asdict(template)))
+
+    async def delete(self, name: str) -> None:
+        path = self.path(name)
+        if not await asyncio.to_thread(path.is_dir):
+            raise TemplateNotFoundError(f"Template '{name}' not found")
+        try:
+            # Gone from the listing at once; the files go in the background.
+            trash.move_to_trash(path)
+        except OSError:
+            # TEMPLATES_DIR on another filesystem than the trash.
+            await asyncio.to_thread(shutil.rmtree, path)
+        await asyncio.to_thread(self._metadata(name).unlink, True)
+
+
+__all__ = [
+    "EXCLUDED",
+    "Template",
+    "TemplateStore",
+    "getTemplates",
+]
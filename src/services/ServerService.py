@@ -1,37 +1,102 @@
+import uuid
+from dataclasses import replace
+from typing import Awaitable, Callable, Optional
+
 from fastapi import HTTPException, Response
 from pydantic import UUID4
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.ServerModel import ServerModel
+from src.repositories.PortRepository import PortRepository
+from src.repositories.ServerCache import getServerCache, notifyServerChanged
 from src.repositories.ServerRepository import ServerRepository
-from src.schemas.pydantic.ServerSchema import ServerCreateSchema
-from src.utils import generate_password
+from src.schemas.pydantic.ServerSchema import (
+    ServerCreateSchema,
+    ServerResourcesSchema,
+)
+from src.utils import (
+    CUSTOM_PROFILE,
+    DEFAULT_PROFILE,
+    ResourceLimits,
+    generate_password,
+    resolve_resources,
+    stored_limits,
+)
+
+Placement = Callable[[int, int, str, ResourceLimits], Awaitable[str]]
 
 
 class ServerService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.serverRepo = ServerRepository(session)
+        self.portRepo = PortRepository(session)
+
+    def resolveResources(
+        self, resources: ServerResourcesSchema, current=None
+    ) -> tuple[str, ResourceLimits]:
+        overrides = resources.model_dump(
+            include={"memory_mb", "cpus", "cpuset", "pids_limit"}
+        )
+        try:
+            if resources.profile is not None:
+                profile = resources.profile.value
+                return profile, resolve_resources(profile, **overrides)
 
-    async def addServer(self, server: ServerCreateSchema) -> ServerModel:
-        used_ports = await self.serverRepo.getAllServersPorts()
-        all_ports = [(i, i + 100) for i in range(25500, 25600)]
-        free_ports = list(set(used_ports).symmetric_difference(all_ports))
+            limits = stored_limits(current) if current is not None else None
+            if limits is None:
+                return DEFAULT_PROFILE, resolve_resources(DEFAULT_PROFILE, **overrides)
 
-        port, rcon_port = free_ports[0]
+            # Tweaking a stored profile turns it into a custom one.
+            changes = {k: v for k, v in overrides.items() if v is not None}
+            profile = CUSTOM_PROFILE if changes else current.profile
+            return profile, replace(limits, **changes)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def addServer(
+        self,
+        server: ServerCreateSchema,
+        place: Optional[Placement] = None,
+        current: Optional[ServerModel] = None,
+    ) -> ServerModel:
+        # A clone keeps the limits of its source unless told otherwise.
+        profile, limits = self.resolveResources(server, current=current)
+        serverUuid = uuid.uuid4()
+        try:
+            ports = await self.portRepo.reservePort(serverUuid)
+            # The node is chosen while the port is still held, so a refused
+            # placement releases it with the rollback.
+            node = (
+                await place(ports.port, ports.rcon_port, server.version, limits)
+                if place
+                else None
+            )
+        except Exception:
+            await self.session.rollback()
+            raise
 
         newServer = ServerModel(
-            port=port,
-            rcon_port=rcon_port,
+            uuid=serverUuid,
+            port=ports.port,
+            rcon_port=ports.rcon_port,
             rcon_password=generate_password(10),
             version=server.version,
+            node=node,
+            profile=profile,
+            memory_mb=limits.memory_mb,
+            cpus=limits.cpus,
+            cpuset=limits.cpuset,
+            pids_limit=limits.pids_limit,
         )
 
         self.session.add(newServer)
 
         try:
+            await notifyServerChanged(self.session, serverUuid)
             await self.session.commit()
+            getServerCache().invalidate(serverUuid)
             await self.session.refresh(newServer)
             return newServer
         except IntegrityError:
@@ -40,6 +105,27 @@ class ServerService:
                 status_code=500, detail="Database error while creating server"
             )
 
+    async def setResources(
+        self, server: ServerModel, profile: str, limits: ResourceLimits
+    ) -> ServerModel:
+        server.profile = profile
+        server.memory_mb = limits.memory_mb
+        server.cpus = limits.cpus
+        server.cpuset = limits.cpuset
+        server.pids_limit = limits.pids_limit
+
+        try:
+            await notifyServerChanged(self.session, server.uuid)
+            await self.session.commit()
+            getServerCache().invalidate(server.uuid)
+            await self.session.refresh(server)
+            return server
+        except SQLAlchemyError:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=500, detail="Database error while updating server"
+            )
+
     async def removeServer(self, uuid: UUID4) -> Response:
         server = await self.serverRepo.getServerByUuid(uuid)
         if not server:
@@ -48,8 +134,11 @@ class ServerService:
             )
 
         try:
+            await self.portRepo.releasePort(server.uuid)
             await self.session.delete(server)
+            await notifyServerChanged(self.session, server.uuid)
             await self.session.commit()
+            getServerCache().invalidate(server.uuid)
             return Response(status_code=200)
 
         except IntegrityError:
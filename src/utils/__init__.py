@@ -1,9 +1,32 @@
-from .container_cfg import IMAGE_NAME, get_container_config
+from .clone import CloneStats, clone_file, clone_tree
+from .container_cfg import (
+    IMAGE_NAME,
+    MANAGED_LABEL,
+    UUID_LABEL,
+    get_container_config,
+    image_for_version,
+)
 from .generate_creds import generate_password
+from .pagination import decode_cursor, encode_cursor
+from .resources import (
+    CUSTOM_PROFILE,
+    DEFAULT_PROFILE,
+    PROFILES,
+    ResourceLimits,
+    host_config_limits,
+    resolve_resources,
+    stored_limits,
+)
 from .work_with_files import (
+    clear_hibernated,
+    content_cache,
     create_properties_from_template,
     ensure_server_dir,
+    list_hibernated,
+    mark_hibernated,
+    properties_store,
     remove_server_dir,
+    trash,
     update_properties,
 )
 
@@ -11,8 +34,29 @@ __all__ = [
     "ensure_server_dir",
     "remove_server_dir",
     "get_container_config",
+    "image_for_version",
     "IMAGE_NAME",
+    "MANAGED_LABEL",
+    "UUID_LABEL",
     "generate_password",
     "create_properties_from_template",
     "update_properties",
+    "properties_store",
+    "trash",
+    "content_cache",
+    "clone_file",
+    "clone_tree",
+    "CloneStats",
+    "encode_cursor",
+    "decode_cursor",
+    "mark_hibernated",
+    "clear_hibernated",
+    "list_hibernated",
+    "ResourceLimits",
+    "PROFILES",
+    "CUSTOM_PROFILE",
+    "DEFAULT_PROFILE",
+    "resolve_resources",
+    "host_config_limits",
+    "stored_limits",
 ]
@@ -1,15 +1,52 @@
+import re
+
+from .resources import ResourceLimits, host_config_limits, jvm_env
+
 IMAGE_NAME = "itzg/minecraft-server"
 
+# itzg/minecraft-server tags differ by bundled Java; old Minecraft releases do
+# not run on the Java shipped in `latest`.
+JAVA_IMAGE_TAGS = [
+    ((1, 17), "java8"),
+    ((1, 20, 5), "java17"),
+]
+DEFAULT_IMAGE_TAG = "latest"
+
+# The user itzg/minecraft-server runs the server as.
+IMAGE_UID = 1000
+IMAGE_GID = 1000
+# Unpacked by the server jar for its version and never written again; shared
+# read-only between the servers on that version.
+SHARED_DIRS = ("libraries", "versions")
+
+MANAGED_LABEL = "docker-servers-api.managed"
+UUID_LABEL = "docker-servers-api.uuid"
+
+
+def image_for_version(version: str) -> str:
+    match = re.fullmatch(r"1\.(\d+)(?:\.(\d+))?", version.strip())
+    if match is None:
+        return f"{IMAGE_NAME}:{DEFAULT_IMAGE_TAG}"
+
+    parsed = (1, int(match[1]), int(match[2] or 0))
+    for below, tag in JAVA_IMAGE_TAGS:
+        if parsed < below:
+            return f"{IMAGE_NAME}:{tag}"
+    return f"{IMAGE_NAME}:{DEFAULT_IMAGE_TAG}"
+
 
 def get_container_config(
+    uuid: str,
     server_dir: str,
     port: int,
     rcon_port: int,
     rcon_password: str,
     version: str = "latest",
+    limits: ResourceLimits | None = None,
+    shared_dir: str | None = None,
 ) -> dict:
     container_config = {
-        "Image": IMAGE_NAME,
+        "Image": image_for_version(version),
         "Env": [
             "EULA=TRUE",
             "ENABLE_RCON=true",
@@ -25,9 +62,29 @@ def get_container_config(
             },
         },
         "ExposedPorts": {"25565/tcp": {}, "25575/tcp": {}},
+        "Labels": {MANAGED_LABEL: "true", UUID_LABEL: str(uuid)},
     }
 
+    if shared_dir is not None:
+        container_config["HostConfig"]["Binds"].extend(
+            f"{shared_dir}/{name}:/data/{name}:ro" for name in SHARED_DIRS
+        )
+
+    # Servers created before profiles existed run unlimited.
+    if limits is not None:
+        container_config["Env"].extend(jvm_env(limits))
+        container_config["HostConfig"].update(host_config_limits(limits))
+
     return container_config
 
 
-__all__ = ["get_container_config", "IMAGE_NAME"]
+__all__ = [
+    "get_container_config",
+    "image_for_version",
+    "IMAGE_NAME",
+    "IMAGE_UID",
+    "IMAGE_GID",
+    "SHARED_DIRS",
+    "MANAGED_LABEL",
+    "UUID_LABEL",
+]
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.configuration import getSettings
+from src.metrics import (
+    CONTENT_CACHE_BYTES,
+    CONTENT_CACHE_FILES,
+    FILE_OPERATION_SECONDS,
+    timed,
+)
+from src.utils.clone import clone_file
+from src.utils.container_cfg import IMAGE_GID, IMAGE_UID, SHARED_DIRS
+
+log = logging.getLogger(__name__)
+
+# Installed by the image for a given version; a new server on that version
+# gets all of them before its first start, the shared directories mounted
+# read-only and the server jar as a copy of its own.
+VERSION_PATTERNS = ("*.jar", "libraries/**/*", "versions/**/*")
+
+
+def file_digest(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def in_shared_dir(relpath: str) -> bool:
+    return Path(relpath).parts[0] in SHARED_DIRS
+
+
+def chown_tree(path: Path, uid: int, gid: int) -> None:
+    for root, directories, files in os.walk(path):
+        for name in directories + files:
+            os.lchown(os.path.join(root, name), uid, gid)
+    os.lchown(path, uid, gid)
+
+
+def clone_atomic(source: Path, target: Path) -> bool:
+    # Never a hard link: the image rewrites these files in place on version
+    # changes, and container root ignores mode bits, so a shared inode would
+    # change under every other server. A reflink shares the blocks, not the
+    # inode. Swapped in by rename, a running reader keeps the file it has open.
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+    try:
+        cloned = clone_file(source, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return cloned
+
+
+@dataclass
+class ContentCacheStats:
+    objects: int = 0
+    referenced_bytes: int = 0
+    unreferenced_bytes: int = 0
+
+
+class ContentCache:
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stats = ContentCacheStats()
+        self._lock = asyncio.Lock()
+        self._evicting: asyncio.Task | None = None
+
+    @property
+    def objects(self) -> Path:
+        return self.root / "objects"
+
+    @property
+    def manifests(self) -> Path:
+        return self.root / "manifests"
+
+    @property
+    def trees(self) -> Path:
+        return self.root / "trees"
+
+    @property
+    def mounts(self) -> Path:
+        # One file per server, naming the tree it mounts.
+        return self.root / "mounts"
+
+    async def start(self) -> None:
+        settings = getSettings()
+        if self.root is None:
+            self.root = Path(settings.SERVERS_DIR).resolve() / ".cache"
+        if self.max_bytes is None:
+            self.max_bytes = settings.CONTENT_CACHE_MAX_BYTES
+        CONTENT_CACHE_BYTES.set_function(
+            lambda: [
+                ({"state": "referenced"}, self.stats.referenced_bytes),
+                ({"state": "unreferenced"}, self.stats.unreferenced_bytes),
+            ]
+        )
+        # Stats every object; the API does not wait for it to come up.
+        self._evicting = asyncio.create_task(self._evict_locked())
+
+    async def close(self) -> None:
+        if self._evicting is not None:
+            self._evicting.cancel()
+            await asyncio.gather(self._evicting, return_exceptions=True)
+            self._evicting = None
+
+    async def _evict_locked(self) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._evict)
+
+    def _object(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _manifest(self, version: str) -> Path:
+        return self.manifests / f"{re.sub(r'[^A-Za-z0-9._-]', '_', version)}.json"
+
+    def _read_manifest(self, version: str) -> dict[str, str]:
+        try:
+            return json.loads(self._manifest(version).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, version: str, files: dict[str, str]) -> None:
+        path = self._manifest(version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp.write_text(json.dumps(files, sort_keys=True))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # The access time orders eviction; set by hand, noatime mounts or not.
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except OSError:
+            pass
+
+    @timed(FILE_OPERATION_SECONDS, operation="cache_populate")
+    async def populate(self, server_path: Path, version: str) -> Path | None:
+        # Returns the tree to mount over the server's shared directories.
+        async with self._lock:
+            return await asyncio.to_thread(self._populate, server_path, version)
+
+    def _populate(self, server_path: Path, version: str) -> Path | None:
+        manifest = {
+            relpath: digest
+            for relpath, digest in self._read_manifest(version).items()
+            if not Path(relpath).is_absolute() and ".." not in Path(relpath).parts
+        }
+        tree = self._tree(manifest)
+        if tree is not None:
+            try:
+                # The image takes over a /data it does not own with chown -R,
+                # which fails on the read-only mounts.
+                os.chown(server_path, IMAGE_UID, IMAGE_GID)
+            except PermissionError:
+                tree = None
+
+        copied = 0
+        for relpath, digest in manifest.items():
+            target = server_path / relpath
+            if target.exists() or (tree is not None and in_shared_dir(relpath)):
+                continue
+            source = self._object(digest)
+            try:
+                clone_atomic(source, target)
+            except FileNotFoundError:
+                # Evicted since the manifest was written; the image downloads it.
+                CONTENT_CACHE_FILES.inc(result="miss")
+                continue
+            self._touch(source)
+            CONTENT_CACHE_FILES.inc(result="hit")
+            copied += 1
+        if copied:
+            log.info(f"Copied {copied} cached files for version {version}")
+        if tree is not None:
+            chown_tree(server_path, IMAGE_UID, IMAGE_GID)
+            self.mounts.mkdir(parents=True, exist_ok=True)
+            (self.mounts / server_path.name).write_text(tree.name)
+        return tree
+
+    def _tree(self, manifest: dict[str, str]) -> Path | None:
+        # One copy of a version's shared directories for all of its servers.
+        # The files are hard links to the objects: both belong to the cache,
+        # and containers only ever get them read-only.
+        shared = {r: d for r, d in manifest.items() if in_shared_dir(r)}
+        if not shared:
+            return None
+        # Named by content, a manifest that grows gets a tree of its own.
+        name = hashlib.sha256(json.dumps(shared, sort_keys=True).encode())
+        tree = self.trees / name.hexdigest()[:32]
+        if not tree.is_dir():
+            staging = self.trees / f".{tree.name}.{uuid.uuid4().hex}"
+            try:
+                for directory in SHARED_DIRS:
+                    (staging / directory).mkdir(parents=True)
+                for relpath, digest in shared.items():
+                    target = staging / relpath
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.link(self._object(digest), target)
+                os.rename(staging, tree)
+            except FileNotFoundError:
+                # Evicted since the manifest was written; every server on the
+                # version downloads its own until one is harvested again.
+                shutil.rmtree(staging, ignore_errors=True)
+                CONTENT_CACHE_FILES.inc(len(shared), result="miss")
+                return None
+        for digest in set(shared.values()):
+            self._touch(self._object(digest))
+        CONTENT_CACHE_FILES.inc(len(shared), result="hit")
+        return tree
+
+    def release(self, server_name: str) -> None:
+        # Its tree can be evicted once no server mounts it.
+        (self.mounts / server_name).unlink(missing_ok=True)
+
+    @timed(FILE_OPERATION_SECONDS, operation="cache_harvest")
+    async def harvest(self, server_path: Path, version: str) -> None:
+        # Hashing runs outside the lock, it is the slow part.
+        found = await asyncio.to_thread(self._scan, server_path, version)
+        async with self._lock:
+            await asyncio.to_thread(self._store_all, server_path, version, found)
+            await asyncio.to_thread(self._evict)
+
+    def _scan(
+        self, server_path: Path, version: str
+    ) -> list[tuple[str, str, os.stat_result]]:
+        found = []
+        for pattern in VERSION_PATTERNS:
+            for path in server_path.glob(pattern):
+                if path.is_symlink() or not path.is_file():
+                    continue
+                if path.name.startswith("."):
+                    continue
+                relpath = path.relative_to(server_path).as_posix()
+                stat = path.stat()
+                found.append((relpath, file_digest(path), stat))
+        return found
+
+    def _store_all(
+        self,
+        server_path: Path,
+        version: str,
+        found: list[tuple[str, str, os.stat_result]],
+    ) -> None:
+        stored = {}
+        for relpath, digest, stat in found:
+            path = server_path / relpath
+            try:
+                current = path.stat()
+                if (current.st_size, current.st_mtime_ns) != (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    # Changed while it was hashed, the digest cannot be trusted.
+                    continue
+                self._store(path, digest)
+            except OSError as e:
+                log.warning(f"Cannot cache {path}: {e}")
+                continue
+            stored[relpath] = digest
+        if stored:
+            # A server with the shared directories mounted finds only its own
+            # files; what others found for the version stays listed.
+            self._write_manifest(version, self._read_manifest(version) | stored)
+
+    def _store(self, path: Path, digest: str) -> None:
+        # The object is the cache's own copy; the server keeps its file.
+        source = self._object(digest)
+        if not source.exists():
+            clone_atomic(path, source)
+            if file_digest(source) != digest:
+                # Written to while it was copied.
+                source.unlink(missing_ok=True)
+                raise OSError(f"{path} changed while it was cached")
+        elif os.path.samefile(source, path):
+            # Hard-linked in before objects were copies: the server gets an
+            # inode of its own back, writable again.
+            clone_atomic(source, path)
+            os.chmod(path, path.stat().st_mode | 0o200)
+        self._touch(source)
+
+    def _references(self) -> dict[str, int]:
+        # How many version manifests list each object.
+        references: dict[str, int] = {}
+        for manifest in self.manifests.glob("*.json"):
+            try:
+                digests = json.loads(manifest.read_text()).values()
+            except (OSError, ValueError):
+                continue
+            for digest in set(digests):
+                references[digest] = references.get(digest, 0) + 1
+        return references
+
+    def _mounted(self) -> set[str]:
+        mounted = set()
+        for path in self.mounts.glob("*"):
+            try:
+                mounted.add(path.read_text().strip())
+            except OSError:
+                continue
+        return mounted
+
+    def _evict(self) -> None:
+        # Objects no manifest lists go first, then those of the versions
+        # least recently used; a new server on an evicted one downloads it.
+        # An object still linked into a mounted tree would free nothing.
+        references = self._references()
+        stats = ContentCacheStats()
+        candidates = []
+        for path in self.objects.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            stats.objects += 1
+            referenced = references.get(path.name, 0) > 0
+            if referenced:
+                stats.referenced_bytes += stat.st_size
+            else:
+                stats.unreferenced_bytes += stat.st_size
+            candidates.append((referenced, stat.st_atime, stat.st_size, path))
+
+        candidates.sort()
+        total = stats.referenced_bytes + stats.unreferenced_bytes
+        if total > self.max_bytes:
+            # Rebuilt from the objects on the next populate, if they are left.
+            mounted = self._mounted()
+            for tree in self.trees.glob("*"):
+                if tree.name not in mounted:
+                    shutil.rmtree(tree, ignore_errors=True)
+        for referenced, _, size, path in candidates:
+            if total <= self.max_bytes:
+                break
+            try:
+                if path.stat().st_nlink > 1:
+                    continue
+            except FileNotFoundError:
+                continue
+            path.unlink(missing_ok=True)
+            stats.objects -= 1
+            if referenced:
+                stats.referenced_bytes -= size
+            else:
+                stats.unreferenced_bytes -= size
+            total -= size
+            log.info(f"Evicted {path.name} from the content cache")
+        self.stats = stats
+
+
+__all__ = ["ContentCache", "ContentCacheStats", "clone_atomic", "file_digest"]
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(order_by: str, row) -> str:
+    key = [row.id]
+    if order_by == "created_at":
+        key.insert(0, row.created_at.isoformat())
+    payload = json.dumps({"o": order_by, "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if payload["o"] != order_by:
+            raise ValueError(f"Cursor was issued for order_by={payload['o']}")
+        key = payload["k"]
+        if order_by == "created_at":
+            return datetime.fromisoformat(key[0]), int(key[1])
+        return (int(key[0]),)
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    except ValueError as e:
+        raise ValueError(f"Malformed cursor: {e}") from e
+
+
+__all__ = ["encode_cursor", "decode_cursor"]
@@ -0,0 +1,138 @@
+from dataclasses import dataclass, replace
+
+CUSTOM_PROFILE = "custom"
+DEFAULT_PROFILE = "medium"
+DEFAULT_PIDS_LIMIT = 1024
+
+# Heap share of the container limit; the rest goes to metaspace, thread stacks,
+# direct buffers and native allocations. The JVM reads the limit at start, so
+# a live update is picked up by the next restart.
+HEAP_PERCENT = 75
+
+# Aikar's flags: G1 with short pauses and a young generation sized for the
+# server's short-lived allocations.
+G1_FLAGS = (
+    "-XX:+UseG1GC",
+    "-XX:+ParallelRefProcEnabled",
+    "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions",
+    "-XX:+DisableExplicitGC",
+    "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5",
+    "-XX:G1MixedGCCountTarget=4",
+    "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5",
+    "-XX:SurvivorRatio=32",
+    "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1",
+)
+G1_SMALL_HEAP_FLAGS = (
+    "-XX:G1NewSizePercent=30",
+    "-XX:G1MaxNewSizePercent=40",
+    "-XX:G1HeapRegionSize=8M",
+    "-XX:G1ReservePercent=20",
+    "-XX:InitiatingHeapOccupancyPercent=15",
+)
+G1_LARGE_HEAP_FLAGS = (
+    "-XX:G1NewSizePercent=40",
+    "-XX:G1MaxNewSizePercent=50",
+    "-XX:G1HeapRegionSize=16M",
+    "-XX:G1ReservePercent=15",
+    "-XX:InitiatingHeapOccupancyPercent=20",
+)
+LARGE_HEAP_MB = 12 * 1024
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    memory_mb: int
+    cpus: float
+    cpuset: str | None = None
+    pids_limit: int = DEFAULT_PIDS_LIMIT
+
+
+PROFILES = {
+    "small": ResourceLimits(memory_mb=2048, cpus=1.0, pids_limit=512),
+    "medium": ResourceLimits(memory_mb=4096, cpus=2.0),
+    "large": ResourceLimits(memory_mb=8192, cpus=4.0, pids_limit=2048),
+}
+
+
+def resolve_resources(
+    profile: str,
+    memory_mb: int | None = None,
+    cpus: float | None = None,
+    cpuset: str | None = None,
+    pids_limit: int | None = None,
+) -> ResourceLimits:
+    # Named profiles are defaults, anything given explicitly wins.
+    if profile == CUSTOM_PROFILE:
+        if memory_mb is None or cpus is None:
+            raise ValueError("A custom profile needs memory_mb and cpus")
+        base = ResourceLimits(memory_mb=memory_mb, cpus=cpus)
+    elif profile in PROFILES:
+        base = PROFILES[profile]
+    else:
+        raise ValueError(f"Unknown resource profile '{profile}'")
+
+    overrides = {
+        "memory_mb": memory_mb,
+        "cpus": cpus,
+        "cpuset": cpuset,
+        "pids_limit": pids_limit,
+    }
+    return replace(base, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def stored_limits(server) -> ResourceLimits | None:
+    if server.memory_mb is None or server.cpus is None:
+        return None
+    return ResourceLimits(
+        memory_mb=server.memory_mb,
+        cpus=server.cpus,
+        cpuset=server.cpuset,
+        pids_limit=server.pids_limit or DEFAULT_PIDS_LIMIT,
+    )
+
+
+def host_config_limits(limits: ResourceLimits) -> dict:
+    memory = limits.memory_mb * 2**20
+    host_config = {
+        "Memory": memory,
+        # Equal to Memory: a swapping JVM stalls every tick.
+        "MemorySwap": memory,
+        "NanoCpus": int(limits.cpus * 1e9),
+        "PidsLimit": limits.pids_limit,
+    }
+    if limits.cpuset:
+        host_config["CpusetCpus"] = limits.cpuset
+    return host_config
+
+
+def jvm_env(limits: ResourceLimits) -> list[str]:
+    heap_flags = (
+        G1_LARGE_HEAP_FLAGS
+        if limits.memory_mb * HEAP_PERCENT // 100 >= LARGE_HEAP_MB
+        else G1_SMALL_HEAP_FLAGS
+    )
+    flags = (
+        f"-XX:InitialRAMPercentage={HEAP_PERCENT}",
+        f"-XX:MaxRAMPercentage={HEAP_PERCENT}",
+        *G1_FLAGS,
+        *heap_flags,
+    )
+    # An empty MEMORY keeps the image from passing -Xms/-Xmx, so the heap
+    # follows the container limit.
+    return ["MEMORY=", f"JVM_XX_OPTS={' '.join(flags)}"]
+
+
+__all__ = [
+    "CUSTOM_PROFILE",
+    "DEFAULT_PROFILE",
+    "PROFILES",
+    "ResourceLimits",
+    "host_config_limits",
+    "jvm_env",
+    "resolve_resources",
+    "stored_limits",
+]
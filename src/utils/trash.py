@@ -0,0 +1,115 @@
+import asyncio
+import ctypes
+import logging
+import os
+import platform
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.configuration import getSettings
+
+log = logging.getLogger(__name__)
+
+# ioprio_set(2) has no libc wrapper; syscall numbers per architecture.
+IOPRIO_SET_SYSCALLS = {"x86_64": 251, "aarch64": 30}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+
+def lower_io_priority() -> None:
+    # Runs in each worker thread; on Linux both calls apply to the calling
+    # thread only, so the event loop keeps its priority.
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except (AttributeError, OSError):
+        pass
+
+    syscall = IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if syscall is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(
+            syscall,
+            IOPRIO_WHO_PROCESS,
+            tid,
+            IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT,
+        )
+    except (AttributeError, OSError):
+        pass
+
+
+class TrashCollector:
+    def __init__(self, trash_dir: Path | None = None, workers: int | None = None):
+        self.trash_dir = trash_dir
+        self.workers = workers
+        self._queue: asyncio.Queue[Path] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def start(self) -> None:
+        settings = getSettings()
+        if self.trash_dir is None:
+            self.trash_dir = Path(settings.SERVERS_DIR).resolve() / ".trash"
+        self.workers = max(self.workers or settings.TRASH_WORKERS, 1)
+        self.trash_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="trash",
+            initializer=lower_io_priority,
+        )
+
+        # Whatever is still here was renamed before a crash or shutdown.
+        leftovers = list(self.trash_dir.iterdir())
+        for path in leftovers:
+            self._queue.put_nowait(path)
+        if leftovers:
+            log.info(f"Recovered {len(leftovers)} entries from trash")
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def move_to_trash(self, path: Path) -> Path | None:
+        target = self.trash_dir / f"{path.name}.{uuid.uuid4().hex}"
+        try:
+            self.trash_dir.mkdir(parents=True, exist_ok=True)
+            os.rename(path, target)
+        except FileNotFoundError:
+            return None
+        self._queue.put_nowait(target)
+        return target
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            path = await self._queue.get()
+            try:
+                await loop.run_in_executor(self._executor, self._remove, path)
+            except Exception as e:
+                log.error(f"Cannot remove {path} from trash: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+        log.info(f"Removed {path}")
+
+
+__all__ = ["TrashCollector"]
@@ -1,56 +1,172 @@
-import shutil
+import asyncio
+import os
+import tempfile
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 import javaproperties
 
 from src.configuration import getSettings
+from src.metrics import FILE_OPERATION_SECONDS, timed
+from src.utils.content_cache import ContentCache
+from src.utils.trash import TrashCollector
 
-settings = getSettings()
+PROPERTIES_FILE = "server.properties"
+# Holds the game port of a server stopped for being idle.
+HIBERNATION_MARKER = ".hibernated"
 
-server_dir = Path(settings.SERVERS_DIR).resolve()
-base_dir = Path(settings.BASE_DIR).resolve()
-template_path = base_dir / "static" / "server.properties.template"
+trash = TrashCollector()
+content_cache = ContentCache()
 
 
+@lru_cache
+def servers_root() -> Path:
+    return Path(getSettings().SERVERS_DIR).resolve()
+
+
+@lru_cache
+def template_path() -> Path:
+    base_dir = Path(getSettings().BASE_DIR).resolve()
+    return base_dir / "static" / "server.properties.template"
+
+
+@timed(FILE_OPERATION_SECONDS, operation="ensure_server_dir")
 async def ensure_server_dir(server_name: str) -> Path:
-    server_path = server_dir / server_name
+    server_path = servers_root() / server_name
     server_path.mkdir(parents=True, exist_ok=True)
     return server_path
 
 
+@timed(FILE_OPERATION_SECONDS, operation="remove_server_dir")
 async def remove_server_dir(server_name: str) -> None:
-    server_path = server_dir / server_name
-    if server_path.exists():
-        shutil.rmtree(server_path)
+    trash.move_to_trash(servers_root() / server_name)
+    properties_store.forget(server_name)
+    content_cache.release(server_name)
+
+
+def mark_hibernated(server_name: str, port: int) -> None:
+    (servers_root() / server_name / HIBERNATION_MARKER).write_text(str(port))
+
+
+def clear_hibernated(server_name: str) -> bool:
+    try:
+        (servers_root() / server_name / HIBERNATION_MARKER).unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def list_hibernated() -> dict[str, int]:
+    hibernated = {}
+    for marker in servers_root().glob(f"*/{HIBERNATION_MARKER}"):
+        try:
+            hibernated[marker.parent.name] = int(marker.read_text())
+        except (OSError, ValueError):
+            continue
+    return hibernated
+
+
+def write_atomic(path: Path, props: dict) -> os.stat_result:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        # The server inside the container must keep being able to read it.
+        try:
+            try:
+                current = path.stat()
+                os.fchmod(fd, current.st_mode & 0o777)
+            except FileNotFoundError:
+                # A new file belongs to whoever owns the server directory.
+                current = path.parent.stat()
+                os.fchmod(fd, 0o644)
+            os.fchown(fd, current.st_uid, current.st_gid)
+        except PermissionError:
+            pass
+
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            javaproperties.dump(props, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path.stat()
+
+
+class PropertiesStore:
+    def __init__(self):
+        # server name -> (mtime_ns, size, parsed properties)
+        self._cache: dict[str, tuple[int, int, dict]] = {}
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def _load(self, server_name: str, path: Path) -> dict:
+        stat = path.stat()
+        cached = self._cache.get(server_name)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return dict(cached[2])
+
+        with path.open("rb") as f:
+            props = javaproperties.load(f)
+        self._cache[server_name] = (stat.st_mtime_ns, stat.st_size, props)
+        return dict(props)
+
+    def _store(self, server_name: str, path: Path, props: dict) -> None:
+        stat = write_atomic(path, props)
+        self._cache[server_name] = (stat.st_mtime_ns, stat.st_size, props)
+
+    def _update(self, server_name: str, path: Path, config_values: dict) -> None:
+        props = self._load(server_name, path)
+        for k, v in config_values.items():
+            if v is not None:
+                props[k.replace("_", "-")] = str(v)
+        self._store(server_name, path, props)
+
+    def _create(self, server_name: str, path: Path, config_values: dict) -> None:
+        # A cloned directory keeps its own settings; only the new values change.
+        source = path if path.exists() else template_path()
+        with source.open("rb") as f:
+            props = javaproperties.load(f)
+        props.update(config_values)
+        self._store(server_name, path, props)
+
+    @timed(FILE_OPERATION_SECONDS, operation="properties_read")
+    async def read(self, server_name: str) -> dict:
+        server_path = await ensure_server_dir(server_name)
+        return await asyncio.to_thread(
+            self._load, server_name, server_path / PROPERTIES_FILE
+        )
+
+    @timed(FILE_OPERATION_SECONDS, operation="properties_update")
+    async def update(self, server_name: str, config_values: dict) -> None:
+        server_path = await ensure_server_dir(server_name)
+        async with self._locks[server_name]:
+            await asyncio.to_thread(
+                self._update, server_name, server_path / PROPERTIES_FILE, config_values
+            )
+
+    @timed(FILE_OPERATION_SECONDS, operation="properties_create")
+    async def create(self, server_name: str, config_values: dict) -> None:
+        server_path = await ensure_server_dir(server_name)
+        async with self._locks[server_name]:
+            await asyncio.to_thread(
+                self._create, server_name, server_path / PROPERTIES_FILE, config_values
+            )
+
+    def forget(self, server_name: str) -> None:
+        self._cache.pop(server_name, None)
+        self._locks.pop(server_name, None)
+
+
+properties_store = PropertiesStore()
 
 
 async def create_properties_from_template(server_name: str, rcon_password: str) -> None:
-    server_path = await ensure_server_dir(server_name)
-    output_path = server_path / "server.properties"
-
-    shutil.copy(template_path, output_path)
-
-    await update_properties(
-        server_name,
-        {
-            "rcon.password": rcon_password,
-        },
-    )
+    await properties_store.create(server_name, {"rcon.password": rcon_password})
 
 
 async def update_properties(server_name, config_values: dict) -> None:
-    server_path = await ensure_server_dir(str(server_name))
-    properties_path = server_path / "server.properties"
-
-    with properties_path.open("rb") as f:
-        props = javaproperties.load(f)
-
-    for k, v in config_values.items():
-        if v is not None:
-            props[k.replace("_", "-")] = str(v)
-
-    with properties_path.open("w", encoding="utf-8") as f:
-        javaproperties.dump(props, f)
+    await properties_store.update(str(server_name), config_values)
 
 
 __all__ = [
@@ -58,4 +174,10 @@ __all__ = [
     "remove_server_dir",
     "update_properties",
     "create_properties_from_template",
+    "properties_store",
+    "trash",
+    "content_cache",
+    "mark_hibernated",
+    "clear_hibernated",
+    "list_hibernated",
 ]